@@ -0,0 +1,317 @@
+"""打包流程热点路径的基准测试，结果输出为 JSON，便于跨版本对比。
+
+用法（在仓库根目录执行）:
+    python -m benchmarks.run                          # 默认规模，跳过无法运行的项目
+    python -m benchmarks.run --modules 2000 --depth 5 --log-lines 200000 -o result.json
+    python -m benchmarks.run --python /path/to/python --pyinstaller /path/to/pyinstaller   # 含端到端打包
+
+工具目录（~/.py_packager）在测试期间替换为临时目录，不影响本机已有的缓存与配置。
+没有 PyQt5 时跳过日志视图相关项，目标解释器未安装 PyInstaller 时跳过端到端打包。
+"""
+import argparse
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.config  # noqa: E402
+
+# 结果格式变化时递增
+RESULT_VERSION = 1
+
+
+def measure(name, func, repeat, setup=None, **extra):
+    """执行 repeat 次 func 并统计耗时（秒）；setup 在每次计时前调用，不计入耗时"""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    result = {
+        'name': name,
+        'repeat': repeat,
+        'min': min(times),
+        'median': statistics.median(times),
+        'mean': statistics.mean(times),
+        'max': max(times),
+    }
+    result.update(extra)
+    print(f"{name:<32} median {result['median'] * 1000:10.2f} ms   min {result['min'] * 1000:10.2f} ms", flush=True)
+    return result
+
+
+def bench_scan(project, repeat):
+    from core.scanner import ProjectScanner
+    root = project['root']
+    results = [measure('scan.os_walk', lambda: [f for _, _, files in os.walk(root) for f in files if f.endswith('.py')], repeat)]
+    results.append(measure('scan.scanner', lambda: ProjectScanner().scan(root), repeat))
+    return results
+
+
+def bench_entry_rank(project, repeat, tmp_dir):
+    from core.entry_rank import EntryRanker
+    from core.scanner import ProjectScanner
+    root = project['root']
+    files = ProjectScanner().scan(root)
+    cache_path = os.path.join(tmp_dir, 'ast_cache.json')
+
+    def drop_cache():
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+    results = [measure('entry_rank.cold', lambda: EntryRanker(cache_path).rank(root, files), repeat, setup=drop_cache)]
+    EntryRanker(cache_path).rank(root, files)
+    results.append(measure('entry_rank.warm', lambda: EntryRanker(cache_path).rank(root, files), repeat))
+    return results
+
+
+def _config(project, out_dir):
+    return {
+        'proj_path': project['root'], 'entry': project['entry'], 'icon': '', 'out_dir': out_dir,
+        'cb_noconsole': False, 'cb_onefile': True, 'cb_debug': False, 'custom_args': '--clean',
+        'data_files': project['datas'],
+    }
+
+
+def bench_build_cmd(project, repeat, out_dir):
+    from core.packager import Packager
+    cfg = _config(project, out_dir)
+    work_dir = os.path.join(out_dir, 'work')
+    return [measure('packager.build_cmd',
+                    lambda: Packager.from_config(cfg, sys.executable, lambda msg: None, use_cache=False,
+                                                 work_dir=work_dir).build_cmd(),
+                    repeat, data_files=len(project['datas']))]
+
+
+def bench_fingerprint(project, repeat):
+    from core.cache import compute_fingerprint
+    from core.packager import config_to_args
+    datas, opts = config_to_args(_config(project, ''))
+    env_info = {'python': sys.version, 'abi': [sys.platform, platform.machine()], 'pyinstaller': None, 'dists': []}
+    return [measure('cache.fingerprint',
+                    lambda: compute_fingerprint(project['root'], project['entry'], datas, opts, None, env_info), repeat)]
+
+
+def bench_config(project, repeat, tmp_dir, profiles=300):
+    """配置存储：写入一条历史并落盘、冷启动读入、在大量命名方案间切换"""
+    cfg = _config(project, tmp_dir)
+    cfg['data_files'] = project['datas']
+    path = os.path.join(tmp_dir, 'config.json')
+    store = core.config.ConfigStore(path, delay=None, legacy_paths=[])
+    for i in range(profiles):
+        store.save_profile(f'profile-{i}', dict(cfg, entry=f'entry{i}.py'))
+    for _ in range(core.config.HISTORY_LIMIT):
+        store.add_history(dict(cfg, out_dir=str(_)))
+    store.flush()
+
+    def save():
+        store.add_history(cfg)
+        store.flush()
+
+    def load():
+        return core.config.ConfigStore(path, delay=None, legacy_paths=[]).profile_names()
+
+    names = store.profile_names()
+    results = [measure('config.save', save, repeat, profiles=profiles)]
+    results.append(measure('config.load', load, repeat, profiles=profiles))
+    results.append(measure('config.switch_profile', lambda: [store.get_profile(n) for n in names[:100]], repeat,
+                           switches=100))
+    return results
+
+
+def _log_lines(count):
+    templates = [
+        '{} INFO: Analyzing hidden import \'pkg.mod{}\'',
+        '{} DEBUG: Processing dependency, name: \'libfoo{}.so\'',
+        '{} WARNING: Hidden import "missing{}" not found!',
+        '{} INFO: Processing standard module hook \'hook-mod{}.py\'',
+        '{} DEBUG: collect_submodules - scanning package{}',
+    ]
+    return [templates[i % len(templates)].format(i, i) for i in range(count)]
+
+
+def bench_log_core(repeat, log_lines, tmp_dir):
+    from core.log_buffer import LogBuffer
+    from core.log_parser import PyInstallerLogParser
+    from core.log_search import LogSearch
+    lines = _log_lines(log_lines)
+    results = []
+
+    def parse():
+        parser = PyInstallerLogParser()
+        for line in lines:
+            parser.feed(line)
+    results.append(measure('log_parser.feed', parse, repeat, lines=len(lines)))
+
+    def fill():
+        buffer = LogBuffer(spill_path=os.path.join(tmp_dir, 'spill.log'))
+        for start in range(0, len(lines), 500):
+            buffer.extend(lines[start:start + 500])
+        buffer.close()
+    results.append(measure('log_buffer.extend', fill, repeat, lines=len(lines)))
+    buffer = LogBuffer(spill_path=os.path.join(tmp_dir, 'spill.log'))
+    buffer.extend(lines)
+    results.append(measure('log_search.keyword', lambda: LogSearch('hook-mod1').rebuild(buffer), repeat, rows=len(buffer)))
+    results.append(measure('log_search.regex', lambda: LogSearch(r'mod\d+5\b', regex=True).rebuild(buffer), repeat, rows=len(buffer)))
+    results.append(measure('log_search.level', lambda: LogSearch(level='WARN').rebuild(buffer), repeat, rows=len(buffer)))
+    buffer.close()
+    return results
+
+
+def bench_log_view(repeat, log_lines):
+    """LogView 的追加吞吐与搜索延迟（需要 PyQt5，无界面环境下使用 offscreen 平台）"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    try:
+        from PyQt5.QtWidgets import QApplication
+    except ImportError:
+        print('未安装 PyQt5，跳过日志视图测试', flush=True)
+        return []
+    from ui.widgets import LogView
+    app = QApplication.instance() or QApplication([])
+    lines = _log_lines(log_lines)
+    views = []
+
+    def make_view():
+        view = LogView()
+        view.resize(800, 400)
+        view.show()
+        views.append(view)
+
+    def append():
+        view = views[-1]
+        for start in range(0, len(lines), 500):
+            view.append_logs(lines[start:start + 500])
+            app.processEvents()
+
+    def append_single():
+        view = views[-1]
+        for line in lines[:2000]:
+            view.append_log(line)
+        app.processEvents()
+    results = [measure('log_view.append_logs', append, repeat, setup=make_view, lines=len(lines))]
+    results.append(measure('log_view.append_log', append_single, repeat, setup=make_view, lines=2000))
+    view = views[-1]
+    append()
+    view.search_bar.setText('hook-mod1')
+
+    def search():
+        view.search_log()
+        app.processEvents()
+    results.append(measure('log_view.search_log', search, repeat, rows=len(view.buffer)))
+    for view in views:
+        view.buffer.close()
+        view.deleteLater()
+    app.processEvents()
+    return results
+
+
+def bench_end_to_end(project, repeat, out_dir, py_path, pyinstaller_path):
+    from core.packager import Packager
+    from core.probe import probe_python
+    try:
+        has_pyinstaller = bool(probe_python(py_path)['pyinstaller'])
+    except Exception:
+        has_pyinstaller = False
+    if not has_pyinstaller and not pyinstaller_path:
+        print(f'{py_path} 未安装 PyInstaller，跳过端到端打包测试', flush=True)
+        return []
+    cfg = _config(project, out_dir)
+    results = []
+    returncodes = []
+
+    def run(use_cache, clean):
+        def target():
+            cfg_run = dict(cfg, custom_args='--clean' if clean else '')
+            packager = Packager.from_config(cfg_run, py_path, lambda msg: None, use_cache=use_cache,
+                                            use_pyinstaller_exe=bool(pyinstaller_path), pyinstaller_path=pyinstaller_path)
+            returncodes.append(packager.run_sync())
+        return target
+    results.append(measure('packager.cold', run(False, True), repeat))
+    results.append(measure('packager.incremental', run(False, False), repeat))
+    run(True, False)()  # 写入构建缓存
+    results.append(measure('packager.cache_hit', run(True, False), repeat))
+    if any(returncodes):
+        print(f'端到端打包存在失败的运行，返回码: {returncodes}', flush=True)
+    for result in results:
+        result['returncodes'] = sorted(set(returncodes))
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, timeout=5,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="打包流程基准测试")
+    parser.add_argument('--modules', type=int, default=500, help="合成项目的模块数")
+    parser.add_argument('--depth', type=int, default=4, help="包嵌套层数（导入链深度）")
+    parser.add_argument('--data-files', type=int, default=50, help="数据文件个数")
+    parser.add_argument('--data-kb', type=int, default=64, help="单个数据文件大小（KB）")
+    parser.add_argument('--log-lines', type=int, default=100000, help="日志相关测试的行数")
+    parser.add_argument('--repeat', type=int, default=5, help="每项重复次数")
+    parser.add_argument('--python', dest='python_path', default=sys.executable, help="端到端打包使用的解释器")
+    parser.add_argument('--pyinstaller', dest='pyinstaller_path', help="pyinstaller 可执行文件路径")
+    parser.add_argument('--e2e-repeat', type=int, default=1, help="端到端打包的重复次数")
+    parser.add_argument('--skip-e2e', action='store_true', help="跳过端到端打包")
+    parser.add_argument('--skip-ui', action='store_true', help="跳过日志视图（PyQt5）测试")
+    parser.add_argument('-o', '--output', help="结果 JSON 路径（默认 benchmarks/results/<时间>.json）")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    tmp_dir = tempfile.mkdtemp(prefix='py_packager_bench_')
+    core.config.TOOL_DIR = os.path.join(tmp_dir, 'tool')
+    try:
+        from benchmarks.synth import generate_project
+        start = time.perf_counter()
+        project = generate_project(os.path.join(tmp_dir, 'project'), modules=args.modules, depth=args.depth,
+                                   data_files=args.data_files, data_kb=args.data_kb)
+        generate = time.perf_counter() - start
+        print(f"合成项目: {args.modules} 个模块，{args.depth} 层，{args.data_files} 个数据文件，生成耗时 {generate:.2f}s", flush=True)
+        out_dir = os.path.join(tmp_dir, 'dist')
+        os.makedirs(out_dir)
+        results = []
+        results += bench_scan(project, args.repeat)
+        results += bench_entry_rank(project, args.repeat, tmp_dir)
+        results += bench_build_cmd(project, args.repeat, out_dir)
+        results += bench_fingerprint(project, args.repeat)
+        results += bench_config(project, args.repeat, tmp_dir)
+        results += bench_log_core(args.repeat, args.log_lines, tmp_dir)
+        if not args.skip_ui:
+            results += bench_log_view(args.repeat, args.log_lines)
+        if not args.skip_e2e:
+            results += bench_end_to_end(project, args.e2e_repeat, out_dir, args.python_path, args.pyinstaller_path)
+        report = {
+            'version': RESULT_VERSION,
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'revision': _git_revision(),
+            'python': sys.version,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'params': {k: v for k, v in vars(args).items() if k != 'output'},
+            'results': results,
+        }
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results',
+                                         time.strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    core.config.write_json_atomic(output, report)
+    print(f"结果已写入: {output}", flush=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""生成用于基准测试的合成项目。
+
+项目结构：app.py 入口 + 按层级嵌套的包（每层 fanout 个子包），模块之间按层级互相导入，
+另有 data/ 目录下若干随机内容的数据文件。相同参数和 seed 生成的项目内容完全一致。
+"""
+import os
+import random
+
+
+def _module_source(index, imports):
+    lines = [f'import {name}' for name in imports]
+    lines += [
+        '',
+        f'VALUE_{index} = {index}',
+        '',
+        '',
+        f'def func_{index}(x):',
+        f'    return x * {index} + len({imports[0] if imports else "str"}.__name__)',
+        '',
+        '',
+        f'class Class{index}:',
+        '    def method(self):',
+        f'        return func_{index}({index})',
+        '',
+    ]
+    return '\n'.join(lines)
+
+
+def generate_project(root, modules=200, depth=3, fanout=4, data_files=20, data_kb=64, seed=0):
+    """在 root 下生成合成项目，返回 {'root', 'entry', 'modules', 'datas'}。
+
+    modules: 模块总数；depth: 包嵌套层数（每个模块导入上一层的模块，形成 depth 层导入链）；
+    data_files / data_kb: 数据文件个数与单个文件大小（KB）。
+    """
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    # 包目录：第 0 层为 pkg，之后每层 fanout 个子包
+    levels = [['pkg']]
+    for level in range(1, depth):
+        levels.append([f'{parent}.sub{i}' for parent in levels[-1] for i in range(fanout)])
+    packages = [pkg for level in levels for pkg in level]
+    for pkg in packages:
+        pkg_dir = os.path.join(root, *pkg.split('.'))
+        os.makedirs(pkg_dir, exist_ok=True)
+        with open(os.path.join(pkg_dir, '__init__.py'), 'w', encoding='utf-8') as f:
+            f.write('')
+    # 模块按包所在层级分配，较深层模块导入较浅层模块
+    names = []
+    for index in range(modules):
+        level = index % depth
+        pkg = rng.choice(levels[level])
+        name = f'{pkg}.mod{index}'
+        shallower = [n for n in names[-50:] if n.count('.') < name.count('.')]
+        imports = rng.sample(shallower, min(len(shallower), 3))
+        with open(os.path.join(root, *pkg.split('.'), f'mod{index}.py'), 'w', encoding='utf-8') as f:
+            f.write(_module_source(index, imports))
+        names.append(name)
+    # 入口导入最深一层的若干模块，间接覆盖整条导入链
+    deepest = [n for n in names if n.count('.') == depth] or names
+    entry_imports = deepest[:20]
+    with open(os.path.join(root, 'app.py'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(f'import {name}' for name in entry_imports))
+        f.write('\n\n\ndef main():\n    print("synthetic app", len(%r))\n\n\nif __name__ == "__main__":\n    main()\n'
+                % entry_imports)
+    datas = []
+    data_dir = os.path.join(root, 'data')
+    os.makedirs(data_dir, exist_ok=True)
+    for index in range(data_files):
+        path = os.path.join(data_dir, f'blob{index}.bin')
+        with open(path, 'wb') as f:
+            f.write(rng.getrandbits(data_kb * 1024 * 8).to_bytes(data_kb * 1024, 'little'))
+        datas.append({'src': os.path.join('data', f'blob{index}.bin'), 'dst': 'data'})
+    return {'root': root, 'entry': 'app.py', 'modules': names, 'datas': datas}
@@ -0,0 +1,116 @@
+"""命令行打包入口：读取导出的 JSON 配置并调用 Packager，不依赖 PyQt5。
+
+用法:
+    python cli.py config.json [--python PATH] [--pyinstaller PATH] [--no-cache]
+    python cli.py a.json b.json c.json -j 8      # 多个配置时并行批量打包
+    python cli.py config.json --remote-cache http://cache-host:8765   # 多台构建机共享构建缓存
+    python cli.py --install-pyinstaller --pyinstaller-version 6.3.0 --pyinstaller-source ./wheelhouse [config.json]
+"""
+import argparse
+import json
+import sys
+
+from core.env_utils import load_python_path, load_pyinstaller_path
+from core.installer import PyInstallerInstaller
+from core.packager import Packager
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Python项目打包工具（命令行模式）")
+    parser.add_argument('configs', nargs='*', help="导出的 JSON 配置文件，可指定多个")
+    parser.add_argument('--python', dest='python_path', help="Python 解释器路径（默认使用已保存的路径或当前解释器）")
+    parser.add_argument('--pyinstaller', dest='pyinstaller_path', help="pyinstaller 可执行文件路径")
+    parser.add_argument('--no-cache', action='store_true', help="禁用构建缓存，强制重新打包")
+    parser.add_argument('--no-dep-cache', action='store_true', help="不使用第三方依赖分析缓存，完整分析所有依赖")
+    parser.add_argument('--remote-cache', help="远程构建缓存：共享目录或 http(s):// 缓存服务地址；覆盖配置中的 remote_cache")
+    parser.add_argument('--no-remote-push', action='store_true', help="只从远程构建缓存下载，不上传本机构建的产物")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="批量打包的并行任务数（默认 CPU 核数）")
+    parser.add_argument('--timeout', type=int, default=None,
+                        help="单个打包任务的超时秒数，超时后结束进程树（默认使用配置中的 build_timeout，0 为不限）")
+    parser.add_argument('--variants', help="构建变体，逗号分隔（onedir,onefile,debug），共用一次依赖分析；覆盖配置中的 variants")
+    parser.add_argument('--install-pyinstaller', action='store_true', help="打包前先在解释器中安装 PyInstaller")
+    parser.add_argument('--pyinstaller-version', help="安装的 PyInstaller 版本，如 6.3.0 或 '>=6,<7'")
+    parser.add_argument('--pyinstaller-source', help="离线安装源：本地 wheelhouse/索引目录或索引 URL")
+    parser.add_argument('--install-timeout', type=int, default=None, help="安装超时秒数（默认不限）")
+    args = parser.parse_args(argv)
+    if not args.configs and not args.install_pyinstaller:
+        parser.error("请指定配置文件，或使用 --install-pyinstaller 只安装 PyInstaller")
+    return args
+
+
+def load_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def print_log(msg):
+    print(msg, flush=True)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    python_path = args.python_path or load_python_path() or sys.executable
+    pyinstaller_path = args.pyinstaller_path or load_pyinstaller_path()
+    if args.install_pyinstaller:
+        installer = PyInstallerInstaller(python_path, print_log, version=args.pyinstaller_version,
+                                         source=args.pyinstaller_source, timeout=args.install_timeout)
+        try:
+            returncode = installer.run_sync()
+        except KeyboardInterrupt:
+            installer.cancel()
+            return 130
+        if returncode != 0 or not args.configs:
+            return returncode
+        # 刚安装到解释器中的 PyInstaller 优先于已保存的 pyinstaller 可执行文件
+        pyinstaller_path = args.pyinstaller_path
+    try:
+        configs = [load_json(path) for path in args.configs]
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"配置文件读取失败: {e}", file=sys.stderr)
+        return 2
+    for cfg in configs:
+        if args.timeout is not None:
+            cfg['build_timeout'] = args.timeout
+        if args.no_dep_cache:
+            cfg['dep_cache'] = False
+        if args.remote_cache is not None:
+            cfg['remote_cache'] = args.remote_cache
+        if args.no_remote_push:
+            cfg['remote_push'] = False
+        if args.variants is not None:
+            cfg['variants'] = [v.strip() for v in args.variants.split(',') if v.strip()]
+    if len(configs) == 1:
+        packager = Packager.from_config(
+            configs[0], python_path, print_log,
+            use_pyinstaller_exe=bool(pyinstaller_path),
+            pyinstaller_path=pyinstaller_path,
+            use_cache=not args.no_cache
+        )
+        # PyInstaller 在独立进程组中运行，收不到终端的 Ctrl+C，由这里结束其进程树
+        packager.run()
+        try:
+            return packager.wait()
+        except KeyboardInterrupt:
+            packager.cancel()
+            packager.wait()
+            return 130
+    from core.batch import run_batch
+
+    def status_cb(job):
+        msg = f"[批量] {job.name}: {job.status}"
+        if job.returncode is not None:
+            msg += f"（返回码 {job.returncode}，耗时 {job.elapsed:.1f}s，日志: {job.log_path}）"
+        print(msg, flush=True)
+    try:
+        jobs = run_batch(configs, python_path, pyinstaller_path=pyinstaller_path, workers=args.jobs,
+                         status_callback=status_cb, use_cache=not args.no_cache)
+    except KeyboardInterrupt:
+        print("批量打包已取消", flush=True)
+        return 130
+    failed = [job for job in jobs if job.returncode != 0]
+    print(f"批量打包结束：成功 {len(jobs) - len(failed)}/{len(jobs)}", flush=True)
+    return failed[0].returncode if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+import contextlib
+import hashlib
+import json
+import ntpath
+import os
+import shutil
+import stat
+import sys
+import threading
+
+from core.config import file_lock, get_tool_dir, write_json_atomic
+
+# Linux 的 FICLONE ioctl：在 btrfs/xfs 等文件系统上共享数据块复制文件（reflink）
+FICLONE = 0x40049409
+# 产物库目录格式变化时递增
+STORE_VERSION = 1
+
+
+def reflink(src, dst):
+    """写时复制克隆 src 到 dst，文件系统不支持时抛出 OSError"""
+    if not sys.platform.startswith('linux'):
+        raise OSError('reflink 仅支持 Linux')
+    import fcntl
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            os.remove(dst)
+            raise
+    shutil.copymode(src, dst)
+
+
+def _hash_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _tmp_name(path):
+    return f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+
+def check_rel_path(rel):
+    """校验清单中的相对路径：不能是绝对路径，不能含 ..、. 或空的路径段，否则抛出 ValueError"""
+    parts = rel.split('/')
+    if (not rel or '\\' in rel or rel.startswith('/') or ntpath.splitdrive(rel)[0]
+            or any(part in ('', '.', '..') for part in parts)):
+        raise ValueError(f'清单中的路径不合法: {rel!r}')
+    return parts
+
+
+def check_link(rel, link):
+    """校验符号链接目标：必须是相对路径，且按字面解析后仍在产物目录内，否则抛出 ValueError"""
+    target = link.replace('\\', '/')
+    if not target or target.startswith('/') or ntpath.splitdrive(target)[0]:
+        raise ValueError(f'符号链接 {rel!r} 指向产物目录之外: {link!r}')
+    depth = len(check_rel_path(rel)) - 1
+    for part in target.split('/'):
+        if part == '..':
+            depth -= 1
+            if depth < 0:
+                raise ValueError(f'符号链接 {rel!r} 指向产物目录之外: {link!r}')
+        elif part not in ('', '.'):
+            depth += 1
+
+
+def check_links_inside(root, links):
+    """按实际解析结果（含链接套链接）确认 root 下的符号链接都指向 root 之内，否则抛出 ValueError"""
+    base = os.path.realpath(root)
+    for rel in links:
+        target = os.path.realpath(os.path.join(root, *rel.split('/')))
+        if os.path.commonpath([base, target]) != base:
+            raise ValueError(f'符号链接 {rel!r} 指向产物目录之外')
+
+
+def tree_order(item):
+    """还原目录产物时的顺序：先建目录，再写文件，最后建符号链接，写文件时不会经过链接"""
+    entry = item[1]
+    return 0 if entry.get('dir') else 2 if 'link' in entry else 1
+
+
+class ArtifactStore:
+    """按内容哈希保存构建产物中的文件，相同内容在磁盘上只存一份。
+
+    构建完成后 ingest() 逐个文件计算哈希：库中已有相同内容时把产物中的文件替换为指向库对象的
+    reflink/硬链接，没有时把该文件链接进库；materialize() 用链接按清单重新拼出整个产物。
+    优先使用 reflink（各副本独立，写时复制），不支持时使用硬链接；两者都不可用
+    （如产物目录与库不在同一文件系统）时该文件不入库。
+    PyInstaller 重新生成产物前会先删除旧文件，不会改写与库共享的数据；
+    库对象的大小和修改时间记录在索引中，被就地修改过的对象视为失效。
+    多个进程可共用同一个库：ingest()、gc() 以及调用方在 lock() 内完成的“入库 + 记录清单”
+    都持有库目录下的文件锁，进入时重新读取索引，gc 不会删掉其它进程刚入库、尚未记录的对象。
+    """
+
+    def __init__(self, root=None, link_mode='auto'):
+        self.root = root or get_tool_dir('artifact_store')
+        self.link_mode = link_mode  # auto / reflink / hardlink
+        self.index_path = os.path.join(self.root, 'index.json')
+        self._index = None
+        self._lock = threading.RLock()
+        self._depth = 0  # 当前线程嵌套进入 lock() 的层数
+
+    @contextlib.contextmanager
+    def lock(self):
+        """进程内外互斥地修改产物库，可嵌套；最外层进入时持有文件锁并从磁盘重新读取索引"""
+        with self._lock:
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield
+                finally:
+                    self._depth -= 1
+                return
+            os.makedirs(self.root, exist_ok=True)
+            with file_lock(os.path.join(self.root, 'lock')):
+                self._index = None  # 其它进程可能已修改索引
+                self._depth = 1
+                try:
+                    yield
+                finally:
+                    self._depth = 0
+
+    def _load_index(self):
+        if self._index is None:
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self._index = data.get('objects', {}) if data.get('version') == STORE_VERSION else {}
+            except Exception:
+                self._index = {}
+        return self._index
+
+    def _save_index(self):
+        write_json_atomic(self.index_path, {'version': STORE_VERSION, 'objects': self._index})
+
+    def object_path(self, key):
+        return os.path.join(self.root, 'objects', key[:2], key)
+
+    def _valid(self, key):
+        """库对象存在且大小、修改时间与入库时一致"""
+        recorded = self._load_index().get(key)
+        if not recorded:
+            return False
+        try:
+            st = os.stat(self.object_path(key))
+        except OSError:
+            return False
+        return [st.st_size, st.st_mtime_ns] == recorded
+
+    def _link(self, src, dst):
+        """按 link_mode 用 reflink 或硬链接创建 dst，返回使用的方式；都不可用时返回 None"""
+        if os.path.lexists(dst) and dst.endswith('.tmp'):
+            os.remove(dst)  # 上次中断残留的临时文件
+        modes = ['reflink', 'hardlink'] if self.link_mode == 'auto' else [self.link_mode]
+        for mode in modes:
+            try:
+                if mode == 'reflink':
+                    reflink(src, dst)
+                else:
+                    os.link(src, dst)
+                return mode
+            except OSError:
+                continue
+        return None
+
+    def _add_object(self, path, key):
+        obj = self.object_path(key)
+        os.makedirs(os.path.dirname(obj), exist_ok=True)
+        tmp = _tmp_name(obj)
+        mode = self._link(path, tmp)
+        if mode is None:
+            return None
+        os.replace(tmp, obj)
+        st = os.stat(obj)
+        self._load_index()[key] = [st.st_size, st.st_mtime_ns]
+        return mode
+
+    def _replace_with_object(self, path, key):
+        """把产物中的文件替换为指向库对象的链接，失败时保留原文件"""
+        tmp = _tmp_name(path)
+        mode = self._link(self.object_path(key), tmp)
+        if mode is None:
+            return None
+        os.replace(tmp, path)
+        return mode
+
+    def _ingest_file(self, path, stats):
+        st = os.lstat(path)
+        # 可执行位不同的相同内容分开存放，硬链接共享 inode，不能让它们互相改变权限
+        key = _hash_file(path) + ('.x' if st.st_mode & stat.S_IXUSR else '')
+        entry = {'key': key, 'size': st.st_size}
+        with self._lock:
+            if self._valid(key):
+                if self._replace_with_object(path, key):
+                    stats['reused_bytes'] += st.st_size
+                    stats['reused_files'] += 1
+                else:
+                    entry['stored'] = False
+            else:
+                self._load_index().pop(key, None)
+                if self._add_object(path, key):
+                    stats['new_bytes'] += st.st_size
+                else:
+                    entry['stored'] = False
+        if entry.get('stored') is False:
+            stats['skipped_files'] += 1
+        return entry
+
+    def ingest(self, path):
+        """把产物（文件或目录）入库，返回 (清单, 统计)；清单可交给 materialize 还原产物"""
+        with self.lock():
+            stats = {'files': 0, 'reused_files': 0, 'reused_bytes': 0, 'new_bytes': 0, 'skipped_files': 0}
+            if os.path.isfile(path):
+                stats['files'] = 1
+                entry = self._ingest_file(path, stats)
+                manifest = {'type': 'file', 'entry': entry}
+            else:
+                entries = {}
+                for root, dirs, files in os.walk(path):
+                    for name in dirs + files:
+                        full = os.path.join(root, name)
+                        rel = os.path.relpath(full, path).replace(os.sep, '/')
+                        if os.path.islink(full):
+                            entries[rel] = {'link': os.readlink(full)}
+                            check_link(rel, entries[rel]['link'])
+                        elif name in dirs:
+                            entries[rel] = {'dir': True}
+                        else:
+                            stats['files'] += 1
+                            entries[rel] = self._ingest_file(full, stats)
+                check_links_inside(path, [rel for rel, entry in entries.items() if 'link' in entry])
+                manifest = {'type': 'dir', 'entries': entries}
+            self._save_index()
+            manifest['complete'] = stats['skipped_files'] == 0
+            return manifest, stats
+
+    def can_materialize(self, manifest):
+        if not manifest or not manifest.get('complete'):
+            return False
+        entries = [manifest['entry']] if manifest['type'] == 'file' else manifest['entries'].values()
+        with self._lock:
+            return all(self._valid(e['key']) for e in entries if 'key' in e)
+
+    def materialize(self, manifest, dest):
+        """按清单用链接重建产物到 dest（先在临时位置拼好再替换），返回是否成功；
+        清单中的路径或符号链接会落到产物目录之外时不还原"""
+        if not self.can_materialize(manifest):
+            return False
+        tmp = _tmp_name(dest)
+        try:
+            if manifest['type'] == 'file':
+                if not self._link(self.object_path(manifest['entry']['key']), tmp):
+                    return False
+            else:
+                try:
+                    for rel, entry in manifest['entries'].items():
+                        if 'link' in entry:
+                            check_link(rel, entry['link'])
+                        else:
+                            check_rel_path(rel)
+                except ValueError:
+                    return False
+                os.makedirs(tmp)
+                for rel, entry in sorted(manifest['entries'].items(), key=tree_order):
+                    target = os.path.join(tmp, *rel.split('/'))
+                    if entry.get('dir'):
+                        os.makedirs(target, exist_ok=True)
+                    elif 'link' in entry:
+                        os.symlink(entry['link'], target)
+                    elif not self._link(self.object_path(entry['key']), target):
+                        return False
+                try:
+                    check_links_inside(tmp, [rel for rel, entry in manifest['entries'].items() if 'link' in entry])
+                except ValueError:
+                    return False
+            if os.path.isdir(dest) and not os.path.islink(dest):
+                shutil.rmtree(dest)
+            elif os.path.lexists(dest):
+                os.remove(dest)
+            os.replace(tmp, dest)
+            return True
+        finally:
+            if os.path.isdir(tmp):
+                shutil.rmtree(tmp, ignore_errors=True)
+            elif os.path.lexists(tmp):
+                os.remove(tmp)
+
+    def gc(self, manifests):
+        """删除不再被任何清单引用的库对象，返回释放的字节数（仍被产物硬链接占用的空间不会真正释放）"""
+        referenced = set()
+        for manifest in manifests:
+            if not manifest:
+                continue
+            entries = [manifest['entry']] if manifest['type'] == 'file' else manifest['entries'].values()
+            referenced.update(e['key'] for e in entries if 'key' in e)
+        freed = 0
+        with self.lock():
+            index = self._load_index()
+            for key in [k for k in index if k not in referenced]:
+                try:
+                    freed += os.path.getsize(self.object_path(key))
+                    os.remove(self.object_path(key))
+                except OSError:
+                    pass
+                del index[key]
+            self._save_index()
+        return freed
+
+
+_default_stores = {}
+_default_lock = threading.Lock()
+
+
+def get_store(root=None):
+    """同一进程内共享同一个产物库实例，避免并行构建各自改写索引"""
+    root = root or get_tool_dir('artifact_store')
+    with _default_lock:
+        if root not in _default_stores:
+            _default_stores[root] = ArtifactStore(root)
+        return _default_stores[root]
@@ -0,0 +1,126 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from core.cache import work_key
+from core.config import get_tool_dir
+from core.packager import STATE_LABELS, STATE_CANCELLED, Packager
+
+# 任务状态
+STATUS_PENDING = '等待中'
+STATUS_RUNNING = '运行中'
+STATUS_SUCCESS = '成功'
+STATUS_FAILED = '失败'
+STATUS_CANCELLED = STATE_LABELS[STATE_CANCELLED]
+# 等待任务时检查取消事件的间隔（秒）
+CANCEL_POLL_INTERVAL = 0.2
+
+
+class BatchJob:
+    """批量打包中的单个任务"""
+
+    def __init__(self, index, name, cfg):
+        self.index = index
+        self.name = name
+        self.cfg = cfg
+        self.status = STATUS_PENDING
+        self.returncode = None
+        self.elapsed = 0.0
+        self.dist_dir = None
+        self.work_dir = None
+        self.log_path = None
+        self.packager = None
+
+
+def _job_names(configs):
+    """按入口文件名给任务命名，重名时追加序号，保证每个任务的输出/工作目录互不冲突"""
+    names = []
+    seen = {}
+    for cfg in configs:
+        base = os.path.splitext(os.path.basename(cfg.get('entry', '')))[0] or 'job'
+        seen[base] = seen.get(base, 0) + 1
+        names.append(base if seen[base] == 1 else f'{base}-{seen[base]}')
+    return names
+
+
+def run_batch(configs, py_path, pyinstaller_path=None, workers=None, status_callback=None, log_dir=None, use_cache=True,
+              cancel_event=None):
+    """并行打包多个配置（get_config 格式），最多同时运行 workers 个 PyInstaller 进程。
+
+    每个任务输出到 <out_dir>/<任务名>，使用独立的工作目录和日志文件；
+    status_callback(job) 在任务状态变化时调用（在工作线程中）。返回 BatchJob 列表。
+    cancel_event（threading.Event）被设置或调用线程收到 KeyboardInterrupt 时，
+    结束正在运行的任务的进程树，尚未开始的任务直接标记为已取消。
+    """
+    workers = workers or os.cpu_count() or 1
+    log_dir = log_dir or get_tool_dir('batch_logs', time.strftime('%Y%m%d-%H%M%S'))
+    os.makedirs(log_dir, exist_ok=True)
+    status_callback = status_callback or (lambda job: None)
+    jobs = [BatchJob(i, name, cfg) for i, (name, cfg) in enumerate(zip(_job_names(configs), configs))]
+    used_work_keys = set()
+    for job in jobs:
+        job.dist_dir = os.path.join(job.cfg['out_dir'], job.name)
+        # 同一项目+入口在批量中出现多次时，工作目录按任务名区分，避免并发写同一目录
+        key = work_key(job.cfg['proj_path'], job.cfg['entry'])
+        if key in used_work_keys:
+            key = f'{key}-{job.name}'
+        used_work_keys.add(key)
+        job.work_dir = get_tool_dir('work', key)
+        job.log_path = os.path.join(log_dir, f'{job.name}.log')
+
+    cancelled = []  # 非空表示已取消，工作线程据此跳过未开始的任务
+
+    def run_job(job):
+        if cancelled:
+            job.status = STATUS_CANCELLED
+            status_callback(job)
+            return job
+        job.status = STATUS_RUNNING
+        status_callback(job)
+        start = time.time()
+        with open(job.log_path, 'w', encoding='utf-8') as log_file:
+            def log_cb(msg):
+                log_file.write(msg + '\n')
+            cfg = dict(job.cfg, out_dir=job.dist_dir)
+            try:
+                os.makedirs(job.dist_dir, exist_ok=True)
+                job.packager = Packager.from_config(
+                    cfg, py_path, log_cb,
+                    use_pyinstaller_exe=bool(pyinstaller_path),
+                    pyinstaller_path=pyinstaller_path,
+                    use_cache=use_cache,
+                    work_dir=job.work_dir
+                )
+                if cancelled:
+                    job.packager.cancel()
+                job.returncode = job.packager.run_sync()
+            except Exception as e:
+                log_cb(f'任务异常: {e}')
+                job.returncode = -1
+        job.elapsed = time.time() - start
+        if job.returncode == 0:
+            job.status = STATUS_SUCCESS
+        elif job.packager and job.packager.state in STATE_LABELS:
+            job.status = STATE_LABELS[job.packager.state]  # 失败/已取消/超时
+        else:
+            job.status = STATUS_FAILED
+        status_callback(job)
+        return job
+
+    def cancel_all():
+        cancelled.append(True)
+        for job in jobs:
+            if job.packager:
+                job.packager.cancel()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(run_job, job) for job in jobs}
+        try:
+            while pending:
+                _, pending = wait(pending, timeout=CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                if cancel_event is not None and cancel_event.is_set() and not cancelled:
+                    cancel_all()
+        except KeyboardInterrupt:
+            cancel_all()
+            raise
+    return jobs
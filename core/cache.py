@@ -0,0 +1,209 @@
+import contextlib
+import hashlib
+import json
+import os
+import threading
+import time
+
+from core.config import file_lock, get_tool_dir, write_json_atomic
+
+# 指纹格式变化时递增，使旧缓存自动失效
+CACHE_VERSION = 1
+# 扫描项目源码时跳过的目录
+SKIP_DIRS = {'.git', '.hg', '.svn', '__pycache__', 'build', 'dist', 'venv', '.venv', 'node_modules'}
+# 最多保留的缓存条目数，超出后删除最旧的条目及其独占的产物库对象
+MAX_ENTRIES = 64
+# lookup() 的结果：产物完好直接复用 / 产物已被覆盖或删除，从产物库还原
+HIT = 'hit'
+RESTORED = 'restored'
+# 参与指纹的解释器信息字段（不含路径，换机器后同样的环境得到同样的指纹）；
+# 平台用 abi（系统、架构、ABI 和 libc），不用含内核版本的 platform，内核补丁版本不同的构建机也能共享缓存
+ENV_FIELDS = ('python', 'abi', 'pyinstaller', 'dists')
+
+
+def _hash_file(h, path):
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(chunk)
+
+
+def _rel_name(path, base):
+    """项目内路径用相对路径，项目外只保留文件名，使指纹与机器上的绝对路径无关"""
+    path = os.path.abspath(path)
+    base = os.path.abspath(base)
+    try:
+        if os.path.commonpath([path, base]) == base:
+            return os.path.relpath(path, base).replace(os.sep, '/')
+    except ValueError:
+        pass
+    return os.path.basename(path)
+
+
+def _hash_tree(h, src, base):
+    if os.path.isfile(src):
+        h.update(_rel_name(src, base).encode('utf-8'))
+        _hash_file(h, src)
+        return
+    for root, dirs, files in os.walk(src):
+        dirs.sort()
+        for file in sorted(files):
+            path = os.path.join(root, file)
+            h.update(_rel_name(path, base).encode('utf-8'))
+            _hash_file(h, path)
+
+
+def iter_project_sources(proj_path):
+    """按固定顺序遍历项目下的 .py 文件，跳过版本库/虚拟环境/构建目录"""
+    for root, dirs, files in os.walk(proj_path):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+        for file in sorted(files):
+            if file.endswith('.py'):
+                yield os.path.join(root, file)
+
+
+def split_data_spec(d):
+    """拆分 --add-data 的 "源;目标" 格式，兼容 ; 和当前平台的 os.pathsep"""
+    sep = os.pathsep if os.pathsep in d else ';'
+    src, _, dst = d.rpartition(sep)
+    return src, dst, sep
+
+
+def compute_fingerprint(proj_path, entry, datas, opts, icon, env_info):
+    """计算构建输入的内容指纹：源码、数据文件、参数、图标、解释器及 PyInstaller 版本"""
+    h = hashlib.sha256()
+    h.update(f'v{CACHE_VERSION}\0'.encode('utf-8'))
+    h.update(json.dumps(env_info, sort_keys=True).encode('utf-8'))
+    h.update(entry.replace(os.sep, '/').encode('utf-8'))
+    for path in iter_project_sources(proj_path):
+        h.update(b'\0src\0')
+        h.update(_rel_name(path, proj_path).encode('utf-8'))
+        _hash_file(h, path)
+    for d in datas:
+        src, dst, _ = split_data_spec(d)
+        h.update(b'\0data\0')
+        h.update(dst.encode('utf-8'))
+        _hash_tree(h, os.path.join(proj_path, src), proj_path)
+    h.update(b'\0opts\0')
+    h.update(json.dumps(list(opts)).encode('utf-8'))
+    if icon:
+        h.update(b'\0icon\0')
+        _hash_file(h, icon)
+    return h.hexdigest()
+
+
+def work_key(proj_path, entry):
+    """同一项目+入口共用一个 PyInstaller 工作目录，输入变化时复用其中的分析结果"""
+    raw = os.path.normcase(os.path.abspath(proj_path)) + '\0' + entry
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def _artifact_signature(path):
+    """产物的轻量签名（大小+修改时间），用于判断产物是否被改动或删除"""
+    if os.path.isfile(path):
+        st = os.stat(path)
+        return [st.st_size, st.st_mtime_ns]
+    if os.path.isdir(path):
+        count = size = latest = 0
+        for root, dirs, files in os.walk(path):
+            for file in files:
+                st = os.stat(os.path.join(root, file))
+                count += 1
+                size += st.st_size
+                latest = max(latest, st.st_mtime_ns)
+        return [count, size, latest]
+    return None
+
+
+class BuildCache:
+    """以输入指纹为键记录构建产物，指纹未变且产物完好时可直接复用。
+
+    提供 store（core.artifact_store.ArtifactStore）时，条目还记录产物的内容清单：
+    产物已被其它构建覆盖或删除时，可从产物库用链接还原，无需重新打包。
+    清单文件的读改写持有文件锁，多个进程并行构建时不会互相覆盖记录；有产物库时先取产物库的锁，
+    清理无引用对象与其它进程的“入库 + 记录”互斥。
+    """
+
+    def __init__(self, root=None, store=None):
+        self.root = root or get_tool_dir('build_cache')
+        self.manifest_path = os.path.join(self.root, 'manifest.json')
+        self.store_ = store
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _store_lock(self):
+        return self.store_.lock() if self.store_ is not None else contextlib.nullcontext()
+
+    @contextlib.contextmanager
+    def _manifest_lock(self):
+        with self._lock, file_lock(self.manifest_path + '.lock'):
+            yield
+
+    def lookup(self, key, artifacts):
+        """指纹存在且记录的产物与本次期望产物一致时：产物未被改动返回 HIT，
+        从产物库还原成功返回 RESTORED；否则返回 None"""
+        with self._manifest_lock():
+            entry = self._load().get(key)
+        if not entry:
+            return None
+        recorded = entry.get('artifacts', {})
+        if sorted(recorded) != sorted(os.path.abspath(p) for p in artifacts):
+            return None
+        if all(_artifact_signature(p) == sig for p, sig in recorded.items()):
+            return HIT
+        trees = entry.get('trees') or {}
+        if self.store_ is None or sorted(trees) != sorted(recorded):
+            return None
+        # 还原期间持有产物库的锁，其它进程的清理不会删掉正在链接的对象
+        with self.store_.lock():
+            if not all(self.store_.can_materialize(tree) for tree in trees.values()):
+                return None
+            for path, tree in trees.items():
+                if not self.store_.materialize(tree, path):
+                    return None
+            self.store(key, list(recorded), trees)
+        return RESTORED
+
+    def store(self, key, artifacts, trees=None):
+        """记录产物签名；trees 为 {产物路径: 产物库清单}，用于日后还原"""
+        record = {os.path.abspath(p): _artifact_signature(p) for p in artifacts}
+        if any(sig is None for sig in record.values()):
+            return False
+        trees = {os.path.abspath(p): tree for p, tree in (trees or {}).items()}
+        with self._store_lock(), self._manifest_lock():
+            manifest = self._load()
+            # 同一输出位置的旧记录已被本次构建覆盖，无法还原的一并清掉
+            for old_key, old in list(manifest.items()):
+                if set(old.get('artifacts', {})) & set(record) and not old.get('trees'):
+                    del manifest[old_key]
+            manifest[key] = {'artifacts': record, 'trees': trees, 'time': time.time()}
+            if len(manifest) > MAX_ENTRIES:
+                for old_key in sorted(manifest, key=lambda k: manifest[k]['time'])[:len(manifest) - MAX_ENTRIES]:
+                    del manifest[old_key]
+                if self.store_ is not None:
+                    self.store_.gc(tree for entry in manifest.values() for tree in (entry.get('trees') or {}).values())
+            write_json_atomic(self.manifest_path, manifest)
+        return True
+
+
+_default_caches = {}
+_default_lock = threading.Lock()
+
+
+def get_build_cache(root=None, store=None):
+    """同一进程内每个缓存目录共享一个 BuildCache，并行构建的读改写由同一把锁串行化"""
+    root = root or get_tool_dir('build_cache')
+    with _default_lock:
+        cache = _default_caches.get(root)
+        if cache is None:
+            cache = _default_caches[root] = BuildCache(root, store)
+        elif cache.store_ is None:
+            cache.store_ = store
+        return cache
@@ -0,0 +1,127 @@
+"""远程构建缓存的 HTTP 服务，数据按 FileBackend 的目录结构保存，可在局域网内代替共享目录。
+
+用法:
+    python -m core.cache_server --root /srv/build-cache --port 8765 --host 0.0.0.0
+服务没有认证，任何能访问它的主机都能写入缓存，只在可信网络内开放；默认只监听本机。构建机使用 --remote-cache http://<主机>:8765（或界面中的远程构建缓存地址）。
+"""
+import argparse
+import json
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from core.remote_cache import FileBackend, check_key
+
+
+class _LimitedReader:
+    """只读取请求体的 Content-Length 个字节"""
+
+    def __init__(self, fp, size):
+        self.fp = fp
+        self.remaining = size
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        data = self.fp.read(self.remaining if size < 0 else min(size, self.remaining))
+        self.remaining -= len(data)
+        return data
+
+
+class CacheHandler(BaseHTTPRequestHandler):
+    # /cas/<内容哈希> 为文件内容，/ac/<输入指纹> 为产物清单
+    backend = None
+
+    def _route(self):
+        parts = self.path.strip('/').split('/')
+        if len(parts) != 2 or parts[0] not in ('cas', 'ac'):
+            return None, None
+        try:
+            return parts[0], check_key(parts[1])
+        except ValueError:
+            return None, None
+
+    def _reply(self, code, body=b'', content_type='text/plain; charset=utf-8'):
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _send(self, head):
+        kind, key = self._route()
+        if kind is None:
+            return self._reply(400, '无效的路径'.encode('utf-8'))
+        if kind == 'ac':
+            data = self.backend.get_entry(key)
+            if data is None:
+                return self._reply(404)
+            return self._reply(200, data, 'application/json')
+        try:
+            f = self.backend.open_object(key)
+        except FileNotFoundError:
+            return self._reply(404)
+        with f:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/octet-stream')
+            self.send_header('Content-Length', str(os.fstat(f.fileno()).st_size))
+            self.end_headers()
+            if not head:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    self.wfile.write(chunk)
+
+    def do_GET(self):
+        self._send(head=False)
+
+    def do_HEAD(self):
+        self._send(head=True)
+
+    def do_PUT(self):
+        kind, key = self._route()
+        length = int(self.headers.get('Content-Length') or 0)
+        body = _LimitedReader(self.rfile, length)
+        if kind is None:
+            body.read()
+            return self._reply(400, '无效的路径'.encode('utf-8'))
+        code, message = 201, b''
+        try:
+            if kind == 'cas':
+                # 后端先写临时文件并校验哈希，不符时不会留下对象
+                self.backend.put_object(key, body)
+            else:
+                data = body.read()
+                json.loads(data.decode('utf-8'))
+                self.backend.put_entry(key, data)
+        except ValueError as e:
+            code, message = 400, str(e).encode('utf-8')
+        # 对象已存在时后端不读取内容，回复前读完剩余的请求体
+        while body.read(1024 * 1024):
+            pass
+        self._reply(code, message)
+
+
+def make_server(root, host='127.0.0.1', port=8765):
+    handler = type('Handler', (CacheHandler,), {'backend': FileBackend(os.path.abspath(root))})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="远程构建缓存 HTTP 服务")
+    parser.add_argument('--root', required=True, help="缓存数据目录")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="监听地址（默认只监听本机 127.0.0.1；服务没有认证，在可信网络内才改为 0.0.0.0）")
+    parser.add_argument('--port', type=int, default=8765, help="监听端口（默认 8765）")
+    args = parser.parse_args(argv)
+    server = make_server(args.root, args.host, args.port)
+    print(f"远程构建缓存服务: http://{args.host}:{server.server_port}/，数据目录 {os.path.abspath(args.root)}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,14 +1,209 @@
+import atexit
+import contextlib
+import copy
 import json
 import os
+import sys
+import threading
+import time
 
 CONFIG_FILE = os.path.expanduser("~/.py_packager_config.json")
+# 配置文件格式版本；旧版本中该文件只保存最近一次的界面配置
+CONFIG_VERSION = 2
+# 历史记录保留条数
+HISTORY_LIMIT = 50
+# 修改后延迟写盘的秒数，期间的多次修改合并为一次写入
+SAVE_DELAY = 1.0
+# 工具级缓存/工作目录（构建缓存、PyInstaller 工作目录等）
+TOOL_DIR = os.path.expanduser("~/.py_packager")
 
-def save_config(data):
-    with open(CONFIG_FILE, "w", encoding="utf-8") as f:
+def get_tool_dir(*parts):
+    """返回工具级目录下的子路径，并确保目录存在"""
+    path = os.path.join(TOOL_DIR, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def write_json_atomic(path, data, fsync=False):
+    """先写临时文件再替换，避免写一半时崩溃导致 JSON 损坏；fsync 为 True 时替换前先落盘，断电也不丢失。
+    临时文件名带进程和线程号，同一进程的多个线程同时写同一文件时互不覆盖"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
 
-def load_config():
-    if os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+@contextlib.contextmanager
+def file_lock(path):
+    """跨进程互斥锁：独占锁定 path 文件（不存在时创建），退出时释放；进程异常退出时由系统自动释放"""
+    with open(path, 'a+b') as f:
+        if sys.platform == 'win32':
+            import msvcrt
+            while True:
+                try:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue  # LK_LOCK 重试约 10 秒后仍被占用时抛出，继续等待
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def legacy_env_config_path():
+    """旧版 env_utils 保存解释器路径等设置的 config.json 位置（打包后在用户主目录，开发环境在项目根目录）"""
+    if hasattr(sys, '_MEIPASS'):
+        return os.path.join(os.path.expanduser('~'), 'config.json')
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
             return json.load(f)
-    return {} 
\ No newline at end of file
+    except (OSError, ValueError):
+        return None
+
+
+class ConfigStore:
+    """工具的全部持久配置：全局设置（解释器路径等）、命名配置方案和打包配置历史记录。
+
+    首次访问时读入内存，之后的读取和切换方案都不再访问磁盘；修改在 SAVE_DELAY 秒后
+    由后台定时器合并写盘（临时文件 + 替换，不会留下写了一半的文件），进程退出时自动 flush()。
+    读到旧格式的配置文件时迁移其中的界面配置，并合并旧版 env_utils 的 config.json 中的设置。
+    """
+
+    def __init__(self, path=None, delay=SAVE_DELAY, legacy_paths=None):
+        self.path = path or CONFIG_FILE
+        self.delay = delay
+        self.legacy_paths = [legacy_env_config_path()] if legacy_paths is None else legacy_paths
+        self._data = None
+        self._dirty = False
+        self._timer = None
+        self._lock = threading.RLock()
+
+    def _load(self):
+        if self._data is not None:
+            return self._data
+        data = _read_json(self.path)
+        if os.path.exists(self.path) and data is None:
+            # 文件损坏（如被其他程序写坏）时保留一份副本，避免被新配置覆盖后无从恢复
+            try:
+                os.replace(self.path, f"{self.path}.corrupt-{int(time.time())}")
+            except OSError:
+                pass
+        if isinstance(data, dict) and data.get('version') == CONFIG_VERSION:
+            self._data = data
+            for key, default in (('settings', {}), ('profiles', {}), ('history', [])):
+                self._data.setdefault(key, default)
+            return self._data
+        self._data = {'version': CONFIG_VERSION, 'settings': {}, 'profiles': {}, 'history': []}
+        migrated = False
+        if isinstance(data, dict) and data:
+            # 旧格式：文件内容就是最近一次保存的界面配置
+            self._data['history'].append({'time': time.strftime('%Y-%m-%d %H:%M:%S'), 'config': data})
+            migrated = True
+        for legacy in self.legacy_paths:
+            settings = _read_json(legacy)
+            if isinstance(settings, dict):
+                for key, value in settings.items():
+                    self._data['settings'].setdefault(key, value)
+                migrated = True
+        if migrated:
+            self._mark_dirty()
+        return self._data
+
+    def _mark_dirty(self):
+        self._dirty = True
+        if self._timer is None and self.delay is not None:
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """立即写出尚未保存的修改"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            write_json_atomic(self.path, self._data, fsync=True)
+            self._dirty = False
+
+    def get(self, key, default=None):
+        with self._lock:
+            return copy.deepcopy(self._load()['settings'].get(key, default))
+
+    def set(self, key, value):
+        with self._lock:
+            settings = self._load()['settings']
+            if settings.get(key) != value:
+                settings[key] = copy.deepcopy(value)
+                self._mark_dirty()
+
+    def profile_names(self):
+        with self._lock:
+            return sorted(self._load()['profiles'])
+
+    def get_profile(self, name):
+        with self._lock:
+            return copy.deepcopy(self._load()['profiles'].get(name))
+
+    def save_profile(self, name, cfg):
+        with self._lock:
+            self._load()['profiles'][name] = copy.deepcopy(cfg)
+            self._mark_dirty()
+
+    def delete_profile(self, name):
+        with self._lock:
+            if self._load()['profiles'].pop(name, None) is not None:
+                self._mark_dirty()
+
+    def add_history(self, cfg):
+        """记录一次打包配置，与已有记录相同时移到最前，超出 HISTORY_LIMIT 的旧记录丢弃"""
+        with self._lock:
+            history = [item for item in self._load()['history'] if item['config'] != cfg]
+            history.insert(0, {'time': time.strftime('%Y-%m-%d %H:%M:%S'), 'config': copy.deepcopy(cfg)})
+            self._data['history'] = history[:HISTORY_LIMIT]
+            self._mark_dirty()
+
+    def history(self):
+        """历史记录 [{'time', 'config'}]，最新的在前"""
+        with self._lock:
+            return copy.deepcopy(self._load()['history'])
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_config_store():
+    """进程内共享的配置存储，退出时写出未保存的修改"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ConfigStore()
+            atexit.register(_store.flush)
+        return _store
+
+
+def save_config(data):
+    """保存界面配置到历史记录"""
+    get_config_store().add_history(data)
+
+
+def load_config():
+    """最近一次保存的界面配置，没有时返回空字典"""
+    history = get_config_store().history()
+    return history[0]['config'] if history else {}
@@ -0,0 +1,384 @@
+import hashlib
+import json
+import os
+import subprocess
+from collections import deque
+
+from core.cache import iter_project_sources
+from core.config import get_tool_dir, write_json_atomic
+from core.entry_rank import EntryRanker, _module_name, _resolve_import
+from core.exclude_advisor import find_xref, parse_xref
+from core.startup import IS_WINDOWS, kill_tree
+
+# 缓存条目格式变化时递增，使旧条目失效
+DEP_CACHE_VERSION = 1
+# 提取脚本依赖 PyInstaller 6.x 的 Analysis._GUTS/TOC 格式（(名称, 路径, 类型) 三元组列表）和
+# bindepend.binary_dependency_analysis，spec 中的 a.pure += [...] 也依赖同一格式；在 6.22.3 上验证过
+MIN_PYINSTALLER = (6, 0)
+# 依赖图中有实际模块的节点类型（缺失/已排除的模块不算）
+_REAL_TYPES = {'SourceModule', 'Package', 'Extension', 'CompiledModule', 'NamespacePackage', 'BuiltinModule'}
+
+# 在目标解释器中执行：读取 Analysis 的 TOC，把模块、二进制、数据文件和运行时钩子按第三方包（顶层导入名）归类。
+# 输入为标准输入中的 JSON：{"toc", "work_dir", "explicit"}，explicit 为配置中显式指定的数据文件/二进制路径
+_RECORD_SCRIPT = r'''
+import ast, json, os, site, sys, sysconfig
+from importlib import metadata
+import PyInstaller
+from PyInstaller.building.build_main import Analysis
+from PyInstaller.utils.misc import load_py_data_struct
+
+args = json.loads(sys.stdin.read())
+guts = dict(zip([name for name, _ in Analysis._GUTS], load_py_data_struct(args["toc"])))
+
+
+def norm(path):
+    return os.path.normcase(os.path.realpath(path))
+
+
+def under(path, dirs):
+    return any(path == d or path.startswith(d.rstrip(os.sep) + os.sep) for d in dirs)
+
+
+site_dirs = []
+try:
+    site_dirs += site.getsitepackages() + [site.getusersitepackages()]
+except Exception:
+    pass
+site_dirs += [sysconfig.get_paths().get("purelib"), sysconfig.get_paths().get("platlib")]
+site_dirs = sorted({norm(d) for d in site_dirs if d and os.path.isdir(d)}, key=len, reverse=True)
+
+owner, tops, versions, dist_files = {}, {}, {}, {}
+for dist in metadata.distributions():
+    name = dist.metadata["Name"]
+    if not name or name in versions:
+        continue
+    versions[name] = "%s==%s" % (name, dist.version)
+    files = list(dist.files or ())
+    dist_files[name] = files
+    top = set()
+    text = dist.read_text("top_level.txt")
+    if text:
+        top.update(line.strip() for line in text.splitlines() if line.strip().isidentifier())
+    for f in files:
+        owner.setdefault(norm(str(dist.locate_file(f))), name)
+        first = f.parts[0] if f.parts else ""
+        if not text and first != "__pycache__":
+            stem = first.split(".")[0]
+            if (len(f.parts) > 1 and first.isidentifier()) or \
+                    (len(f.parts) == 1 and first.endswith((".py", ".so", ".pyd")) and stem.isidentifier()):
+                top.add(stem)
+    tops[name] = sorted(top)
+providers = {}
+for name, names in tops.items():
+    for top in names:
+        providers.setdefault(top, []).append(name)
+
+
+def unit_of(path):
+    path = norm(path)
+    for d in site_dirs:
+        if path.startswith(d + os.sep):
+            first = path[len(d) + 1:].split(os.sep)[0].split(".")[0].split("-")[0]
+            dist = owner.get(path)
+            if dist and tops.get(dist):
+                return first if first in tops[dist] else tops[dist][0]
+            return first if first in providers else None
+    return None
+
+
+units = {}
+
+
+def unit(name):
+    if name not in units:
+        units[name] = {"pure": [], "binaries": [], "datas": [], "rthooks": [], "uncacheable": None}
+    return units[name]
+
+
+for name, path, typecode in guts["pure"]:
+    top = name.split(".")[0]
+    if top in providers and (path in (None, "-") or unit_of(path) == top):
+        unit(top)["pure"].append([name, path, typecode])
+for name, path, typecode in guts.get("_modules_outside_pyz", []):
+    top = name.split(".")[0]
+    if top in providers and path not in (None, "-") and unit_of(path) == top:
+        unit(top)["uncacheable"] = "模块 %s 未打入 PYZ" % name
+outside = []
+python_dirs = [norm(p) for p in {sys.prefix, sys.base_prefix, sys.exec_prefix, sys.base_exec_prefix}]
+known_dirs = python_dirs + [norm(os.path.dirname(PyInstaller.__file__)), norm(args["work_dir"])] + \
+    [norm(p) for p in args["explicit"]]
+for kind in ("binaries", "datas"):
+    for dest, src, typecode in guts[kind]:
+        if typecode == "SYMLINK":
+            continue
+        top = unit_of(src)
+        if top:
+            if os.path.basename(dest) != os.path.basename(src):
+                unit(top)["uncacheable"] = "%s 收集时改了文件名" % dest
+            unit(top)[kind].append([src, os.path.dirname(dest) or "."])
+        elif not under(norm(src), site_dirs + known_dirs):
+            outside.append((dest, src, typecode))
+
+# 系统目录中的共享库若是其他二进制的链接依赖（打包时会重新分析得到）则无需归类，其余来源不明
+unexplained = [src for _, src, _ in outside]
+if outside:
+    try:
+        from PyInstaller.depend import bindepend
+        roots = [e for e in guts["binaries"] if e[2] != "SYMLINK" and e not in outside]
+        try:
+            closure = bindepend.binary_dependency_analysis(roots, symlink_suppression_patterns=set())
+        except TypeError:  # 早期 6.x 没有该参数
+            closure = bindepend.binary_dependency_analysis(roots)
+        closure = {norm(e[1]) for e in closure}
+        unexplained = [src for _, src, _ in outside if norm(src) not in closure]
+    except Exception:
+        pass
+
+hook_dirs = [os.path.join(os.path.dirname(PyInstaller.__file__), "hooks")]
+hook_dirs += [p if isinstance(p, str) else p[0] for p in guts["hookspath"]]
+rthook_units = {}
+for d in hook_dirs:
+    try:
+        with open(os.path.join(d, "rthooks.dat"), "r", encoding="utf-8") as f:
+            data = ast.literal_eval(f.read())
+    except Exception:
+        continue
+    for module, files in data.items():
+        for f in files:
+            rthook_units.setdefault(norm(os.path.join(d, "rthooks", f)), set()).add(module.split(".")[0])
+for name, path, typecode in guts["scripts"]:
+    for top in rthook_units.get(norm(path), ()):
+        if top in units:
+            units[top]["rthooks"].append(path)
+
+contrib = versions.get("pyinstaller-hooks-contrib")
+for top, info in units.items():
+    info["versions"] = sorted(versions[d] for d in providers[top]) + ([contrib] if contrib else [])
+    inventory = set()
+    for dist in providers[top]:
+        for f in dist_files[dist]:
+            parts = [p for p in f.parts if p != "__pycache__"]
+            if not parts or parts[0].split(".")[0] != top or not parts[-1].endswith((".py", ".pyc", ".so", ".pyd")):
+                continue
+            stem = parts[-1].split(".")[0]
+            inventory.add(".".join(parts[:-1] + ([] if stem == "__init__" else [stem])))
+    info["inventory"] = sorted(inventory)
+print(json.dumps({"units": units, "tops": {top: sorted(names) for top, names in providers.items()},
+                  "unexplained": unexplained}))
+'''
+
+
+def _top(name):
+    return name.split('.')[0]
+
+
+def pyinstaller_supported(version):
+    """PyInstaller 版本号（如 '6.22.3'）是否满足 MIN_PYINSTALLER"""
+    try:
+        return tuple(int(part) for part in (version or '').split('.')[:2]) >= MIN_PYINSTALLER
+    except ValueError:
+        return False
+
+
+def _env_key(info):
+    data = json.dumps([DEP_CACHE_VERSION, info.get('python'), info.get('abi'), info.get('pyinstaller')])
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()[:16]
+
+
+def _load_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def project_imports(proj_path, entry, pathex=()):
+    """从入口出发沿项目内的导入找到会被打包的项目模块，返回它们导入的项目外模块名（绝对名）"""
+    proj_path = os.path.abspath(proj_path)
+    entry_path = os.path.normpath(os.path.join(proj_path, entry))
+    # 与 PyInstaller 的搜索路径一致：入口所在目录和 -p 指定的目录
+    bases = [os.path.dirname(entry_path)] + [os.path.normpath(os.path.join(proj_path, p)) for p in pathex]
+    files = [os.path.abspath(p) for p in iter_project_sources(proj_path)]
+    by_module = {}
+    module_of = {}
+    for path in files:
+        for base in bases:
+            if path.startswith(base + os.sep):
+                name = _module_name(os.path.relpath(path, base))
+                by_module.setdefault(name, path)
+                module_of.setdefault(path, name)
+    analyses = EntryRanker().analyze(proj_path, [os.path.relpath(p, proj_path) for p in files])
+    external = set()
+    seen = {entry_path}
+    queue = deque([entry_path])
+    while queue:
+        path = queue.popleft()
+        analysis = analyses.get(os.path.relpath(path, proj_path))
+        if not analysis:
+            continue
+        is_package = path.endswith('__init__.py')
+        for name in analysis['imports']:
+            name = _resolve_import(name, module_of.get(path, ''), is_package)
+            parts = name.split('.')
+            internal = False
+            for i in range(1, len(parts) + 1):
+                target = by_module.get('.'.join(parts[:i]))
+                if target:
+                    internal = True
+                    if target not in seen:
+                        seen.add(target)
+                        queue.append(target)
+            if not internal and name:
+                external.add(name)
+    return external
+
+
+class DepCache:
+    """第三方包依赖分析结果的缓存，所有项目共用。
+
+    每个条目对应一个顶层导入名（如 numpy），记录上次分析得到的模块、二进制、数据文件、运行时钩子
+    和它对包外模块的导入，按解释器、PyInstaller 版本分目录，条目内记录包（及 hooks-contrib）版本。
+    项目需要的第三方包都有有效条目时，这些包从依赖分析中排除，直接把缓存结果写入 spec。
+
+    PyInstaller 的 excludes 会连同子模块一起排除，这些包的钩子也不再运行，因此条目必须完整：
+    记录来自同一环境的完整分析（钩子收集的模块、二进制、数据文件和运行时钩子都在其中），
+    项目用到条目中没有但包内存在的子模块、包或 hooks-contrib 版本变化、文件已不存在时条目失效。
+    缓存的二进制作为 Analysis 的 binaries 传入，其链接依赖仍由 PyInstaller 重新分析。
+    只支持 PyInstaller MIN_PYINSTALLER 及以上版本，更早的版本既不使用也不记录。
+    """
+
+    def __init__(self, root=None):
+        self.root = root or get_tool_dir('dep_cache')
+
+    def _env_dir(self, info):
+        return os.path.join(self.root, _env_key(info))
+
+    def _entry_path(self, info, unit):
+        return os.path.join(self._env_dir(info), unit + '.json')
+
+    def _load_entry(self, info, unit, excludes, dists):
+        entry = _load_json(self._entry_path(info, unit))
+        if not entry or entry.get('version') != DEP_CACHE_VERSION:
+            return None
+        if not set(entry['versions']) <= dists or entry['excludes'] != excludes:
+            return None
+        files = [item[1] for item in entry['pure'] if item[1] not in (None, '-')]
+        files += [src for src, _ in entry['binaries'] + entry['datas']] + entry['rthooks']
+        if not all(os.path.exists(path) for path in files):
+            return None
+        entry['modules'] = set(entry['modules'])
+        entry['inventory'] = set(entry['inventory'])
+        return entry
+
+    def plan(self, info, proj_path, entry, spec):
+        """返回 (可直接使用的缓存结果, 说明, 构建后是否需要记录)。
+
+        项目用到的第三方包有任何一个没有有效缓存时不使用缓存，构建后记录；自定义钩子会影响第三方包的分析结果，
+        此时既不使用也不记录。
+        """
+        if not pyinstaller_supported(info.get('pyinstaller')):
+            return None, f"PyInstaller {info.get('pyinstaller')} 不支持（需要 {'.'.join(map(str, MIN_PYINSTALLER))}+）", False
+        if spec['hookspath'] or spec['runtime_hooks'] or 'noarchive' in spec['debug']:
+            return None, '使用了自定义钩子或 noarchive', False
+        index = _load_json(os.path.join(self._env_dir(info), 'index.json'))
+        if not index or index.get('dists') != sorted(info.get('dists') or []):
+            return None, '当前环境尚无缓存或已安装的包有变化', True
+        tops = index['tops']
+        collected = {_top(m) for key in ('collect_all', 'collect_submodules', 'collect_data', 'collect_binaries')
+                     for m in spec[key]}
+        dists = set(info['dists'])
+        roots = project_imports(proj_path, entry, spec['pathex']) | set(spec['hiddenimports'])
+        units = {}
+        queue = deque(sorted(roots))
+        while queue:
+            name = queue.popleft()
+            unit = _top(name)
+            if unit not in tops:
+                continue  # 标准库、项目内模块或未安装的模块，照常分析
+            if unit in collected:
+                return None, f'{unit} 使用了 collect 类参数', True
+            record = units.get(unit)
+            if record is None:
+                excludes = sorted(e for e in spec['excludes'] if _top(e) == unit)
+                record = self._load_entry(info, unit, excludes, dists)
+                if record is None:
+                    return None, f'{unit} 尚无有效缓存', True
+                units[unit] = record
+                queue.extend(record['external'])
+            if name not in record['modules'] and name in record['inventory']:
+                return None, f'{name} 不在 {unit} 的缓存结果中', True
+        if not units:
+            return None, '项目没有用到第三方包', False
+        deps = {'units': sorted(units), 'hiddenimports': set(), 'pure': [], 'binaries': [], 'datas': [],
+                'runtime_hooks': []}
+        for unit in deps['units']:
+            record = units[unit]
+            deps['hiddenimports'].update(m for m in record['external'] if _top(m) not in units)
+            deps['pure'] += [tuple(item) for item in record['pure']]
+            deps['binaries'] += [tuple(item) for item in record['binaries']]
+            deps['datas'] += [tuple(item) for item in record['datas']]
+            deps['runtime_hooks'] += [p for p in record['rthooks'] if p not in deps['runtime_hooks']]
+        deps['hiddenimports'] = sorted(deps['hiddenimports'])
+        return deps, f"{'、'.join(deps['units'])}（{sum(len(units[u]['modules']) for u in units)} 个模块）", False
+
+    def record(self, info, py_path, work_dir, app_name, spec, explicit=(), skip=(), on_start=None):
+        """从本次构建的 Analysis 结果中提取各第三方包的分析结果写入缓存，返回新写入的包名列表。
+
+        on_start(proc) 在提取进程启动后调用，供调用方取消时结束该进程。
+        """
+        toc = os.path.join(work_dir, app_name, 'Analysis-00.toc')
+        xref = find_xref(work_dir, app_name)
+        if not os.path.isfile(toc) or not xref:
+            raise RuntimeError('找不到本次构建的 Analysis 结果')
+        payload = json.dumps({'toc': toc, 'work_dir': work_dir, 'explicit': list(explicit)})
+        kwargs = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP} if IS_WINDOWS else {'start_new_session': True}
+        proc = subprocess.Popen([py_path, '-c', _RECORD_SCRIPT], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, text=True, encoding='utf-8', **kwargs)
+        try:
+            if on_start:
+                on_start(proc)
+            out, err = proc.communicate(payload, timeout=300)
+        except BaseException:
+            kill_tree(proc)
+            proc.wait()
+            raise
+        if proc.returncode != 0:
+            raise RuntimeError(err.strip().splitlines()[-1] if err.strip() else '提取失败')
+        data = json.loads(out.strip().splitlines()[-1])
+        if data['unexplained']:
+            # 无法确定这些文件由哪个包的钩子收集，跳过后排除包时可能漏掉它们
+            raise RuntimeError(f"有 {len(data['unexplained'])} 个来源不明的文件（如 {data['unexplained'][0]}）")
+        graph = parse_xref(xref)
+        env_dir = self._env_dir(info)
+        os.makedirs(env_dir, exist_ok=True)
+        written = []
+        for unit, item in sorted(data['units'].items()):
+            if unit in skip or item['uncacheable']:
+                continue
+            modules = {name for name, node in graph.items() if _top(name) == unit and node['type'] in _REAL_TYPES}
+            if not modules:
+                continue
+            external = {child for name in modules for child in graph[name]['imports']
+                        if _top(child) != unit and child in graph and graph[child]['type'] in _REAL_TYPES}
+            old = self._load_entry(info, unit, sorted(e for e in spec['excludes'] if _top(e) == unit),
+                                   set(info.get('dists') or []))
+            if old and old['modules'] >= modules:
+                continue
+            write_json_atomic(self._entry_path(info, unit), {
+                'version': DEP_CACHE_VERSION,
+                'unit': unit,
+                'versions': item['versions'],
+                'excludes': sorted(e for e in spec['excludes'] if _top(e) == unit),
+                'modules': sorted(modules),
+                'external': sorted(external),
+                'inventory': item['inventory'],
+                'pure': item['pure'],
+                'binaries': item['binaries'],
+                'datas': item['datas'],
+                'rthooks': item['rthooks'],
+            })
+            written.append(unit)
+        write_json_atomic(os.path.join(env_dir, 'index.json'),
+                          {'dists': sorted(info.get('dists') or []), 'tops': data['tops']})
+        return written
@@ -0,0 +1,140 @@
+import glob
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
+
+from core.probe import probe_python
+
+IS_WINDOWS = sys.platform.startswith('win')
+# 项目内常见的虚拟环境目录名
+PROJECT_VENV_DIRS = ('venv', '.venv', 'env', '.env')
+
+
+def _env_python(env_dir):
+    """虚拟环境/conda 环境目录下的解释器路径"""
+    if IS_WINDOWS:
+        return [os.path.join(env_dir, 'python.exe'), os.path.join(env_dir, 'Scripts', 'python.exe')]
+    return [os.path.join(env_dir, 'bin', 'python3'), os.path.join(env_dir, 'bin', 'python')]
+
+
+def _path_candidates():
+    names = ['python.exe', 'python3.exe'] if IS_WINDOWS else ['python3', 'python']
+    found = []
+    for directory in os.environ.get('PATH', '').split(os.pathsep):
+        # pyenv 等工具的 shims 只是转发脚本，真实解释器由 pyenv 来源收集
+        if os.path.basename(directory) == 'shims':
+            continue
+        for name in names:
+            path = os.path.join(directory, name)
+            if os.path.isfile(path):
+                found.append(path)
+        if not IS_WINDOWS:
+            found.extend(glob.glob(os.path.join(directory, 'python3.[0-9]*')))
+    return [p for p in found if not p.endswith(('-config', '.py'))]
+
+
+def _pyenv_candidates():
+    roots = [os.environ.get('PYENV_ROOT'), os.path.expanduser('~/.pyenv')]
+    if IS_WINDOWS:
+        roots.append(os.path.expanduser('~/.pyenv/pyenv-win'))
+    found = []
+    for root in filter(None, roots):
+        for env_dir in glob.glob(os.path.join(root, 'versions', '*')):
+            found.extend(_env_python(env_dir))
+            # pyenv-virtualenv 创建的环境
+            for sub_env in glob.glob(os.path.join(env_dir, 'envs', '*')):
+                found.extend(_env_python(sub_env))
+    return found
+
+
+def _conda_candidates():
+    roots = [os.environ.get('CONDA_PREFIX'), os.environ.get('CONDA_ROOT')]
+    for name in ('anaconda3', 'miniconda3', 'miniforge3', 'mambaforge', 'Anaconda3', 'Miniconda3'):
+        roots.append(os.path.expanduser(os.path.join('~', name)))
+        if IS_WINDOWS:
+            roots.append(os.path.join(os.environ.get('PROGRAMDATA', 'C:\\ProgramData'), name))
+    found = []
+    for root in filter(None, roots):
+        found.extend(_env_python(root))
+        for env_dir in glob.glob(os.path.join(root, 'envs', '*')):
+            found.extend(_env_python(env_dir))
+    return found
+
+
+def _virtualenv_candidates():
+    roots = [os.environ.get('WORKON_HOME'), os.path.expanduser('~/.virtualenvs'),
+             os.path.expanduser('~/.local/share/virtualenvs')]
+    if IS_WINDOWS:
+        local = os.environ.get('LOCALAPPDATA')
+        if local:
+            roots.append(os.path.join(local, 'Programs', 'Python'))
+    found = []
+    if os.environ.get('VIRTUAL_ENV'):
+        found.extend(_env_python(os.environ['VIRTUAL_ENV']))
+    for root in filter(None, roots):
+        for env_dir in glob.glob(os.path.join(root, '*')):
+            found.extend(_env_python(env_dir))
+    return found
+
+
+def _project_candidates(proj_path):
+    found = []
+    if proj_path:
+        for name in PROJECT_VENV_DIRS:
+            found.extend(_env_python(os.path.join(proj_path, name)))
+    return found
+
+
+def find_candidates(proj_path=None):
+    """并行收集各来源的候选解释器路径（去重、只保留存在的文件），项目内环境排在最前"""
+    sources = [lambda: _project_candidates(proj_path), _path_candidates, _pyenv_candidates,
+               _conda_candidates, _virtualenv_candidates]
+    with ThreadPoolExecutor(max_workers=len(sources)) as pool:
+        groups = list(pool.map(lambda source: source(), sources))
+    seen = set()
+    candidates = []
+    for path in (p for group in groups for p in group):
+        if not os.path.isfile(path):
+            continue
+        # 同一目录下指向同一文件的 python/python3，以及 /bin 与 /usr/bin 这类目录软链接只保留一个；
+        # 虚拟环境的解释器虽指向基础解释器，但所在目录不同，仍算独立环境
+        key = (os.path.normcase(os.path.realpath(os.path.dirname(path))), os.path.normcase(os.path.realpath(path)))
+        if key in seen:
+            continue
+        seen.add(key)
+        candidates.append(path)
+    return candidates
+
+
+def discover_pythons(callback, proj_path=None, timeout=5, max_workers=16, deadline=None):
+    """发现本机 Python 解释器：并发探测所有候选，每探测成功一个就 callback(path, info)。
+
+    单个候选探测超过 timeout 秒即放弃；deadline（秒）到达后不再等待剩余候选。
+    同一环境的多个入口（如 python 与 python3 软链接）只回调一次。返回发现的路径列表。
+    """
+    candidates = find_candidates(proj_path)
+    found = []
+    seen_envs = set()
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {pool.submit(probe_python, path, timeout): path for path in candidates}
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            path = futures[future]
+            try:
+                info = future.result()
+            except Exception:
+                continue
+            env_key = (info.get('python'), tuple(info.get('site_packages') or ()))
+            if env_key in seen_envs:
+                continue
+            seen_envs.add(env_key)
+            found.append(path)
+            callback(path, info)
+    except FuturesTimeoutError:
+        pass
+    finally:
+        # 不等待超过 deadline 仍未返回的探测
+        for future in futures:
+            future.cancel()
+        pool.shutdown(wait=False)
+    return found
@@ -0,0 +1,178 @@
+import ast
+import hashlib
+import json
+import os
+import threading
+
+from core.config import get_tool_dir, write_json_atomic
+
+# 解析结果格式变化时递增，使旧缓存失效
+ANALYSIS_VERSION = 1
+# 超过该数量的未缓存文件才启用进程池，少量文件直接在当前线程解析更快
+POOL_THRESHOLD = 64
+# 缓存条目上限，超出后只保留本次项目用到的条目
+MAX_CACHE_ENTRIES = 50000
+# 常见的入口文件名
+ENTRY_NAMES = {'main.py', 'app.py', 'run.py', '__main__.py', 'manage.py', 'start.py', 'launcher.py'}
+# 顶层出现即视为"启动应用"的调用
+APP_CALLS = {'QApplication', 'exec_', 'exec', 'run', 'mainloop', 'main'}
+
+
+def _is_main_guard(node):
+    """判断是否为 if __name__ == "__main__": 结构"""
+    if not isinstance(node, ast.If) or not isinstance(node.test, ast.Compare):
+        return False
+    test = node.test
+    sides = [test.left] + list(test.comparators)
+    has_name = any(isinstance(n, ast.Name) and n.id == '__name__' for n in sides)
+    has_main = any(isinstance(n, ast.Constant) and n.value == '__main__' for n in sides)
+    return has_name and has_main
+
+
+def _call_name(node):
+    func = node.func
+    if isinstance(func, ast.Name):
+        return func.id
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    return None
+
+
+def analyze_source(data):
+    """解析单个文件，返回入口相关特征；语法错误时返回 None"""
+    try:
+        tree = ast.parse(data)
+    except (SyntaxError, ValueError):
+        return None
+    main_guard = False
+    app_call = False
+    imports = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            # 相对导入记为 ".模块"，由调用方按文件位置解析
+            base = '.' * node.level + (node.module or '')
+            imports.add(base)
+            imports.update(f'{base}.{alias.name}' if node.module else base + alias.name for alias in node.names)
+    # 只看模块顶层和 __main__ 块中的调用，函数体内的调用不算启动
+    top_level = []
+    for node in tree.body:
+        if _is_main_guard(node):
+            main_guard = True
+            top_level.extend(node.body)
+        elif not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            top_level.append(node)
+    for stmt in top_level:
+        for node in ast.walk(stmt):
+            if isinstance(node, ast.Call) and _call_name(node) in APP_CALLS:
+                app_call = True
+                break
+    return {'main_guard': main_guard, 'app_call': app_call, 'imports': sorted(imports)}
+
+
+def _module_name(rel_path):
+    parts = rel_path.replace(os.sep, '/')[:-3].split('/')
+    if parts[-1] == '__init__':
+        parts = parts[:-1]
+    return '.'.join(parts)
+
+
+def _resolve_import(name, module, is_package):
+    """把相对导入解析为绝对模块名"""
+    if not name.startswith('.'):
+        return name
+    level = len(name) - len(name.lstrip('.'))
+    base = module.split('.') if module else []
+    if not is_package:
+        base = base[:-1]
+    if level > 1:
+        base = base[:len(base) - (level - 1)]
+    rest = name[level:]
+    return '.'.join(base + ([rest] if rest else []))
+
+
+class EntryRanker:
+    """按 AST 特征给候选入口文件排序，解析结果按文件内容哈希缓存到磁盘"""
+
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path or os.path.join(get_tool_dir(), 'ast_cache.json')
+        self._cache = None
+        self._lock = threading.Lock()
+
+    def _load_cache(self):
+        if self._cache is None:
+            try:
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self._cache = data.get('entries', {}) if data.get('version') == ANALYSIS_VERSION else {}
+            except Exception:
+                self._cache = {}
+        return self._cache
+
+    def analyze(self, root, rel_paths):
+        """返回 {相对路径: 解析结果}，未缓存的文件在进程池中并行解析"""
+        with self._lock:
+            cache = self._load_cache()
+            results = {}
+            hashes = {}
+            pending = []
+            for rel_path in rel_paths:
+                try:
+                    with open(os.path.join(root, rel_path), 'rb') as f:
+                        data = f.read()
+                except OSError:
+                    continue
+                digest = hashlib.sha1(data).hexdigest()
+                hashes[rel_path] = digest
+                if digest in cache:
+                    results[rel_path] = cache[digest]
+                else:
+                    pending.append((rel_path, digest, data))
+            if pending:
+                sources = [data for _, _, data in pending]
+                if len(pending) >= POOL_THRESHOLD:
+                    # 进程池会连带导入 multiprocessing，用到时再加载
+                    from concurrent.futures import ProcessPoolExecutor
+                    with ProcessPoolExecutor() as pool:
+                        analyses = list(pool.map(analyze_source, sources, chunksize=32))
+                else:
+                    analyses = [analyze_source(data) for data in sources]
+                for (rel_path, digest, _), analysis in zip(pending, analyses):
+                    cache[digest] = analysis
+                    results[rel_path] = analysis
+                if len(cache) > MAX_CACHE_ENTRIES:
+                    used = set(hashes.values())
+                    self._cache = cache = {k: v for k, v in cache.items() if k in used}
+                write_json_atomic(self.cache_path, {'version': ANALYSIS_VERSION, 'entries': cache})
+        return results
+
+    def rank(self, root, rel_paths):
+        """返回按入口可能性从高到低排序的相对路径列表"""
+        analyses = self.analyze(root, rel_paths)
+        modules = {rel_path: _module_name(rel_path) for rel_path in rel_paths}
+        imported = set()
+        for rel_path, analysis in analyses.items():
+            if not analysis:
+                continue
+            is_package = rel_path.endswith('__init__.py')
+            for name in analysis['imports']:
+                name = _resolve_import(name, modules[rel_path], is_package)
+                # 导入 a.b.c 也视为导入了 a、a.b
+                parts = name.split('.')
+                imported.update('.'.join(parts[:i]) for i in range(1, len(parts) + 1))
+
+        def score(rel_path):
+            analysis = analyses.get(rel_path)
+            value = 0
+            if analysis:
+                value += 100 if analysis['main_guard'] else 0
+                value += 50 if analysis['app_call'] else 0
+            if modules[rel_path] not in imported:
+                value += 20
+            if os.path.basename(rel_path) in ENTRY_NAMES:
+                value += 10
+            # 越靠近项目根目录越可能是入口
+            value -= rel_path.count(os.sep)
+            return value
+        return sorted(rel_paths, key=lambda p: (-score(p), p))
@@ -1,91 +1,48 @@
-import os
-import sys
-import json
-import subprocess
-
-def get_config_path():
-    # 判断是否为 PyInstaller 打包后的环境
-    if hasattr(sys, '_MEIPASS'):
-        # exe 运行时，放在用户主目录
-        return os.path.join(os.path.expanduser('~'), 'config.json')
-    else:
-        # 开发环境，放在项目根目录
-        return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
+from core.config import get_config_store
+from core.probe import probe_python
+from core.installer import PyInstallerInstaller
 
 
 def save_python_path(python_path: str):
     """保存用户选择的 Python 解释器路径"""
-    config_path = get_config_path()
-    config = {}
-    if os.path.exists(config_path):
-        with open(config_path, 'r', encoding='utf-8') as f:
-            try:
-                config = json.load(f)
-            except Exception:
-                config = {}
-    config['python_path'] = python_path
-    with open(config_path, 'w', encoding='utf-8') as f:
-        json.dump(config, f, ensure_ascii=False, indent=2)
+    get_config_store().set('python_path', python_path)
 
 
 def load_python_path() -> str:
     """读取已保存的 Python 解释器路径"""
-    config_path = get_config_path()
-    if not os.path.exists(config_path):
-        return None
-    with open(config_path, 'r', encoding='utf-8') as f:
-        try:
-            config = json.load(f)
-            return config.get('python_path')
-        except Exception:
-            return None
+    return get_config_store().get('python_path')
 
 
 def check_pyinstaller(python_path: str) -> bool:
-    """检查指定 Python 环境下 PyInstaller 是否可用"""
+    """检查指定 Python 环境下 PyInstaller 是否可用（结果走探测缓存）"""
     try:
-        result = subprocess.run(
-            [python_path, '-m', 'PyInstaller', '--version'],
-            capture_output=True, text=True, timeout=10
-        )
-        return result.returncode == 0
+        return bool(probe_python(python_path)['pyinstaller'])
     except Exception:
         return False
 
 
-def install_pyinstaller(python_path: str) -> bool:
-    """自动安装 PyInstaller"""
-    try:
-        result = subprocess.run(
-            [python_path, '-m', 'pip', 'install', 'pyinstaller'],
-            capture_output=True, text=True, timeout=60
-        )
-        return result.returncode == 0
-    except Exception:
-        return False
+def install_pyinstaller(python_path: str, log_callback=None, version=None, source=None) -> bool:
+    """在当前线程安装 PyInstaller（界面中请用 core.installer.PyInstallerInstaller 异步安装）"""
+    installer = PyInstallerInstaller(python_path, log_callback or (lambda msg: None), version=version, source=source)
+    return installer.run_sync() == 0
+
+
+def save_install_options(version: str, source: str):
+    """保存 PyInstaller 安装选项：固定版本、本地 wheelhouse/索引目录或 URL"""
+    store = get_config_store()
+    store.set('pyinstaller_version', version)
+    store.set('pyinstaller_source', source)
+
+
+def load_install_options():
+    """读取 PyInstaller 安装选项，返回 (版本, 安装源)"""
+    store = get_config_store()
+    return store.get('pyinstaller_version') or '', store.get('pyinstaller_source') or ''
 
 
 def save_pyinstaller_path(pyinstaller_path: str):
-    config_path = get_config_path()
-    config = {}
-    if os.path.exists(config_path):
-        with open(config_path, 'r', encoding='utf-8') as f:
-            try:
-                config = json.load(f)
-            except Exception:
-                config = {}
-    config['pyinstaller_path'] = pyinstaller_path
-    with open(config_path, 'w', encoding='utf-8') as f:
-        json.dump(config, f, ensure_ascii=False, indent=2)
+    get_config_store().set('pyinstaller_path', pyinstaller_path)
 
 
 def load_pyinstaller_path() -> str:
-    config_path = get_config_path()
-    if not os.path.exists(config_path):
-        return None
-    with open(config_path, 'r', encoding='utf-8') as f:
-        try:
-            config = json.load(f)
-            return config.get('pyinstaller_path')
-        except Exception:
-            return None 
\ No newline at end of file
+    return get_config_store().get('pyinstaller_path')
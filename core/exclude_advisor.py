@@ -0,0 +1,138 @@
+import os
+import re
+from collections import deque
+
+# 解释器启动必需（打入 base_library.zip）或几乎所有程序都会用到的模块，不作为排除候选
+MANDATORY_MODULES = {
+    'abc', 'builtins', 'codecs', 'collections', 'copyreg', 'encodings', 'enum', 'functools', 'genericpath',
+    'heapq', 'importlib', 'io', 'keyword', 'linecache', 'locale', 'ntpath', 'operator', 'os', 'posixpath',
+    're', 'reprlib', 'sre_compile', 'sre_constants', 'sre_parse', 'stat', 'struct', 'sys', 'token',
+    'tokenize', 'traceback', 'types', 'warnings', 'weakref', 'zipimport', 'marshal',
+}
+# 可以计入体积的节点类型（缺失/已排除/内置模块没有对应文件）
+_SIZED_TYPES = {'SourceModule', 'Package', 'Extension', 'CompiledModule', 'NamespacePackage'}
+
+_NODE_RE = re.compile(r'<a name="([^"]+)"></a>')
+_CODE_RE = re.compile(r'<a target="code" href="([^"]*)"')
+_TYPE_RE = re.compile(r'<span class="moduletype">([^<]*)</span>')
+_EXT_RE = re.compile(r'<span class="moduletype"><tt>([^<]+)</tt></span>')
+_LINK_RE = re.compile(r'<a href="#([^"]+)">')
+
+
+def find_xref(work_dir, app_name):
+    """PyInstaller 在 workpath/<名称>/ 下生成的模块交叉引用文件，不存在时返回 None"""
+    path = os.path.join(work_dir, app_name, f'xref-{app_name}.html')
+    return path if os.path.isfile(path) else None
+
+
+def parse_xref(path):
+    """解析 xref-*.html，返回 {模块名: {'type', 'path', 'imports', 'imported_by'}}"""
+    graph = {}
+    node = None
+    section = None
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            match = _NODE_RE.search(line)
+            if match:
+                node = {'type': '', 'path': None, 'imports': [], 'imported_by': []}
+                graph[match.group(1)] = node
+                section = None
+                continue
+            if node is None:
+                continue
+            match = _CODE_RE.search(line)
+            if match and node['path'] is None:
+                node['path'] = match.group(1) or None
+            match = _EXT_RE.search(line)
+            if match:
+                node['type'], node['path'] = 'Extension', match.group(1)
+            else:
+                match = _TYPE_RE.search(line)
+                if match:
+                    node['type'] = match.group(1)
+            if line.startswith('imports:'):
+                section = 'imports'
+            elif line.startswith('imported by:'):
+                section = 'imported_by'
+            elif section:
+                node[section].extend(_LINK_RE.findall(line))
+    return graph
+
+
+def _size(node):
+    if node['type'] not in _SIZED_TYPES or not node['path']:
+        return 0
+    try:
+        return os.path.getsize(node['path'])
+    except OSError:
+        return 0
+
+
+def _reachable(graph, roots, removed=None):
+    seen = set()
+    queue = deque(r for r in roots if not (removed and removed(r)))
+    seen.update(queue)
+    while queue:
+        name = queue.popleft()
+        for child in graph[name]['imports']:
+            if child in graph and child not in seen and not (removed and removed(child)):
+                seen.add(child)
+                queue.append(child)
+    return seen
+
+
+def _top(name):
+    return name.split('.', 1)[0]
+
+
+def _in_project(node, proj_path):
+    path = node['path']
+    if not path:
+        return False
+    try:
+        return os.path.commonpath([os.path.abspath(path), proj_path]) == proj_path
+    except ValueError:
+        return False
+
+
+def advise(graph, proj_path, min_bytes=32 * 1024, limit=40, excludes=()):
+    """给出 --exclude-module 候选。
+
+    对每个顶层包，从入口脚本出发重新计算去掉该包后仍可达的模块，
+    不再可达的模块文件大小之和即为预计节省（按源文件/扩展模块大小估算，不含其依赖的动态库和数据文件）。
+    项目自身模块直接导入的包、解释器必需模块不作为候选。
+    返回按节省大小降序的 [{'module', 'bytes', 'modules', 'importers', 'third_party', 'risky'}]。
+    """
+    proj_path = os.path.abspath(proj_path)
+    roots = [name for name, node in graph.items() if node['type'] == 'Script']
+    reachable = _reachable(graph, roots)
+    project = {name for name in reachable if graph[name]['type'] == 'Script' or _in_project(graph[name], proj_path)}
+    needed = {_top(name) for name in project}
+    needed |= {_top(child) for name in project for child in graph[name]['imports']}
+    needed |= MANDATORY_MODULES
+    sizes = {name: _size(graph[name]) for name in reachable}
+    candidates = {_top(name) for name in reachable if sizes[name]} - needed - set(excludes)
+    advice = []
+    for top in candidates:
+        prefix = top + '.'
+        remaining = _reachable(graph, roots, lambda n: n == top or n.startswith(prefix))
+        dropped = reachable - remaining
+        saved = sum(sizes[name] for name in dropped)
+        if saved < min_bytes:
+            continue
+        # 从包外导入该包的模块，帮助判断排除后是否会影响功能
+        importers = sorted({imp for name in dropped if _top(name) == top for imp in graph[name]['imported_by']
+                            if imp in remaining})
+        node = graph.get(top) or {}
+        path = node.get('path') or ''
+        advice.append({
+            'module': top,
+            'bytes': saved,
+            'modules': len(dropped),
+            'importers': importers,
+            'third_party': 'site-packages' in path or 'dist-packages' in path,
+            # 被解释器必需模块导入的包，排除后运行时出错的可能性较大
+            'risky': any(_top(imp) in MANDATORY_MODULES for imp in importers),
+        })
+    advice.sort(key=lambda item: -item['bytes'])
+    return advice[:limit]
@@ -0,0 +1,57 @@
+import builtins
+import importlib.util
+import sys
+import time
+
+
+class ImportProfiler:
+    """统计各模块首次导入的耗时（含子导入的累计耗时与扣除子导入后的自身耗时）。
+
+    通过替换 builtins.__import__ 实现，只记录调用时尚未加载的模块；
+    importlib.import_module 等绕过 __import__ 的导入计入其调用方。
+    """
+
+    def __init__(self):
+        self.records = {}  # 模块名 -> [累计秒, 自身秒]
+        self._stack = []
+        self._original = None
+        self.start_time = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        try:
+            full = importlib.util.resolve_name('.' * level + name, (globals or {}).get('__package__')) if level else name
+        except (ImportError, ValueError):
+            full = name
+        if full in sys.modules:
+            return self._original(name, globals, locals, fromlist, level)
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            record = self.records.setdefault(full, [0.0, 0.0])
+            record[0] += elapsed
+            record[1] += elapsed - children
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        self._original = builtins.__import__
+        builtins.__import__ = self._import
+
+    def stop(self):
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+    def report(self, top=30):
+        """按自身耗时降序的文本报告"""
+        total = sum(self_time for _, self_time in self.records.values())
+        lines = [f"导入耗时统计：共 {len(self.records)} 个模块，合计 {total * 1000:.1f} ms",
+                 f"{'自身(ms)':>10} {'累计(ms)':>10}  模块"]
+        for name, (cumulative, self_time) in sorted(self.records.items(), key=lambda item: -item[1][1])[:top]:
+            lines.append(f"{self_time * 1000:10.1f} {cumulative * 1000:10.1f}  {name}")
+        return '\n'.join(lines)
@@ -0,0 +1,114 @@
+import locale
+import os
+import pathlib
+import subprocess
+import threading
+
+from core.probe import invalidate_probe
+from core.startup import IS_WINDOWS, kill_tree
+
+PACKAGE = 'pyinstaller'
+
+
+def requirement(version=None):
+    """pip 安装要求：'6.3.0' 固定为 pyinstaller==6.3.0，'>=6,<7' 等约束原样拼接，空表示最新版"""
+    version = (version or '').strip()
+    if not version:
+        return PACKAGE
+    if version[0].isdigit():
+        return f'{PACKAGE}=={version}'
+    return PACKAGE + version
+
+
+def is_local_index(source):
+    """带 index.html 的本地目录（如 dir2pi 生成的 PEP 503 简单索引）作为索引，其余目录作为 wheelhouse"""
+    return os.path.isfile(os.path.join(source, 'index.html')) or \
+        os.path.isfile(os.path.join(source, PACKAGE, 'index.html'))
+
+
+class PyInstallerInstaller:
+    """在目标解释器中用 pip 安装 PyInstaller，输出逐行回调，可随时取消。
+
+    source 为本地目录或 URL：普通目录作为 wheelhouse（--no-index --find-links），
+    本地索引目录和 URL 作为包索引（--index-url），便于离线机器安装；version 用于固定版本。
+    """
+
+    def __init__(self, python_path, log_callback, version=None, source=None, timeout=None, done_callback=None):
+        self.python_path = python_path
+        self.log_callback = log_callback
+        self.version = version
+        self.source = source
+        self.timeout = timeout  # 秒，None 表示不限时
+        self.done_callback = done_callback
+        self.proc = None
+        self.returncode = None
+        self.cancelled = False
+        self._timer = None
+
+    def build_cmd(self):
+        cmd = [self.python_path, '-m', 'pip', 'install', '--disable-pip-version-check', '--progress-bar', 'off']
+        source = self.source
+        if source:
+            if os.path.isdir(source):
+                if is_local_index(source):
+                    cmd += ['--index-url', pathlib.Path(source).resolve().as_uri()]
+                else:
+                    cmd += ['--no-index', '--find-links', source]
+            else:
+                cmd += ['--index-url', source]
+        cmd.append(requirement(self.version))
+        return cmd
+
+    def cancel(self):
+        """结束 pip 及其子进程（如源码包的构建进程）"""
+        self.cancelled = True
+        if self.proc and self.proc.poll() is None:
+            kill_tree(self.proc)
+
+    def _on_timeout(self):
+        if self.proc and self.proc.poll() is None:
+            self.log_callback(f"安装超过 {self.timeout} 秒，已终止")
+            self.cancel()
+
+    def run_sync(self):
+        """在当前线程安装，返回 pip 返回码（取消或无法启动时为 -1）"""
+        cmd = self.build_cmd()
+        self.log_callback(f"安装命令: {' '.join(cmd)}")
+        env = os.environ.copy()
+        env['PYTHONUNBUFFERED'] = '1'
+        kwargs = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP} if IS_WINDOWS else {'start_new_session': True}
+        try:
+            self.proc = subprocess.Popen(
+                cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL, text=True,
+                encoding=locale.getpreferredencoding(False), errors='replace', bufsize=1, env=env, **kwargs
+            )
+        except OSError as e:
+            self.log_callback(f"无法启动 pip: {e}")
+            self.returncode = -1
+        else:
+            if self.cancelled:
+                kill_tree(self.proc)  # 启动前已取消
+            if self.timeout:
+                self._timer = threading.Timer(self.timeout, self._on_timeout)
+                self._timer.daemon = True
+                self._timer.start()
+            for line in self.proc.stdout:
+                self.log_callback(line.rstrip())
+            self.proc.wait()
+            if self._timer:
+                self._timer.cancel()
+            self.returncode = -1 if self.cancelled else self.proc.returncode
+            # 安装结果改变了环境，丢弃该解释器的探测缓存
+            invalidate_probe(self.python_path)
+        if self.cancelled:
+            self.log_callback("PyInstaller 安装已取消")
+        elif self.returncode == 0:
+            self.log_callback("PyInstaller 安装成功")
+        else:
+            self.log_callback(f"PyInstaller 安装失败，返回码: {self.returncode}")
+        if self.done_callback:
+            self.done_callback(self.returncode)
+        return self.returncode
+
+    def run(self):
+        threading.Thread(target=self.run_sync, daemon=True).start()
@@ -0,0 +1,63 @@
+import threading
+import time
+
+
+class LineBatcher:
+    """把逐行日志合并成批：攒够 max_lines 行或距首行超过 max_delay 秒就整批回调一次。
+
+    add() 在读取子进程输出的线程中调用；另有一个后台线程负责按时间刷新，
+    保证子进程长时间无输出时已攒下的行也能及时送达。
+    """
+
+    def __init__(self, flush_callback, max_lines=500, max_delay=0.1):
+        self.flush_callback = flush_callback
+        self.max_lines = max_lines
+        self.max_delay = max_delay
+        self._lines = []
+        self._first_time = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._timer = threading.Thread(target=self._timer_loop, daemon=True)
+        self._timer.start()
+
+    def add(self, line):
+        with self._cond:
+            if not self._lines:
+                self._first_time = time.monotonic()
+                self._cond.notify()
+            self._lines.append(line)
+            if len(self._lines) >= self.max_lines:
+                self._flush_locked()
+
+    def flush(self):
+        with self._cond:
+            self._flush_locked()
+
+    def close(self):
+        """停止后台刷新线程并送出剩余的行"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._timer.join()
+        self.flush()
+
+    def _flush_locked(self):
+        # 持锁回调，保证两个线程送出的批次不会乱序
+        if not self._lines:
+            return
+        batch, self._lines = self._lines, []
+        self._first_time = None
+        self.flush_callback(batch)
+
+    def _timer_loop(self):
+        while True:
+            with self._cond:
+                while not self._closed and not self._lines:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                remaining = self._first_time + self.max_delay - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                self._flush_locked()
@@ -0,0 +1,141 @@
+import os
+import time
+from collections import deque
+
+from core.config import get_tool_dir
+
+# 日志级别（按关键字粗分，与界面配色对应）
+LEVEL_ERROR = 'ERROR'
+LEVEL_WARN = 'WARN'
+LEVEL_SUCCESS = 'SUCCESS'
+LEVEL_DEBUG = 'DEBUG'
+LEVEL_INFO = 'INFO'
+LEVEL_PLAIN = ''
+
+
+def classify(text):
+    """按关键字判断日志级别"""
+    lower = text.lower()
+    if any(w in lower for w in ["error", "failed", "失败", "traceback"]):
+        return LEVEL_ERROR
+    if any(w in lower for w in ["warn", "警告", "warning"]):
+        return LEVEL_WARN
+    if any(w in lower for w in ["success", "打包成功", "build complete", "completed successfully"]):
+        return LEVEL_SUCCESS
+    if "debug" in lower:
+        return LEVEL_DEBUG
+    if "info" in lower:
+        return LEVEL_INFO
+    return LEVEL_PLAIN
+
+
+class LogRecord:
+    __slots__ = ('seq', 'text', 'level', 'timestamp')
+
+    def __init__(self, seq, text, level, timestamp):
+        self.seq = seq
+        self.text = text
+        self.level = level
+        self.timestamp = timestamp
+
+    def format(self):
+        ts = time.strftime('%H:%M:%S', time.localtime(self.timestamp))
+        return f"[{ts}] [{self.level or '-'}] {self.text}"
+
+
+class LogBuffer:
+    """固定容量的日志环形缓冲区。
+
+    超出容量的最旧记录写入磁盘上的溢出文件，内存占用保持恒定；
+    导出时把溢出文件与内存中的记录拼接，得到完整历史。
+    每条记录带递增序号 seq，第 row 行对应 seq == first_seq + row。
+    """
+
+    def __init__(self, capacity=20000, spill_path=None):
+        self.capacity = capacity
+        self.spill_path = spill_path or os.path.join(get_tool_dir('logs'), f'session-{os.getpid()}.log')
+        self._records = deque()
+        # 按级别索引记录序号，按级别过滤时无需逐行扫描
+        self.level_index = {}
+        self._next_seq = 0
+        self._spill_file = None
+
+    def __len__(self):
+        return len(self._records)
+
+    def __getitem__(self, row):
+        return self._records[row]
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def get(self, seq):
+        """按序号取记录，已被淘汰时返回 None"""
+        row = seq - self.first_seq
+        if 0 <= row < len(self._records):
+            return self._records[row]
+        return None
+
+    @property
+    def first_seq(self):
+        return self._records[0].seq if self._records else self._next_seq
+
+    def overflow(self, count):
+        """追加 count 条后需要淘汰的旧记录数"""
+        return max(0, len(self._records) + count - self.capacity)
+
+    def evict(self, count):
+        """淘汰最旧的 count 条记录，写入溢出文件"""
+        count = min(count, len(self._records))
+        evicted = [self._records.popleft() for _ in range(count)]
+        for record in evicted:
+            self.level_index[record.level].popleft()
+        self._spill(evicted)
+
+    def _spill(self, records):
+        if not records:
+            return
+        if self._spill_file is None:
+            self._spill_file = open(self.spill_path, 'a', encoding='utf-8')
+        self._spill_file.write(''.join(record.format() + '\n' for record in records))
+
+    def extend(self, lines):
+        """追加多行并返回新增记录；超出容量时自动淘汰最旧记录（界面模型会先调用 evict 以便通知视图）"""
+        now = time.time()
+        records = []
+        for text in lines:
+            records.append(LogRecord(self._next_seq, text, classify(text), now))
+            self._next_seq += 1
+        # 先淘汰已有的旧记录，再写入本批多出的部分，溢出文件保持时间顺序
+        self.evict(self.overflow(min(len(records), self.capacity)))
+        if len(records) > self.capacity:
+            # 单批超过容量时，多出的部分直接写入溢出文件
+            self._spill(records[:-self.capacity])
+            records = records[-self.capacity:]
+        self._records.extend(records)
+        for record in records:
+            self.level_index.setdefault(record.level, deque()).append(record.seq)
+        return records
+
+    def clear(self):
+        self._records.clear()
+        self.level_index = {}
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+        if os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
+
+    def export(self, path):
+        """导出完整历史（溢出文件 + 内存中的记录）"""
+        with open(path, 'w', encoding='utf-8') as out:
+            if self._spill_file is not None:
+                self._spill_file.flush()
+                with open(self.spill_path, 'r', encoding='utf-8') as spill:
+                    for chunk in iter(lambda: spill.read(1024 * 1024), ''):
+                        out.write(chunk)
+            for record in self._records:
+                out.write(record.format() + '\n')
+
+    def close(self):
+        self.clear()
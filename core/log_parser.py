@@ -0,0 +1,173 @@
+import re
+import time
+
+# 事件类型
+EVENT_PHASE = 'phase'        # 进入新阶段
+EVENT_PROGRESS = 'progress'  # 阶段内进度推进
+EVENT_WARNING = 'warning'
+EVENT_ERROR = 'error'
+EVENT_DONE = 'done'
+
+# 构建阶段及其在总进度中的区间（单文件模式 PKG 占比较大，目录模式 COLLECT 占比较大，取折中）
+PHASE_STARTUP = 'startup'
+PHASE_ANALYSIS = 'analysis'
+PHASE_PYZ = 'pyz'
+PHASE_PKG = 'pkg'
+PHASE_EXE = 'exe'
+PHASE_COLLECT = 'collect'
+PHASE_DONE = 'done'
+PHASE_RANGES = {
+    PHASE_STARTUP: (0.0, 0.03),
+    PHASE_ANALYSIS: (0.03, 0.65),
+    PHASE_PYZ: (0.65, 0.72),
+    PHASE_PKG: (0.72, 0.88),
+    PHASE_EXE: (0.88, 0.93),
+    PHASE_COLLECT: (0.93, 1.0),
+    PHASE_DONE: (1.0, 1.0),
+}
+PHASE_LABELS = {
+    PHASE_STARTUP: '准备中',
+    PHASE_ANALYSIS: '依赖分析',
+    PHASE_PYZ: '打包 PYZ',
+    PHASE_PKG: '打包 PKG',
+    PHASE_EXE: '生成 EXE',
+    PHASE_COLLECT: '收集文件',
+    PHASE_DONE: '完成',
+}
+
+# 进入各阶段的标志行
+_PHASE_PATTERNS = [
+    (re.compile(r'INFO: (checking|Running|Building) Analysis'), PHASE_ANALYSIS),
+    (re.compile(r'INFO: (checking|Building) PYZ'), PHASE_PYZ),
+    (re.compile(r'INFO: (checking|Building) PKG'), PHASE_PKG),
+    (re.compile(r'INFO: (checking|Building) EXE'), PHASE_EXE),
+    (re.compile(r'INFO: (checking|Building) COLLECT'), PHASE_COLLECT),
+    (re.compile(r'INFO: Build complete!'), PHASE_DONE),
+]
+# 依赖分析阶段内的里程碑 -> 阶段内进度
+_ANALYSIS_MILESTONES = [
+    (re.compile(r'INFO: Initializing module dependency graph'), 0.02),
+    (re.compile(r'INFO: Analyzing modules for base_library\.zip'), 0.05),
+    (re.compile(r'INFO: Caching module dependency graph'), 0.30),
+    (re.compile(r'INFO: Analyzing (?!modules for|run-time hooks|binary)'), 0.35),
+    (re.compile(r'INFO: Processing module hooks \(post-graph stage\)'), 0.65),
+    (re.compile(r'INFO: Looking for ctypes DLLs'), 0.75),
+    (re.compile(r'INFO: Analyzing run-time hooks'), 0.80),
+    (re.compile(r'INFO: Looking for dynamic libraries'), 0.85),
+    (re.compile(r'INFO: Warnings written to'), 0.97),
+]
+_HOOK_RE = re.compile(r'INFO: Processing (?:standard |pre-safe-import-module |pre-find-module-path )?(?:module )?hook\b')
+_BINARY_RE = re.compile(r'DEBUG: Analyzing binary')
+_WARNING_RE = re.compile(r'\bWARNING: ')
+_ERROR_RE = re.compile(r'\b(ERROR|CRITICAL): |^Traceback \(most recent call last\)|^\w+Error: ')
+_TIMESTAMP_RE = re.compile(r'^\d+ ')
+
+
+class BuildEvent:
+    __slots__ = ('kind', 'phase', 'progress', 'eta', 'message', 'data')
+
+    def __init__(self, kind, phase, progress, eta=None, message='', data=None):
+        self.kind = kind
+        self.phase = phase
+        self.progress = progress  # 0~1 的总进度
+        self.eta = eta            # 预计剩余秒数，未知时为 None
+        self.message = message
+        self.data = data or {}
+
+    def __repr__(self):
+        return f'BuildEvent({self.kind!r}, {self.phase!r}, {self.progress:.2f}, eta={self.eta})'
+
+
+class PyInstallerLogParser:
+    """把 PyInstaller 的输出流解析为结构化事件（阶段、进度、警告、错误）。
+
+    纯文本解析、无界面依赖，在读取子进程输出的线程中逐行调用 feed()。
+    """
+
+    def __init__(self):
+        self.start_time = time.monotonic()
+        self.phase = PHASE_STARTUP
+        self.phase_fraction = 0.0
+        self.phase_started = {PHASE_STARTUP: self.start_time}
+        self.hook_count = 0
+        self.binary_count = 0
+        self.warnings = 0
+        self.errors = 0
+
+    @property
+    def progress(self):
+        low, high = PHASE_RANGES[self.phase]
+        return low + (high - low) * self.phase_fraction
+
+    def eta(self):
+        """按已用时间和当前进度线性估算剩余时间"""
+        progress = self.progress
+        if progress < 0.05 or progress >= 1.0:
+            return None
+        elapsed = time.monotonic() - self.start_time
+        return elapsed * (1 - progress) / progress
+
+    def _event(self, kind, message='', data=None):
+        return BuildEvent(kind, self.phase, self.progress, self.eta(), message, data)
+
+    def _enter_phase(self, phase):
+        events = []
+        order = list(PHASE_RANGES)
+        if order.index(phase) <= order.index(self.phase):
+            return events
+        data = {'previous': self.phase, 'elapsed': time.monotonic() - self.phase_started[self.phase]}
+        if self.phase == PHASE_ANALYSIS:
+            data.update(hooks=self.hook_count, binaries=self.binary_count)
+        self.phase = phase
+        self.phase_fraction = 0.0
+        self.phase_started[phase] = time.monotonic()
+        events.append(self._event(EVENT_PHASE, PHASE_LABELS[phase], data))
+        return events
+
+    def feed(self, line):
+        """解析一行输出，返回由此产生的事件列表（多数行不产生事件）"""
+        line = line.rstrip()
+        events = []
+        if _WARNING_RE.search(line):
+            self.warnings += 1
+            events.append(self._event(EVENT_WARNING, _TIMESTAMP_RE.sub('', line)))
+            return events
+        if _ERROR_RE.search(line):
+            self.errors += 1
+            events.append(self._event(EVENT_ERROR, _TIMESTAMP_RE.sub('', line)))
+            return events
+        if _BINARY_RE.search(line):
+            self.binary_count += 1
+            return events
+        if _HOOK_RE.search(line):
+            self.hook_count += 1
+        if ' completed successfully' in line and self.phase not in (PHASE_ANALYSIS, PHASE_DONE):
+            self.phase_fraction = 1.0
+            events.append(self._event(EVENT_PROGRESS, line))
+            return events
+        for pattern, phase in _PHASE_PATTERNS:
+            if pattern.search(line):
+                return self._enter_phase(phase)
+        if self.phase == PHASE_ANALYSIS:
+            for pattern, fraction in _ANALYSIS_MILESTONES:
+                if fraction > self.phase_fraction and pattern.search(line):
+                    self.phase_fraction = fraction
+                    events.append(self._event(EVENT_PROGRESS, line))
+                    break
+        return events
+
+    def finish(self, returncode):
+        """子进程结束时调用，返回收尾事件"""
+        events = []
+        if returncode == 0:
+            events.extend(self._enter_phase(PHASE_DONE))
+        data = {
+            'returncode': returncode,
+            'elapsed': time.monotonic() - self.start_time,
+            'warnings': self.warnings,
+            'errors': self.errors,
+            'hooks': self.hook_count,
+            'binaries': self.binary_count,
+        }
+        events.append(self._event(EVENT_DONE, '打包成功' if returncode == 0 else '打包失败', data))
+        return events
@@ -0,0 +1,48 @@
+import re
+from bisect import bisect_left
+
+
+class LogSearch:
+    """日志增量搜索：支持关键字/正则和级别过滤。
+
+    rebuild() 对当前缓冲做一次全量匹配（只有级别条件时直接用级别索引）；
+    之后新日志到达只需 feed() 匹配新增行，被淘汰的记录由 prune() 剔除。
+    matches 为升序的记录序号列表，供上一个/下一个定位。
+    """
+
+    def __init__(self, pattern='', regex=False, level=None, case_sensitive=False):
+        self.pattern = pattern
+        self.level = level or None
+        flags = 0 if case_sensitive else re.IGNORECASE
+        # 非正则模式按字面量匹配；非法正则会在这里抛出 re.error
+        self._regex = re.compile(pattern if regex else re.escape(pattern), flags) if pattern else None
+        self.matches = []
+
+    @property
+    def active(self):
+        return bool(self._regex or self.level)
+
+    def test(self, record):
+        if self.level and record.level != self.level:
+            return False
+        return self._regex is None or self._regex.search(record.text) is not None
+
+    def rebuild(self, buffer):
+        if self.level and self._regex is None:
+            self.matches = list(buffer.level_index.get(self.level, ()))
+        else:
+            self.matches = [record.seq for record in buffer if self.test(record)]
+        return self.matches
+
+    def feed(self, records):
+        """匹配新增记录，返回新增匹配数"""
+        before = len(self.matches)
+        self.matches.extend(record.seq for record in records if self.test(record))
+        return len(self.matches) - before
+
+    def prune(self, first_seq):
+        """剔除已被环形缓冲淘汰的匹配，返回剔除数量"""
+        cut = bisect_left(self.matches, first_seq)
+        if cut:
+            del self.matches[:cut]
+        return cut
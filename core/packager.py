@@ -4,9 +4,57 @@ import os
 import shutil
 import locale
 import sys
+import time
+from concurrent.futures import Future
+from core.artifact_store import get_store
+from core.cache import RESTORED, ENV_FIELDS, get_build_cache, compute_fingerprint, split_data_spec, work_key
+from core.config import get_tool_dir
+from core.dep_cache import DepCache
+from core.log_batcher import LineBatcher
+from core.log_parser import PyInstallerLogParser
+from core.profiler import BuildProfiler, dir_size, save_report
+from core.spec_builder import VARIANTS, expand_variants, parse_opts, render_spec, single_target
+from core.startup import IS_WINDOWS, executable_path, format_startup, kill_tree, measure_startup
+from core.probe import probe_python, probe_pyinstaller_exe
+from core.remote_cache import RemoteCache
+
+# 打包任务状态
+STATE_PENDING = 'pending'
+STATE_RUNNING = 'running'
+STATE_SUCCEEDED = 'succeeded'
+STATE_FAILED = 'failed'
+STATE_CANCELLED = 'cancelled'
+STATE_TIMED_OUT = 'timed_out'
+FINAL_STATES = {STATE_SUCCEEDED, STATE_FAILED, STATE_CANCELLED, STATE_TIMED_OUT}
+STATE_LABELS = {
+    STATE_PENDING: '等待中',
+    STATE_RUNNING: '运行中',
+    STATE_SUCCEEDED: '成功',
+    STATE_FAILED: '失败',
+    STATE_CANCELLED: '已取消',
+    STATE_TIMED_OUT: '超时',
+}
+
+def config_to_args(cfg):
+    """把 get_config 格式的配置转换为 Packager 所需的 datas 和 opts"""
+    datas = [f"{item['src']}{os.pathsep}{item['dst']}" for item in cfg.get('data_files', [])]
+    opts = []
+    if cfg.get('cb_noconsole'):
+        opts.append('--noconsole')
+    if cfg.get('cb_onefile'):
+        opts.append('--onefile')
+    if cfg.get('cb_debug'):
+        opts.append('--debug')
+    for module in cfg.get('excludes', []):
+        opts += ['--exclude-module', module]
+    custom_args = cfg.get('custom_args', '').strip()
+    if custom_args:
+        opts += custom_args.split()
+    return datas, opts
+
 
 class Packager:
-    def __init__(self, py_path, proj_path, entry, icon, datas, opts, out_dir, log_callback, progress_callback=None, use_pyinstaller_exe=False, pyinstaller_path=None):
+    def __init__(self, py_path, proj_path, entry, icon, datas, opts, out_dir, log_callback, progress_callback=None, use_pyinstaller_exe=False, pyinstaller_path=None, use_cache=True, work_dir=None, log_batch_callback=None, startup_runs=0, startup_timeout=30, timeout=0, variants=None, dep_cache=True, remote_cache=None, remote_push=True):
         self.py_path = py_path
         self.proj_path = proj_path
         self.entry = entry
@@ -15,92 +63,509 @@ class Packager:
         self.opts = opts
         self.out_dir = out_dir
         self.log_callback = log_callback
+        # 接收 core.log_parser.BuildEvent，在读取输出的线程中调用
         self.progress_callback = progress_callback or (lambda x: None)  # 默认为空函数
         self.proc = None
         self.use_pyinstaller_exe = use_pyinstaller_exe
         self.pyinstaller_path = pyinstaller_path
+        self.use_cache = use_cache
+        # PyInstaller 工作目录放在工具目录下，构建后保留以便下次增量复用
+        self.work_dir = work_dir or get_tool_dir('work', work_key(proj_path, entry))
+        # 产物库按内容去重保存产物文件，缓存条目据此可在产物被覆盖后直接还原
+        self.store = get_store() if use_cache else None
+        self.cache = get_build_cache(store=self.store) if use_cache else None
+        self.returncode = None
+        # 提供时，PyInstaller 的输出按批（list[str]）送出，减少界面逐行刷新的开销
+        self.log_batch_callback = log_batch_callback
+        # 打包成功后启动产物测量启动耗时的次数（0 为不测），以及单次运行的超时秒数
+        self.startup_runs = startup_runs
+        self.startup_timeout = startup_timeout
+        # 整个任务的超时秒数（0 为不限），超时后结束进程树，状态记为 STATE_TIMED_OUT
+        self.timeout = timeout
+        # 构建变体（VARIANTS 中的 onedir/onefile/debug），非空时生成共用一次依赖分析的多目标 spec
+        self.variants = [v for v in (variants or []) if v in VARIANTS]
+        # 第三方依赖分析缓存：项目用到的第三方包都已缓存时不再分析它们，否则构建后记录分析结果
+        self.dep_cache = DepCache() if dep_cache else None
+        self._deps = None  # 本次使用的缓存结果（DepCache.plan 的返回值）
+        self._record_deps = False  # 构建成功后是否记录第三方依赖的分析结果
+        # 多台构建机共享的远程构建缓存（共享目录或 HTTP 服务地址），本地未命中时按输入指纹下载产物，
+        # remote_push 为真时构建成功后上传；依赖输入指纹，关闭构建缓存时不使用
+        self.remote = RemoteCache(remote_cache, push=remote_push) if remote_cache and use_cache else None
+        self.state = STATE_PENDING
+        # 任务结束时设置结果（返回码），供 wait()/add_done_callback() 使用
+        self.future = Future()
+        self._stop_state = None  # 已请求取消/超时时为 STATE_CANCELLED/STATE_TIMED_OUT
+        self._child = None  # 打包后各步骤（启动测试、依赖记录）当前运行的子进程
+        self._lock = threading.Lock()
 
-    def build_cmd(self):
+    @classmethod
+    def from_config(cls, cfg, py_path, log_callback, **kwargs):
+        """由 get_config 格式的配置创建 Packager"""
+        datas, opts = config_to_args(cfg)
+        kwargs.setdefault('startup_runs', cfg.get('startup_runs', 0))
+        kwargs.setdefault('startup_timeout', cfg.get('startup_timeout', 30))
+        kwargs.setdefault('timeout', cfg.get('build_timeout', 0))
+        kwargs.setdefault('variants', cfg.get('variants', []))
+        kwargs.setdefault('dep_cache', cfg.get('dep_cache', True))
+        kwargs.setdefault('remote_cache', cfg.get('remote_cache') or None)
+        kwargs.setdefault('remote_push', cfg.get('remote_push', True))
+        return cls(
+            py_path=py_path,
+            proj_path=cfg['proj_path'],
+            entry=cfg['entry'],
+            icon=cfg.get('icon') or None,
+            datas=datas,
+            opts=opts,
+            out_dir=cfg['out_dir'],
+            log_callback=log_callback,
+            **kwargs
+        )
+
+    def get_pyinstaller_cmd(self):
         # 优先用外部指定的 pyinstaller_path
         if self.pyinstaller_path and os.path.isfile(self.pyinstaller_path):
-            pyinstaller_cmd = self.pyinstaller_path
-        else:
-            pyinstaller_cmd = None
-            py_dir = os.path.dirname(self.py_path)
-            possible = [
-                os.path.join(py_dir, 'Scripts', 'pyinstaller.exe'),
-                os.path.join(py_dir, 'pyinstaller.exe')
-            ]
-            for exe in possible:
-                if os.path.isfile(exe):
-                    pyinstaller_cmd = exe
-                    break
-            if not pyinstaller_cmd:
-                pyinstaller_cmd = shutil.which('pyinstaller') or 'pyinstaller'
-        cmd = [pyinstaller_cmd]
+            return self.pyinstaller_path
+        py_dir = os.path.dirname(self.py_path)
+        possible = [
+            os.path.join(py_dir, 'Scripts', 'pyinstaller.exe'),
+            os.path.join(py_dir, 'pyinstaller.exe')
+        ]
+        for exe in possible:
+            if os.path.isfile(exe):
+                return exe
+        return shutil.which('pyinstaller') or 'pyinstaller'
+
+    def managed_spec(self):
+        """由配置生成的 spec 内容和仍需在命令行传入的构建参数。
+
+        有无法写入 spec 的参数时返回 (None, 这些参数)，此时改用命令行模式构建。
+        """
+        parsed = parse_opts(self.opts)
+        if parsed['unsupported']:
+            return None, parsed['unsupported']
+        name = self.app_name()
+        targets = expand_variants(self.variants, name) if self.variants else single_target(parsed['spec'], name)
+        content = render_spec(self.entry, self.proj_path, parsed['spec'], targets, self.datas, self.icon, self._deps)
+        return content, parsed['build_args']
+
+    def spec_path(self):
+        """工作目录下的 spec 文件，PyInstaller 的工作缓存在同目录的 <名称>/ 下"""
+        return os.path.join(self.work_dir, self.app_name() + '.spec')
+
+    def build_cmd(self, managed=None):
+        """managed 为 managed_spec() 的结果，已计算过时传入，避免重复生成 spec 和依赖计划"""
+        content, extra = managed or self.managed_spec()
+        if content is None:
+            if self.variants:
+                raise ValueError(f"变体构建无法把以下参数写入 spec: {' '.join(extra)}")
+            return self.cli_cmd()
+        cmd = [self.get_pyinstaller_cmd()] + extra
+        cmd += ["--distpath", self.out_dir]
+        cmd += ["--workpath", self.work_dir]
+        cmd += ["--noconfirm"]
+        cmd += ["--log-level", "DEBUG"]
+        cmd += [self.spec_path()]
+        return cmd
+
+    def cli_cmd(self):
+        """命令行模式：由 PyInstaller 根据参数在工作目录生成 spec 再构建"""
+        cmd = [self.get_pyinstaller_cmd()]
         if self.icon:
-            cmd += ["--icon", self.icon]
+            cmd += ["--icon", os.path.abspath(self.icon)]
         for d in self.datas:
-            cmd += ["--add-data", d]
+            # spec 放在工作目录下，相对路径需先按项目目录转为绝对路径
+            src, dst, sep = split_data_spec(d)
+            cmd += ["--add-data", os.path.join(os.path.abspath(self.proj_path), src) + sep + dst]
         cmd += self.opts
         cmd += ["--distpath", self.out_dir]
+        cmd += ["--workpath", self.work_dir]
+        cmd += ["--specpath", self.work_dir]
+        cmd += ["--noconfirm"]
         cmd += ["--log-level", "DEBUG"]
         cmd += [self.entry]
         return cmd
 
-    def cleanup(self):
-        # 删除项目目录下的 build、__pycache__、.spec等临时文件
+    def write_spec(self, managed=None):
+        """把生成的 spec 写入工作目录，内容未变化时保留原文件；无法使用 spec 时返回 False"""
+        content, extra = managed or self.managed_spec()
+        if content is None:
+            self.log_callback(f"以下参数无法写入 spec，改用命令行模式构建: {' '.join(extra)}")
+            return False
+        path = self.spec_path()
         try:
-            # 项目目录
-            proj_dir = self.proj_path
-            build_dir = os.path.join(proj_dir, 'build')
-            if os.path.isdir(build_dir):
-                shutil.rmtree(build_dir)
-                self.log_callback('已删除 build 临时目录')
-            pycache_dir = os.path.join(proj_dir, '__pycache__')
-            if os.path.isdir(pycache_dir):
-                shutil.rmtree(pycache_dir)
-                self.log_callback('已删除 __pycache__ 临时目录')
-            # 删除 .spec 文件
-            spec_file = os.path.splitext(os.path.basename(self.entry))[0] + '.spec'
-            spec_path = os.path.join(proj_dir, spec_file)
-            if os.path.isfile(spec_path):
-                os.remove(spec_path)
-                self.log_callback(f'已删除临时文件: {spec_file}')
+            with open(path, 'r', encoding='utf-8') as f:
+                unchanged = f.read() == content
+        except OSError:
+            unchanged = False
+        if unchanged:
+            self.log_callback(f"spec 未变化，直接复用: {path}")
+        else:
+            os.makedirs(self.work_dir, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp, path)
+            self.log_callback(f"已生成 spec: {path}")
+        return True
+
+    def app_name(self):
+        for i, opt in enumerate(self.opts):
+            if opt in ('-n', '--name') and i + 1 < len(self.opts):
+                return self.opts[i + 1]
+            if opt.startswith('--name='):
+                return opt.split('=', 1)[1]
+        return os.path.splitext(os.path.basename(self.entry))[0]
+
+    def outputs(self):
+        """本次构建的各个产物 [(名称, 是否单文件)]，未设置变体时只有一个"""
+        if self.variants:
+            return [(v['name'], v['onefile']) for v in expand_variants(self.variants, self.app_name())]
+        return [(self.app_name(), '--onefile' in self.opts or '-F' in self.opts)]
+
+    def is_onefile(self):
+        return self.outputs()[0][1]
+
+    def artifact_paths(self):
+        """本次构建预期生成的产物路径（单文件模式为可执行文件，否则为目录）"""
+        paths = []
+        for name, onefile in self.outputs():
+            if onefile and sys.platform.startswith('win'):
+                name += '.exe'
+            paths.append(os.path.join(self.out_dir, name))
+        return paths
+
+    def report_path(self):
+        """构建报告的位置：输出目录下与产物同名的 .build.json"""
+        return os.path.join(self.out_dir, self.app_name() + '.build.json')
+
+    def measure_startup(self):
+        """多次启动产物，记录冷/热启动耗时；失败时返回 None"""
+        # 有多个变体时测量第一个
+        exe = executable_path(self.artifact_paths()[0], self.outputs()[0][0])
+        self.log_callback(f"启动测试: 运行 {exe} {self.startup_runs} 次（超时 {self.startup_timeout}s）")
+        try:
+            startup = measure_startup(exe, self.startup_runs, self.startup_timeout, self.is_onefile(),
+                                      on_start=self._track)
         except Exception as e:
-            self.log_callback(f'清理临时文件失败: {e}')
+            if not self._stop_state:
+                self.log_callback(f"启动测试失败: {e}")
+            return None
+        if self._stop_state:
+            return None
+        self.log_callback(format_startup(startup))
+        if any(run['timed_out'] for run in startup['runs']):
+            self.log_callback("部分运行超时未退出（GUI 程序属正常），已结束进程，按首次输出时间比较")
+        return startup
 
-    def run(self):
-        def target():
-            cmd = self.build_cmd()
-            encoding = locale.getpreferredencoding(False)
-            env = os.environ.copy()
-            env["PYTHONUNBUFFERED"] = "1"
-            self.log_callback(f"打包命令: {cmd}")
-            self.log_callback(f"工作目录: {self.proj_path}")
-            self.log_callback(f"目录是否存在: {os.path.isdir(self.proj_path)}")
-            self.log_callback(f"python是否存在: {os.path.isfile(self.py_path)}")
+    def write_report(self, profile, done_data, startup=None):
+        report = dict(profile)
+        report.update({
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'entry': self.entry,
+            'opts': self.opts,
+            'returncode': self.returncode,
+            'dist_bytes': sum(dir_size(p) for p in self.artifact_paths() if os.path.exists(p)),
+            'warnings': done_data.get('warnings', 0),
+            'startup': startup,
+        })
+        report = save_report(self.report_path(), report)
+        parts = [f"{p['name']} {p['wall']:.1f}s" for p in report['phases']]
+        self.log_callback(f"构建耗时 {report['wall']:.1f}s（{'，'.join(parts)}），报告: {self.report_path()}")
+        previous = report.get('previous')
+        if previous:
+            self.log_callback(f"上次构建耗时 {previous['wall']:.1f}s，变化 {report['wall'] - previous['wall']:+.1f}s")
+            if startup and previous.get('startup'):
+                self.log_callback(f"上次{format_startup(previous['startup'])}")
+
+    def ingest_artifacts(self):
+        """把本次产物存入产物库（相同内容的文件改为链接），返回 {产物路径: 清单}"""
+        trees = {}
+        try:
+            for path in self.artifact_paths():
+                tree, stats = self.store.ingest(path)
+                trees[path] = tree
+                mb = 1024 * 1024
+                msg = (f"产物去重: {stats['files']} 个文件，复用 {stats['reused_files']} 个"
+                       f"（{stats['reused_bytes'] / mb:.1f} MB），新入库 {stats['new_bytes'] / mb:.1f} MB")
+                if stats['skipped_files']:
+                    msg += f"，{stats['skipped_files']} 个文件无法链接（产物目录与产物库可能不在同一文件系统）"
+                self.log_callback(msg)
+        except Exception as e:
+            self.log_callback(f"产物入库失败: {e}")
+            return None
+        return trees
+
+    def record_cache(self, key):
+        """产物入库并记入构建缓存，返回是否已记录；两步之间持有产物库的锁，
+        其它进程清理产物库时不会删掉已入库但尚未记录的对象"""
+        try:
+            with self.store.lock():
+                trees = self.ingest_artifacts()
+                return self.cache.store(key, self.artifact_paths(), trees)
+        except Exception as e:
+            self.log_callback(f"记录构建缓存失败: {e}")
+            return False
+
+    def remote_artifacts(self):
+        """远程缓存中的产物以产物名为键，与输出目录的位置无关"""
+        return {os.path.basename(path): path for path in self.artifact_paths()}
+
+    def fetch_remote(self, key):
+        """从远程构建缓存下载产物并记入本地缓存，成功时返回 True"""
+        try:
+            size = self.remote.fetch(key, self.remote_artifacts())
+        except Exception as e:
+            self.log_callback(f"读取远程构建缓存失败（{self.remote}），改为本地构建: {e}")
+            return False
+        if size is None:
+            self.log_callback(f"远程构建缓存未命中（{self.remote}）")
+            return False
+        self.log_callback(f"命中远程构建缓存（{self.remote}），已下载并校验产物 {size / (1024 * 1024):.1f} MB: "
+                          f"{self.artifact_paths()}")
+        self.record_cache(key)
+        return True
+
+    def publish_remote(self, key):
+        try:
+            count, size = self.remote.publish(key, self.remote_artifacts())
+        except Exception as e:
+            self.log_callback(f"上传远程构建缓存失败（{self.remote}）: {e}")
+            return
+        self.log_callback(f"已发布到远程构建缓存（{self.remote}），上传 {count} 个新对象，"
+                          f"{size / (1024 * 1024):.1f} MB")
+
+    def fingerprint(self):
+        info = probe_python(self.py_path)
+        env_info = {field: info.get(field) for field in ENV_FIELDS}
+        pyinstaller_cmd = self.get_pyinstaller_cmd()
+        if os.path.isfile(pyinstaller_cmd):
+            env_info['pyinstaller_cmd'] = probe_pyinstaller_exe(pyinstaller_cmd)['version']
+        opts = self.opts + [f'--variant={v}' for v in self.variants]
+        return compute_fingerprint(self.proj_path, self.entry, self.datas, opts, self.icon, env_info)
+
+    def plan_deps(self):
+        """查找可直接使用的第三方依赖缓存，返回解析后的 spec 选项；不使用 spec 或未启用缓存时返回 None"""
+        self._deps = None
+        self._record_deps = False
+        if not self.dep_cache:
+            return None
+        parsed = parse_opts(self.opts)
+        if parsed['unsupported']:
+            return None
+        try:
+            info = probe_python(self.py_path)
+            self._deps, note, self._record_deps = self.dep_cache.plan(info, self.proj_path, self.entry, parsed['spec'])
+        except Exception as e:
+            self.log_callback(f"查找第三方依赖缓存失败: {e}")
+            self._record_deps = True
+            return parsed['spec']
+        if self._deps:
+            self.log_callback(f"命中第三方依赖缓存，跳过分析: {note}")
+        else:
+            self.log_callback(f"未使用第三方依赖缓存: {note}")
+        return parsed['spec']
+
+    def record_deps(self, spec):
+        """从本次构建的分析结果中记录第三方包的依赖缓存，失败只记录日志"""
+        explicit = [os.path.join(os.path.abspath(self.proj_path), split_data_spec(d)[0])
+                    for d in list(self.datas) + spec['datas'] + spec['binaries']]
+        try:
+            written = self.dep_cache.record(probe_python(self.py_path), self.py_path, self.work_dir, self.app_name(),
+                                            spec, explicit, on_start=self._track)
+        except Exception as e:
+            if self._stop_state:
+                return
+            self.log_callback(f"未记录第三方依赖缓存: {e}")
+            return
+        if written:
+            self.log_callback(f"已缓存第三方依赖分析结果: {'、'.join(written)}")
+
+    def add_done_callback(self, fn):
+        """任务结束（成功、失败、取消或超时）后调用 fn(packager)，已结束时立即调用"""
+        self.future.add_done_callback(lambda future: fn(self))
+
+    def done(self):
+        return self.future.done()
+
+    def wait(self, timeout=None):
+        """等待任务结束并返回返回码，超时抛出 concurrent.futures.TimeoutError"""
+        return self.future.result(timeout)
+
+    def cancel(self):
+        """取消任务：结束 PyInstaller 整个进程组（含 bootloader、编译器等子进程），已结束时返回 False"""
+        return self._stop(STATE_CANCELLED)[0]
+
+    def _track(self, proc):
+        """记录打包后步骤启动的子进程，取消/超时时一并结束；已请求停止时立即结束它并抛出异常"""
+        with self._lock:
+            self._child = proc
+            stop_state = self._stop_state
+        if stop_state:
+            kill_tree(proc)
+            raise RuntimeError(STATE_LABELS[stop_state])
+
+    def _stop(self, state):
+        """请求停止并结束当前运行的子进程，返回 (是否受理, 是否结束了进程)"""
+        with self._lock:
+            if self.state in FINAL_STATES or self._stop_state:
+                return False, False
+            self._stop_state = state
+            procs = [p for p in (self.proc, self._child) if p and p.poll() is None]
+        killed = bool(procs)
+        for proc in procs:
+            kill_tree(proc)
+        return True, killed
+
+    def _on_timeout(self):
+        accepted, killed = self._stop(STATE_TIMED_OUT)
+        if accepted:
+            self.log_callback(f"打包超过 {self.timeout} 秒未完成，"
+                              + ("已终止进程树" if killed else "当前步骤结束后停止"))
+
+    def run_sync(self):
+        """在当前线程执行打包，返回 PyInstaller 返回码（取消/超时未启动进程时为 -1）"""
+        with self._lock:
+            if self.state != STATE_PENDING:
+                raise RuntimeError('打包任务只能运行一次')
+            self.state = STATE_RUNNING
+        timer = None
+        if self.timeout:
+            timer = threading.Timer(self.timeout, self._on_timeout)
+            timer.daemon = True
+            timer.start()
+        try:
+            self.returncode = self._build()
+        except Exception as e:
+            self.log_callback(f"打包异常: {e}")
+            self.returncode = -1
+        finally:
+            if timer:
+                timer.cancel()
+        with self._lock:
+            # 产物已成功生成时，之后才到达的取消/超时只跳过打包后步骤，不改变结果（产物也已记入构建缓存）
+            if self.returncode == 0:
+                self.state = STATE_SUCCEEDED
+            else:
+                self.state = self._stop_state or STATE_FAILED
+        self.future.set_result(self.returncode)
+        return self.returncode
+
+    def _build(self):
+        key = None
+        if self._stop_state:
+            # 启动前已取消
+            for event in PyInstallerLogParser().finish(-1):
+                self.progress_callback(event)
+            self._log_result(-1)
+            return -1
+        if self.cache:
             try:
-                self.proc = subprocess.Popen(
-                    cmd, cwd=self.proj_path, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                    text=True, encoding=encoding, errors='replace', bufsize=1, universal_newlines=True, env=env
-                )
+                key = self.fingerprint()
+                self.log_callback(f"输入指纹: {key}")
+                hit = self.cache.lookup(key, self.artifact_paths())
+                if hit == RESTORED:
+                    self.log_callback(f"命中构建缓存，已从产物库还原产物: {self.artifact_paths()}")
+                elif hit:
+                    self.log_callback(f"命中构建缓存，输入未变化，直接复用已有产物: {self.artifact_paths()}")
+                elif self.remote:
+                    hit = self.fetch_remote(key)
+                if hit:
+                    self.log_callback("打包成功！")
+                    for event in PyInstallerLogParser().finish(0):
+                        self.progress_callback(event)
+                    self.log_callback("================ 打包任务完成 ================")
+                    return 0
             except Exception as e:
-                self.log_callback(f"Popen异常: {e}")
-                return
-            for line in self.proc.stdout:
-                self.log_callback(line.rstrip())
-                self.progress_callback(line)
-            self.proc.wait()
-            if self.proc.returncode == 0:
-                self.log_callback("打包成功！")
+                key = None
+                self.log_callback(f"计算输入指纹失败，跳过构建缓存: {e}")
+        spec = self.plan_deps()
+        # spec、build 工作目录都在工具工作目录下，PyInstaller 从源码编译也不在项目中写 __pycache__，
+        # 构建后无需再清理项目目录（旧版的 cleanup() 会删除用户自己的 build/、__pycache__ 和 .spec）
+        managed = self.managed_spec()
+        cmd = self.build_cmd(managed)
+        self.write_spec(managed)
+        encoding = locale.getpreferredencoding(False)
+        env = os.environ.copy()
+        env["PYTHONUNBUFFERED"] = "1"
+        self.log_callback(f"打包命令: {cmd}")
+        self.log_callback(f"工作目录: {self.proj_path}")
+        self.log_callback(f"目录是否存在: {os.path.isdir(self.proj_path)}")
+        self.log_callback(f"python是否存在: {os.path.isfile(self.py_path)}")
+        # 新会话/进程组启动，取消或超时时可连同子进程一起结束
+        kwargs = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP} if IS_WINDOWS else {'start_new_session': True}
+        with self._lock:
+            if self._stop_state:
+                returncode = -1
+                proc = None
             else:
-                self.log_callback("打包失败，错误码：%d" % self.proc.returncode)
-            self.progress_callback("DONE")
-            if self.proc.returncode == 0:
-                self.log_callback("================ 打包任务完成 ================")
+                try:
+                    self.proc = subprocess.Popen(
+                        cmd, cwd=self.proj_path, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                        text=True, encoding=encoding, errors='replace', bufsize=1, universal_newlines=True, env=env, **kwargs
+                    )
+                    proc = self.proc
+                except Exception as e:
+                    self.log_callback(f"Popen异常: {e}")
+                    returncode = -1
+                    proc = None
+        if proc is None:
+            for event in PyInstallerLogParser().finish(returncode):
+                self.progress_callback(event)
+            self._log_result(returncode)
+            return returncode
+        batcher = LineBatcher(self.log_batch_callback) if self.log_batch_callback else None
+        parser = PyInstallerLogParser()
+        profiler = BuildProfiler()
+        profiler.start(proc.pid)
+        for line in proc.stdout:
+            if batcher:
+                batcher.add(line.rstrip())
             else:
-                self.log_callback("================ 打包任务失败 ================")
-            self.log_callback(f"PROCESS_ENDED_{self.proc.returncode}")
-            self.cleanup()
-        threading.Thread(target=target, daemon=True).start() 
\ No newline at end of file
+                self.log_callback(line.rstrip())
+            for event in parser.feed(line):
+                profiler.on_event(event)
+                self.progress_callback(event)
+        if batcher:
+            batcher.close()
+        proc.wait()
+        profile = profiler.stop()
+        returncode = self.returncode = proc.returncode
+        events = parser.finish(returncode)
+        if returncode == 0:
+            self.log_callback("打包成功！")
+            if key and self.record_cache(key):
+                self.log_callback("已记录构建缓存")
+            if key and self.remote and self.remote.push and not self._stop_state:
+                self.publish_remote(key)
+            if self._record_deps and not self._stop_state:
+                self.record_deps(spec)
+            startup = self.measure_startup() if self.startup_runs and not self._stop_state else None
+            try:
+                self.write_report(profile, events[-1].data, startup)
+            except Exception as e:
+                self.log_callback(f"写入构建报告失败: {e}")
+            if self._stop_state:
+                # 产物已生成并记入构建缓存，取消/超时只跳过之后的步骤，结果仍为成功
+                self.log_callback(f"打包后收到{STATE_LABELS[self._stop_state]}请求，产物已生成，"
+                                  "已跳过剩余的打包后步骤（上传远程缓存、记录依赖、启动测试）")
+        for event in events:
+            self.progress_callback(event)
+        self._log_result(returncode)
+        return returncode
+
+    def _log_result(self, returncode):
+        if returncode == 0:
+            self.log_callback("================ 打包任务完成 ================")
+            return
+        if self._stop_state == STATE_CANCELLED:
+            self.log_callback("打包已取消")
+        elif self._stop_state == STATE_TIMED_OUT:
+            self.log_callback(f"打包超时（{self.timeout} 秒），已终止")
+        else:
+            self.log_callback("打包失败，错误码：%d" % returncode)
+        self.log_callback("================ 打包任务失败 ================")
+
+    def run(self):
+        """在后台线程执行打包，返回自身作为任务句柄（cancel/wait/add_done_callback）"""
+        threading.Thread(target=self.run_sync, daemon=True).start()
+        return self
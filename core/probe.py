@@ -0,0 +1,195 @@
+import json
+import os
+import subprocess
+import threading
+import time
+
+from core.config import get_tool_dir, write_json_atomic
+
+# 命中超过该秒数的条目会在后台重新探测一次
+REVALIDATE_AFTER = 3600
+# 探测结果字段变化时递增，旧条目视为失效
+PROBE_VERSION = 2
+
+# 在目标解释器中执行，输出版本、PyInstaller 版本、site-packages 位置和已安装包列表
+_PROBE_SCRIPT = r'''
+import json, platform, site, sys, sysconfig
+info = {"python": sys.version, "platform": platform.platform(), "executable": sys.executable,
+        "pyinstaller": None, "site_packages": [], "dists": []}
+# 与内核版本、主机名无关的平台标识：操作系统、平台标签（macOS 含部署目标）、CPU 架构、扩展模块 ABI、libc
+info["abi"] = [sys.platform, sysconfig.get_platform(), platform.machine(),
+               sysconfig.get_config_var("SOABI") or sys.implementation.cache_tag, " ".join(platform.libc_ver())]
+try:
+    paths = list(site.getsitepackages())
+except Exception:
+    paths = []
+purelib = sysconfig.get_paths().get("purelib")
+if purelib and purelib not in paths:
+    paths.append(purelib)
+info["site_packages"] = paths
+try:
+    import PyInstaller
+    info["pyinstaller"] = PyInstaller.__version__
+except Exception:
+    pass
+try:
+    from importlib import metadata
+    info["dists"] = sorted("%s==%s" % (d.metadata["Name"], d.version) for d in metadata.distributions())
+except Exception:
+    pass
+print(json.dumps(info))
+'''
+
+
+def _file_key(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _dirs_key(paths):
+    """site-packages 目录的 mtime：安装/卸载包会改变它，解释器本身的 mtime 却不会变"""
+    key = []
+    for path in paths:
+        try:
+            key.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            key.append(None)
+    return key
+
+
+def _run_python_probe(py_path, timeout):
+    result = subprocess.run([py_path, '-c', _PROBE_SCRIPT], capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f'解释器探测失败: {py_path}')
+    info = json.loads(result.stdout.strip().splitlines()[-1])
+    info['site_key'] = _dirs_key(info['site_packages'])
+    return info
+
+
+def _run_exe_probe(exe_path, timeout):
+    result = subprocess.run([exe_path, '--version'], capture_output=True, text=True, timeout=timeout)
+    return {
+        'ok': result.returncode == 0,
+        'version': result.stdout.strip(),
+        'output': f"{result.stdout.strip()} {result.stderr.strip()}".strip()
+    }
+
+
+class ProbeCache:
+    """解释器 / pyinstaller 可执行文件的探测结果缓存。
+
+    键为可执行文件路径，条目记录其 mtime+大小（解释器还记录 site-packages 的 mtime），
+    任一变化即视为失效并重新探测；有效但较旧的条目直接返回，同时在后台重新验证。
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_tool_dir(), 'probe_cache.json')
+        self._entries = None
+        self._lock = threading.Lock()
+        self._revalidating = set()
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except Exception:
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        try:
+            write_json_atomic(self.path, self._entries)
+        except OSError:
+            pass
+
+    def _get(self, kind, exe_path, run, timeout):
+        cache_key = f'{kind}:{os.path.abspath(exe_path)}'
+        file_key = _file_key(exe_path)
+        with self._lock:
+            entry = self._load().get(cache_key)
+        if entry and entry['file_key'] == file_key and entry.get('version') == PROBE_VERSION:
+            if 'error' in entry:
+                # 探测失败也缓存，文件不变时不再反复启动坏掉的解释器
+                raise RuntimeError(entry['error'])
+            if kind != 'python' or _dirs_key(entry['info']['site_packages']) == entry['info']['site_key']:
+                if time.time() - entry['time'] > REVALIDATE_AFTER:
+                    self._revalidate(kind, exe_path, run, timeout, cache_key)
+                return entry['info']
+        try:
+            info = run(exe_path, timeout)
+        except subprocess.TimeoutExpired:
+            raise  # 超时可能只是冷启动慢，不缓存
+        except Exception as e:
+            self._store(cache_key, file_key, error=str(e) or type(e).__name__)
+            raise
+        self._store(cache_key, file_key, info)
+        return info
+
+    def _store(self, cache_key, file_key, info=None, error=None):
+        entry = {'file_key': file_key, 'time': time.time(), 'version': PROBE_VERSION}
+        if error is None:
+            entry['info'] = info
+        else:
+            entry['error'] = error
+        with self._lock:
+            self._load()[cache_key] = entry
+            self._save()
+
+    def _revalidate(self, kind, exe_path, run, timeout, cache_key):
+        with self._lock:
+            if cache_key in self._revalidating:
+                return
+            self._revalidating.add(cache_key)
+
+        def target():
+            try:
+                self._store(cache_key, _file_key(exe_path), run(exe_path, timeout))
+            except Exception:
+                with self._lock:
+                    self._load().pop(cache_key, None)
+                    self._save()
+            finally:
+                with self._lock:
+                    self._revalidating.discard(cache_key)
+        threading.Thread(target=target, daemon=True).start()
+
+    def python(self, py_path, timeout=30):
+        """探测解释器：返回 python/platform/pyinstaller/site_packages/dists 等信息"""
+        return self._get('python', py_path, _run_python_probe, timeout)
+
+    def pyinstaller_exe(self, exe_path, timeout=30):
+        """探测 pyinstaller 可执行文件：返回 ok/version/output"""
+        return self._get('exe', exe_path, _run_exe_probe, timeout)
+
+    def invalidate(self, exe_path):
+        with self._lock:
+            entries = self._load()
+            for kind in ('python', 'exe'):
+                entries.pop(f'{kind}:{os.path.abspath(exe_path)}', None)
+            self._save()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_probe_cache():
+    """进程内共享的探测缓存，首次使用时才创建（导入本模块不会在用户目录下建目录）"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ProbeCache()
+        return _default_cache
+
+
+def probe_python(py_path, timeout=30):
+    return get_probe_cache().python(py_path, timeout)
+
+
+def probe_pyinstaller_exe(exe_path, timeout=30):
+    return get_probe_cache().pyinstaller_exe(exe_path, timeout)
+
+
+def invalidate_probe(exe_path):
+    get_probe_cache().invalidate(exe_path)
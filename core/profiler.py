@@ -0,0 +1,193 @@
+import json
+import os
+import sys
+import threading
+import time
+
+from core.config import write_json_atomic
+from core.log_parser import EVENT_PHASE, PHASE_DONE, PHASE_STARTUP
+
+try:
+    import psutil  # 可选依赖，未安装时 Linux 下读取 /proc，其它平台不统计 CPU/内存
+except ImportError:
+    psutil = None
+
+# 报告格式变化时递增
+REPORT_VERSION = 1
+
+
+def _proc_table():
+    """读取 /proc，返回 {pid: (ppid, cpu 秒, rss 字节)}"""
+    ticks = os.sysconf('SC_CLK_TCK')
+    page = os.sysconf('SC_PAGE_SIZE')
+    table = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat', 'rb') as f:
+                stat = f.read().decode('utf-8', 'replace')
+        except OSError:
+            continue
+        # 进程名可能含空格和括号，从最后一个 ')' 之后开始按空格切分
+        fields = stat[stat.rfind(')') + 2:].split()
+        table[int(name)] = (int(fields[1]), (int(fields[11]) + int(fields[12])) / ticks, int(fields[21]) * page)
+    return table
+
+
+def tree_stats(pid):
+    """返回进程 pid 及其全部子孙进程的 {pid: (cpu 秒, rss 字节)}，无法统计时返回 None"""
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            procs = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return {}
+        stats = {}
+        for proc in procs:
+            try:
+                with proc.oneshot():
+                    cpu = proc.cpu_times()
+                    stats[proc.pid] = (cpu.user + cpu.system, proc.memory_info().rss)
+            except psutil.Error:
+                continue
+        return stats
+    if sys.platform.startswith('linux'):
+        table = _proc_table()
+        children = {}
+        for child, (ppid, _, _) in table.items():
+            children.setdefault(ppid, []).append(child)
+        stats = {}
+        stack = [pid]
+        while stack:
+            current = stack.pop()
+            if current in table:
+                stats[current] = table[current][1:]
+                stack.extend(children.get(current, ()))
+        return stats
+    return None
+
+
+def dir_size(path):
+    """文件或目录的总字节数"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class BuildProfiler:
+    """记录一次 PyInstaller 构建各阶段的耗时、CPU 时间，以及子进程树的峰值内存。
+
+    后台线程按 interval 秒采样子进程树；阶段切换由 core.log_parser 的事件驱动，
+    on_event() 在读取输出的线程中调用。已退出的子进程保留其最后一次采样到的 CPU 时间。
+    """
+
+    def __init__(self, interval=0.2):
+        self.interval = interval
+        self.pid = None
+        self.supported = True
+        self.peak_rss = 0
+        self.phases = []
+        self._cpu = {}  # pid -> 最近一次采样的 CPU 秒
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_time = None
+
+    def _sample(self):
+        stats = tree_stats(self.pid)
+        if stats is None:
+            self.supported = False
+            return
+        with self._lock:
+            for pid, (cpu, _) in stats.items():
+                self._cpu[pid] = max(cpu, self._cpu.get(pid, 0.0))
+            self.peak_rss = max(self.peak_rss, sum(rss for _, rss in stats.values()))
+
+    def _cpu_total(self):
+        with self._lock:
+            return sum(self._cpu.values())
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+            if not self.supported:
+                break
+
+    def start(self, pid):
+        self.pid = pid
+        self._start_time = time.monotonic()
+        self.phases = [{'name': PHASE_STARTUP, 'start': 0.0, 'cpu_start': 0.0}]
+        self._sample()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def _mark(self, name):
+        if self.supported:
+            self._sample()
+        self.phases.append({'name': name, 'start': time.monotonic() - self._start_time, 'cpu_start': self._cpu_total()})
+
+    def on_event(self, event):
+        if event.kind == EVENT_PHASE and event.phase != PHASE_DONE:
+            self._mark(event.phase)
+
+    def stop(self):
+        """子进程结束后调用，返回 {wall, cpu, peak_rss, phases}；不支持统计时 cpu/peak_rss 为 None"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        wall = time.monotonic() - self._start_time
+        cpu = self._cpu_total()
+        phases = []
+        for i, phase in enumerate(self.phases):
+            end = self.phases[i + 1] if i + 1 < len(self.phases) else {'start': wall, 'cpu_start': cpu}
+            phases.append({
+                'name': phase['name'],
+                'wall': round(end['start'] - phase['start'], 3),
+                'cpu': round(end['cpu_start'] - phase['cpu_start'], 3) if self.supported else None,
+            })
+        return {
+            'wall': round(wall, 3),
+            'cpu': round(cpu, 3) if self.supported else None,
+            'peak_rss': self.peak_rss if self.supported else None,
+            'phases': phases,
+        }
+
+
+def load_report(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        return report if report.get('version') == REPORT_VERSION else None
+    except Exception:
+        return None
+
+
+def save_report(path, report):
+    """写入构建报告，并附上同一位置上一次报告的摘要用于对比"""
+    previous = load_report(path)
+    if previous:
+        previous.pop('previous', None)
+        report['previous'] = previous
+    report['version'] = REPORT_VERSION
+    write_json_atomic(path, report)
+    return report
+
+
+def compare_phases(report):
+    """返回 [(阶段, 本次耗时, 上次耗时或 None, 差值或 None)]，包括只在上次出现的阶段"""
+    previous = {p['name']: p['wall'] for p in (report.get('previous') or {}).get('phases', [])}
+    rows = []
+    for phase in report.get('phases', []):
+        before = previous.pop(phase['name'], None)
+        rows.append((phase['name'], phase['wall'], before, None if before is None else phase['wall'] - before))
+    for name, before in previous.items():
+        rows.append((name, None, before, None))
+    return rows
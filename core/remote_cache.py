@@ -0,0 +1,326 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core.artifact_store import check_link, check_links_inside, check_rel_path, tree_order
+
+# 条目格式变化时递增，旧条目视为未命中
+REMOTE_VERSION = 1
+# 并行上传/下载的对象数
+TRANSFER_WORKERS = 4
+# HTTP 请求超时（秒）
+HTTP_TIMEOUT = 60
+_CHUNK = 1024 * 1024
+_KEY_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+def _tmp_name(path):
+    return f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+
+def _hash_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _copy_verified(fsrc, dst, digest):
+    """从 fsrc 流式写入 dst 的临时文件并计算哈希，与 digest 一致才替换为 dst，否则删除并返回 False"""
+    tmp = _tmp_name(dst)
+    h = hashlib.sha256()
+    try:
+        with open(tmp, 'wb') as fdst:
+            for chunk in iter(lambda: fsrc.read(_CHUNK), b''):
+                h.update(chunk)
+                fdst.write(chunk)
+        if h.hexdigest() != digest:
+            return False
+        os.replace(tmp, dst)
+        return True
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def check_key(key):
+    if not _KEY_RE.match(key or ''):
+        raise ValueError(f'无效的缓存键: {key!r}')
+    return key
+
+
+class FileBackend:
+    """共享目录（NFS/SMB 等）作为远程缓存：cas/<哈希前两位>/<哈希> 存文件内容，ac/<指纹>.json 存产物清单"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def __repr__(self):
+        return f'目录 {self.root}'
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, 'cas', digest[:2], check_key(digest))
+
+    def _entry_path(self, key):
+        return os.path.join(self.root, 'ac', check_key(key) + '.json')
+
+    def has_object(self, digest):
+        return os.path.isfile(self._object_path(digest))
+
+    def put_object(self, digest, fsrc):
+        """写入内容对象（已有同名对象时覆盖），内容哈希与 digest 不符时抛出 ValueError"""
+        path = self._object_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if not _copy_verified(fsrc, path, digest):
+            raise ValueError(f'内容与哈希不符: {digest}')
+
+    def get_object(self, digest, dest):
+        """下载对象到 dest 并校验，对象不存在或已损坏时返回 False"""
+        try:
+            with open(self._object_path(digest), 'rb') as f:
+                return _copy_verified(f, dest, digest)
+        except FileNotFoundError:
+            return False
+
+    def open_object(self, digest):
+        return open(self._object_path(digest), 'rb')
+
+    def get_entry(self, key):
+        try:
+            with open(self._entry_path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put_entry(self, key, data):
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = _tmp_name(path)
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+
+class HttpBackend:
+    """HTTP 缓存服务：GET/HEAD/PUT <地址>/cas/<哈希> 和 <地址>/ac/<指纹>，可用 core.cache_server 搭建"""
+
+    def __init__(self, url, timeout=HTTP_TIMEOUT):
+        # urllib.request 导入较慢，用到 HTTP 后端时再加载，不拖慢界面启动
+        import urllib.error
+        import urllib.request
+        self._urlopen = urllib.request.urlopen
+        self._request_cls = urllib.request.Request
+        self._http_error = urllib.error.HTTPError
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def __repr__(self):
+        return f'服务 {self.url}'
+
+    def _request(self, method, path, data=None, headers=None):
+        request = self._request_cls(f'{self.url}/{path}', data=data, method=method, headers=headers or {})
+        return self._urlopen(request, timeout=self.timeout)
+
+    def _exists(self, path):
+        try:
+            with self._request('HEAD', path):
+                return True
+        except self._http_error as e:
+            if e.code == 404:
+                return False
+            raise
+
+    def has_object(self, digest):
+        return self._exists(f'cas/{check_key(digest)}')
+
+    def put_object(self, digest, fsrc):
+        size = os.fstat(fsrc.fileno()).st_size
+        with self._request('PUT', f'cas/{check_key(digest)}', data=fsrc,
+                           headers={'Content-Length': str(size), 'Content-Type': 'application/octet-stream'}):
+            pass
+
+    def get_object(self, digest, dest):
+        try:
+            with self._request('GET', f'cas/{check_key(digest)}') as response:
+                return _copy_verified(response, dest, digest)
+        except self._http_error as e:
+            if e.code == 404:
+                return False
+            raise
+
+    def get_entry(self, key):
+        try:
+            with self._request('GET', f'ac/{check_key(key)}') as response:
+                return response.read()
+        except self._http_error as e:
+            if e.code == 404:
+                return None
+            raise
+
+    def put_entry(self, key, data):
+        with self._request('PUT', f'ac/{check_key(key)}', data=data,
+                           headers={'Content-Type': 'application/json'}):
+            pass
+
+
+def open_backend(location):
+    """按地址创建后端：http(s):// 开头为 HTTP 服务，其余视为共享目录"""
+    if re.match(r'^https?://', location, re.I):
+        return HttpBackend(location)
+    return FileBackend(os.path.abspath(os.path.expanduser(location)))
+
+
+def _scan_tree(path):
+    """产物（文件或目录）的内容清单：文件记录哈希、大小和可执行位，目录和符号链接原样记录；
+    有指向产物目录之外的符号链接时抛出 ValueError"""
+    def file_entry(full):
+        return {'hash': _hash_file(full), 'size': os.path.getsize(full),
+                'exec': bool(os.stat(full).st_mode & stat.S_IXUSR)}
+    if os.path.isfile(path):
+        return {'type': 'file', 'entry': file_entry(path)}
+    entries = {}
+    for root, dirs, files in os.walk(path):
+        for name in dirs + files:
+            full = os.path.join(root, name)
+            rel = os.path.relpath(full, path).replace(os.sep, '/')
+            if os.path.islink(full):
+                entries[rel] = {'link': os.readlink(full)}
+                check_link(rel, entries[rel]['link'])
+            elif name in dirs:
+                entries[rel] = {'dir': True}
+            else:
+                entries[rel] = file_entry(full)
+    check_links_inside(path, [rel for rel, entry in entries.items() if 'link' in entry])
+    return {'type': 'dir', 'entries': entries}
+
+
+class RemoteCache:
+    """多台构建机共享的构建缓存，以输入指纹为键、文件内容哈希为对象名。
+
+    publish() 先上传缺少的内容对象，最后写入指纹对应的产物清单，清单可见时其引用的对象必定已齐全；
+    fetch() 下载的每个对象都校验哈希，整个产物在临时位置拼好后才替换到输出目录。
+    """
+
+    def __init__(self, location, push=True):
+        self.backend = open_backend(location)
+        self.push = push
+        # 下载时发现缺失或损坏的对象，发布时无论服务端是否已有都重新上传
+        self._broken = set()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return repr(self.backend)
+
+    def publish(self, key, artifacts):
+        """上传产物 {产物名: 路径}，返回 (上传的对象数, 字节数)"""
+        trees = {name: _scan_tree(path) for name, path in artifacts.items()}
+        sources = {}
+        for name, tree in trees.items():
+            if tree['type'] == 'file':
+                sources[tree['entry']['hash']] = artifacts[name]
+            else:
+                for rel, entry in tree['entries'].items():
+                    if 'hash' in entry:
+                        sources[entry['hash']] = os.path.join(artifacts[name], *rel.split('/'))
+
+        def upload(item):
+            digest, path = item
+            with self._lock:
+                broken = digest in self._broken
+            if not broken and self.backend.has_object(digest):
+                return 0
+            with open(path, 'rb') as f:
+                self.backend.put_object(digest, f)
+            return os.path.getsize(path)
+        with ThreadPoolExecutor(TRANSFER_WORKERS) as pool:
+            sizes = [size for size in pool.map(upload, sources.items()) if size]
+        with self._lock:
+            self._broken -= set(sources)
+        entry = {'version': REMOTE_VERSION, 'artifacts': trees}
+        self.backend.put_entry(key, json.dumps(entry, sort_keys=True).encode('utf-8'))
+        return len(sizes), sum(sizes)
+
+    def lookup(self, key, names):
+        """取得指纹对应的产物清单，产物名与 names 不一致或条目损坏时返回 None"""
+        data = self.backend.get_entry(key)
+        if data is None:
+            return None
+        try:
+            entry = json.loads(data.decode('utf-8'))
+        except ValueError:
+            return None
+        if entry.get('version') != REMOTE_VERSION or sorted(entry.get('artifacts', {})) != sorted(names):
+            return None
+        return entry['artifacts']
+
+    def fetch(self, key, artifacts):
+        """下载并还原产物 {产物名: 目标路径}，返回下载的字节数，未命中时返回 None；
+        对象缺失或校验失败、清单中的路径或符号链接会落到产物目录之外时抛出 ValueError，输出目录保持原样"""
+        trees = self.lookup(key, artifacts)
+        if trees is None:
+            return None
+        # 清单来自远程，写入任何文件前先校验所有路径
+        for tree in trees.values():
+            if tree['type'] != 'file':
+                for rel, entry in tree['entries'].items():
+                    if 'link' in entry:
+                        check_link(rel, entry['link'])
+                    else:
+                        check_rel_path(rel)
+        tmps = {name: _tmp_name(dest) for name, dest in artifacts.items()}
+        try:
+            jobs = []
+            for name, tree in trees.items():
+                tmp = tmps[name]
+                if tree['type'] == 'file':
+                    os.makedirs(os.path.dirname(tmp), exist_ok=True)
+                    jobs.append((tree['entry'], tmp))
+                    continue
+                os.makedirs(tmp)
+                # 符号链接在文件都下载完后再建，写文件时不会经过链接
+                for rel, entry in sorted(tree['entries'].items(), key=tree_order):
+                    target = os.path.join(tmp, *rel.split('/'))
+                    if entry.get('dir'):
+                        os.makedirs(target, exist_ok=True)
+                    elif 'hash' in entry:
+                        jobs.append((entry, target))
+
+            def download(job):
+                entry, target = job
+                if not self.backend.get_object(entry['hash'], target):
+                    with self._lock:
+                        self._broken.add(entry['hash'])
+                    return entry['hash']
+                if entry.get('exec'):
+                    os.chmod(target, os.stat(target).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+                return None
+            with ThreadPoolExecutor(TRANSFER_WORKERS) as pool:
+                broken = [digest for digest in pool.map(download, jobs) if digest]
+            if broken:
+                raise ValueError(f'{len(broken)} 个对象缺失或内容与哈希不符（如 {broken[0]}）')
+            for name, tree in trees.items():
+                if tree['type'] == 'file':
+                    continue
+                links = [rel for rel, entry in tree['entries'].items() if 'link' in entry]
+                for rel in links:
+                    os.symlink(tree['entries'][rel]['link'], os.path.join(tmps[name], *rel.split('/')))
+                check_links_inside(tmps[name], links)
+            for name, dest in artifacts.items():
+                if os.path.isdir(dest) and not os.path.islink(dest):
+                    shutil.rmtree(dest)
+                elif os.path.lexists(dest):
+                    os.remove(dest)
+                os.replace(tmps[name], dest)
+            return sum(entry['size'] for entry, _ in jobs)
+        finally:
+            for tmp in tmps.values():
+                if os.path.isdir(tmp) and not os.path.islink(tmp):
+                    shutil.rmtree(tmp, ignore_errors=True)
+                elif os.path.lexists(tmp):
+                    os.remove(tmp)
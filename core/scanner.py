@@ -0,0 +1,66 @@
+import os
+
+from core.cache import SKIP_DIRS
+
+# 扫描入口文件时默认跳过的目录
+DEFAULT_IGNORE_DIRS = sorted(SKIP_DIRS | {'.tox', '.nox', '.mypy_cache', '.pytest_cache', '.idea', '.vscode', 'site-packages'})
+
+
+class ProjectScanner:
+    """项目 .py 文件扫描器。
+
+    用 os.scandir 逐目录列举，忽略目录整棵跳过；可在后台线程中调用，结果按批通过回调送出。
+    不缓存目录列表：目录的 mtime 只反映直接子项的增删，无法据此跳过整棵子树，
+    逐目录比对 mtime 的开销与重新列举相当。
+    """
+
+    def __init__(self, ignore_dirs=None):
+        self.ignore_dirs = set(ignore_dirs if ignore_dirs is not None else DEFAULT_IGNORE_DIRS)
+
+    def set_ignore_dirs(self, ignore_dirs):
+        self.ignore_dirs = set(ignore_dirs)
+
+    def _list_dir(self, path):
+        files, subdirs = [], []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in self.ignore_dirs:
+                                subdirs.append(entry.name)
+                        elif entry.name.endswith('.py'):
+                            files.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            return [], []
+        files.sort()
+        subdirs.sort()
+        return files, subdirs
+
+    def scan(self, root, callback=None, batch_size=200, cancelled=None):
+        """扫描 root 下的 .py 文件，返回相对路径列表。
+
+        callback(list) 每攒够 batch_size 个结果调用一次；cancelled() 返回 True 时提前结束。
+        """
+        results = []
+        batch = []
+        # 栈中同时保存相对路径前缀，避免逐目录调用 os.path.relpath
+        stack = [(root, '')]
+        while stack:
+            if cancelled and cancelled():
+                break
+            path, prefix = stack.pop()
+            files, subdirs = self._list_dir(path)
+            rel_paths = [prefix + name for name in files]
+            results.extend(rel_paths)
+            batch.extend(rel_paths)
+            if callback and len(batch) >= batch_size:
+                callback(batch)
+                batch = []
+            # 逆序入栈，使出栈顺序与目录名顺序一致
+            stack.extend((os.path.join(path, d), prefix + d + os.sep) for d in reversed(subdirs))
+        if callback and batch:
+            callback(batch)
+        return results
@@ -0,0 +1,221 @@
+import os
+
+from core.cache import split_data_spec
+
+# 构建变体：输出名后缀、是否单文件、是否调试（bootloader 调试输出 + 导入详情，强制控制台）
+VARIANTS = {
+    'onedir': {'suffix': '', 'onefile': False, 'debug': False},
+    'onefile': {'suffix': '-onefile', 'onefile': True, 'debug': False},
+    'debug': {'suffix': '-debug', 'onefile': False, 'debug': True},
+}
+VARIANT_LABELS = {'onedir': '单目录', 'onefile': '单文件', 'debug': '调试'}
+
+# 带值、可多次出现的参数 -> spec 中的列表
+_LIST_OPTIONS = {
+    '--hidden-import': 'hiddenimports', '--hiddenimport': 'hiddenimports',
+    '--exclude-module': 'excludes',
+    '-p': 'pathex', '--paths': 'pathex',
+    '--add-data': 'datas', '--add-binary': 'binaries',
+    '--collect-submodules': 'collect_submodules',
+    '--collect-data': 'collect_data', '--collect-datas': 'collect_data',
+    '--collect-binaries': 'collect_binaries',
+    '--collect-all': 'collect_all',
+    '--copy-metadata': 'copy_metadata',
+    '--additional-hooks-dir': 'hookspath',
+    '--runtime-hook': 'runtime_hooks',
+    '--upx-exclude': 'upx_exclude',
+}
+# 带值的单值参数
+_VALUE_OPTIONS = {
+    '-n': 'name', '--name': 'name',
+    '-i': 'icon', '--icon': 'icon',
+    '--runtime-tmpdir': 'runtime_tmpdir',
+    '--version-file': 'version_file',
+    '--contents-directory': 'contents_directory',
+}
+# 开关参数 -> (spec 选项, 值)
+_FLAG_OPTIONS = {
+    '-F': ('onefile', True), '--onefile': ('onefile', True),
+    '-D': ('onefile', False), '--onedir': ('onefile', False),
+    '-w': ('console', False), '--windowed': ('console', False), '--noconsole': ('console', False),
+    '-c': ('console', True), '--console': ('console', True), '--nowindowed': ('console', True),
+    '--noupx': ('upx', False),
+    '-s': ('strip', True), '--strip': ('strip', True),
+    '--uac-admin': ('uac_admin', True),
+    '--bootloader-ignore-signals': ('bootloader_ignore_signals', True),
+    '--disable-windowed-traceback': ('disable_windowed_traceback', True),
+}
+# 使用 spec 构建时仍由命令行传给 PyInstaller 的参数
+_BUILD_FLAGS = {'--clean', '-y', '--noconfirm', '-a', '--ascii'}
+_BUILD_VALUE_OPTIONS = {'--upx-dir', '--log-level'}
+_DEBUG_CHOICES = ('all', 'imports', 'bootloader', 'noarchive')
+
+
+def parse_opts(opts):
+    """把 PyInstaller 命令行参数拆分为 spec 选项、构建参数和无法写入 spec 的参数。
+
+    返回 {'spec': {...}, 'build_args': [...], 'unsupported': [...]}。
+    """
+    spec = {'console': True, 'onefile': False, 'upx': True, 'strip': False, 'debug': set()}
+    for key in set(_LIST_OPTIONS.values()):
+        spec[key] = []
+    build_args = []
+    unsupported = []
+    i = 0
+    while i < len(opts):
+        opt = opts[i]
+        name, eq, inline = opt.partition('=') if opt.startswith('--') else (opt, '', '')
+
+        def take_value():
+            nonlocal i
+            if eq:
+                return inline
+            if i + 1 < len(opts):
+                i += 1
+                return opts[i]
+            return None
+        if name in _FLAG_OPTIONS and not eq:
+            key, value = _FLAG_OPTIONS[name]
+            spec[key] = value
+        elif name in ('-d', '--debug'):
+            # 旧版 PyInstaller 的 --debug 不带值，等同于 all
+            if eq or (i + 1 < len(opts) and opts[i + 1] in _DEBUG_CHOICES):
+                value = take_value()
+            else:
+                value = 'all'
+            spec['debug'].update(('imports', 'bootloader', 'noarchive') if value == 'all' else (value,))
+        elif name in _LIST_OPTIONS or name in _VALUE_OPTIONS:
+            value = take_value()
+            if value is None:
+                unsupported.append(opt)
+            elif name in _LIST_OPTIONS:
+                spec[_LIST_OPTIONS[name]].append(value)
+            else:
+                spec[_VALUE_OPTIONS[name]] = value
+        elif name in _BUILD_FLAGS and not eq:
+            build_args.append(opt)
+        elif name in _BUILD_VALUE_OPTIONS:
+            value = take_value()
+            build_args += [name, value] if value is not None else [opt]
+        else:
+            unsupported.append(opt)
+        i += 1
+    return {'spec': spec, 'build_args': build_args, 'unsupported': unsupported}
+
+
+def expand_variants(keys, name):
+    """按变体名列表生成 [{'key', 'name', 'onefile', 'debug'}]，输出名为 <名称><后缀>"""
+    return [dict(VARIANTS[key], key=key, name=name + VARIANTS[key]['suffix']) for key in keys if key in VARIANTS]
+
+
+def _abs(path, base):
+    return os.path.normpath(os.path.join(base, path))
+
+
+def single_target(spec, name):
+    """不使用变体时按参数本身的单文件/目录模式生成唯一的构建目标"""
+    return [{'key': None, 'name': name, 'onefile': spec['onefile'], 'debug': False}]
+
+
+def render_spec(entry, proj_path, spec, variants, datas=(), icon=None, deps=None):
+    """生成 spec 文件内容：一个 Analysis/PYZ，每个变体各自一组 EXE（目录模式再加 COLLECT）。
+
+    spec 为 parse_opts 返回的 'spec'；datas 为 "源;目标" 格式的列表，icon 为图标路径。
+    spec 放在工具工作目录下，所有相对路径都按项目目录转为绝对路径。
+    deps 为 DepCache.plan 返回的第三方依赖缓存结果，其中的包从分析中排除，缓存的模块和文件直接加入。
+    """
+    proj_path = os.path.abspath(proj_path)
+    all_datas = []
+    for d in list(datas) + spec['datas']:
+        src, dst, _ = split_data_spec(d)
+        all_datas.append((_abs(src, proj_path), dst))
+    binaries = []
+    for d in spec['binaries']:
+        src, dst, _ = split_data_spec(d)
+        binaries.append((_abs(src, proj_path), dst))
+    icon = icon or spec.get('icon')
+    if icon and icon != 'NONE':
+        icon = _abs(icon, proj_path)
+    helpers = [name for key, name in (('collect_all', 'collect_all'), ('collect_submodules', 'collect_submodules'),
+                                      ('collect_data', 'collect_data_files'), ('collect_binaries', 'collect_dynamic_libs'),
+                                      ('copy_metadata', 'copy_metadata')) if spec[key]]
+    lines = ['# -*- mode: python ; coding: utf-8 -*-',
+             '# 由打包工具根据配置生成，配置变化时会被重新生成，请勿手动修改']
+    if helpers:
+        lines.append(f"from PyInstaller.utils.hooks import {', '.join(helpers)}")
+    lines += ['', f'datas = {all_datas!r}', f'binaries = {binaries!r}', f"hiddenimports = {spec['hiddenimports']!r}"]
+    for module in spec['collect_all']:
+        lines += [f'tmp_ret = collect_all({module!r})',
+                  'datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]']
+    for module in spec['collect_submodules']:
+        lines.append(f'hiddenimports += collect_submodules({module!r})')
+    for module in spec['collect_data']:
+        lines.append(f'datas += collect_data_files({module!r})')
+    for module in spec['collect_binaries']:
+        lines.append(f'binaries += collect_dynamic_libs({module!r})')
+    for package in spec['copy_metadata']:
+        lines.append(f'datas += copy_metadata({package!r})')
+    excludes = list(spec['excludes'])
+    runtime_hooks = [_abs(p, proj_path) for p in spec['runtime_hooks']]
+    if deps:
+        lines += ['', f"# 第三方依赖缓存：{', '.join(deps['units'])} 不再分析，直接使用上次分析的结果",
+                  f"datas += {deps['datas']!r}", f"binaries += {deps['binaries']!r}",
+                  f"hiddenimports += {deps['hiddenimports']!r}"]
+        excludes += deps['units']
+        runtime_hooks += deps['runtime_hooks']
+    # 与命令行模式一致：入口脚本所在目录由 PyInstaller 自动加入搜索路径
+    pathex = [_abs(p, proj_path) for p in spec['pathex']]
+    lines += [
+        '',
+        'a = Analysis(',
+        f'    [{_abs(entry, proj_path)!r}],',
+        f'    pathex={pathex!r},',
+        '    binaries=binaries,',
+        '    datas=datas,',
+        '    hiddenimports=hiddenimports,',
+        f"    hookspath={[_abs(p, proj_path) for p in spec['hookspath']]!r},",
+        '    hooksconfig={},',
+        f"    runtime_hooks={runtime_hooks!r},",
+        f"    excludes={excludes!r},",
+        f"    noarchive={'noarchive' in spec['debug']!r},",
+        ')',
+    ]
+    if deps:
+        lines.append(f"a.pure += {deps['pure']!r}")
+    lines.append('pyz = PYZ(a.pure)')
+    for index, variant in enumerate(variants):
+        debug = set(spec['debug'])
+        if variant['debug']:
+            debug.update(('imports', 'bootloader'))
+        options = "[('v', None, 'OPTION')]" if 'imports' in debug else '[]'
+        exe_kwargs = [
+            f"name={variant['name']!r}",
+            f"debug={'bootloader' in debug!r}",
+            f"bootloader_ignore_signals={spec.get('bootloader_ignore_signals', False)!r}",
+            f"strip={spec['strip']!r}",
+            f"upx={spec['upx']!r}",
+            # 调试变体强制显示控制台，才能看到 bootloader 和导入日志
+            f"console={spec['console'] or variant['debug']!r}",
+            f"disable_windowed_traceback={spec.get('disable_windowed_traceback', False)!r}",
+        ]
+        if icon:
+            exe_kwargs.append(f'icon={[icon]!r}')
+        if spec.get('version_file'):
+            exe_kwargs.append(f"version={_abs(spec['version_file'], proj_path)!r}")
+        if spec.get('uac_admin'):
+            exe_kwargs.append('uac_admin=True')
+        if spec.get('contents_directory'):
+            exe_kwargs.append(f"contents_directory={spec['contents_directory']!r}")
+        lines.append('')
+        if variant.get('key'):
+            lines.append(f"# 变体: {variant['key']}")
+        if variant['onefile']:
+            exe_kwargs += [f"upx_exclude={spec['upx_exclude']!r}", f"runtime_tmpdir={spec.get('runtime_tmpdir')!r}"]
+            lines.append(f'exe_{index} = EXE(pyz, a.scripts, a.binaries, a.datas, {options}, '
+                         + ', '.join(exe_kwargs) + ')')
+        else:
+            lines.append(f'exe_{index} = EXE(pyz, a.scripts, {options}, exclude_binaries=True, '
+                         + ', '.join(exe_kwargs) + ')')
+            lines.append(f"coll_{index} = COLLECT(exe_{index}, a.binaries, a.datas, strip={spec['strip']!r}, "
+                         f"upx={spec['upx']!r}, upx_exclude={spec['upx_exclude']!r}, name={variant['name']!r})")
+    return '\n'.join(lines) + '\n'
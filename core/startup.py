@@ -0,0 +1,120 @@
+import os
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from core.profiler import tree_stats
+
+IS_WINDOWS = sys.platform.startswith('win')
+# 轮询单文件程序解包进度的间隔（秒）
+POLL_INTERVAL = 0.005
+
+
+def executable_path(artifact, app_name):
+    """产物中的可执行文件：单文件模式即产物本身，目录模式为目录下的同名程序"""
+    if os.path.isfile(artifact):
+        return artifact
+    return os.path.join(artifact, app_name + ('.exe' if IS_WINDOWS else ''))
+
+
+def kill_tree(proc):
+    """结束进程及其所有子进程，进程需以新会话/新进程组启动"""
+    try:
+        if IS_WINDOWS:
+            subprocess.run(['taskkill', '/F', '/T', '/PID', str(proc.pid)], capture_output=True)
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+    except Exception:
+        proc.kill()
+
+
+def run_once(exe, timeout=30, onefile=False, on_start=None):
+    """启动一次程序，记录首次输出时间、退出时间，单文件模式还记录解包时间（秒）。
+
+    超时仍未退出的程序（如 GUI 程序）会被结束整个进程树，exit 记为 None。
+    单文件程序由引导进程解包到临时目录后再启动子进程运行 Python，
+    子进程出现的时刻即视为解包完成；为此每次运行使用独立的临时目录。
+    on_start(proc) 在进程启动后调用，供调用方取消时结束该进程（可抛出异常中止本次运行）。
+    """
+    tmp_dir = tempfile.mkdtemp(prefix='py_packager_startup_')
+    env = os.environ.copy()
+    for name in ('TMPDIR', 'TEMP', 'TMP'):
+        env[name] = tmp_dir
+    kwargs = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP} if IS_WINDOWS else {'start_new_session': True}
+    result = {'first_output': None, 'exit': None, 'unpack': None, 'returncode': None, 'timed_out': False}
+    start = time.perf_counter()
+    try:
+        proc = subprocess.Popen([exe], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                                cwd=os.path.dirname(exe), env=env, **kwargs)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    def read_output():
+        first = proc.stdout.read(1)
+        if first:
+            result['first_output'] = time.perf_counter() - start
+        for _ in iter(lambda: proc.stdout.read(65536), b''):
+            pass
+    reader = threading.Thread(target=read_output, daemon=True)
+    reader.start()
+    try:
+        if on_start:
+            on_start(proc)
+        if onefile:
+            deadline = start + timeout
+            while proc.poll() is None and time.perf_counter() < deadline:
+                stats = tree_stats(proc.pid)
+                if stats is None:
+                    break  # 当前平台无法统计子进程
+                if len(stats) > 1:
+                    result['unpack'] = time.perf_counter() - start
+                    break
+                time.sleep(POLL_INTERVAL)
+        try:
+            proc.wait(max(0.0, timeout - (time.perf_counter() - start)))
+            result['exit'] = time.perf_counter() - start
+            result['returncode'] = proc.returncode
+        except subprocess.TimeoutExpired:
+            result['timed_out'] = True
+            kill_tree(proc)
+            proc.wait()
+        reader.join(timeout=5)
+    finally:
+        if proc.poll() is None:
+            kill_tree(proc)
+            proc.wait()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return result
+
+
+def _summary(runs, field):
+    values = [run[field] for run in runs if run[field] is not None]
+    return round(statistics.median(values), 4) if values else None
+
+
+def measure_startup(exe, runs=3, timeout=30, onefile=False, on_start=None):
+    """连续启动 runs 次：第一次为冷启动（刚生成的产物），其余取中位数作为热启动"""
+    results = [run_once(exe, timeout, onefile, on_start) for _ in range(runs)]
+    report = {'exe': exe, 'runs': results, 'timeout': timeout, 'onefile': onefile}
+    for name, group in (('cold', results[:1]), ('warm', results[1:])):
+        report[name] = {field: _summary(group, field) for field in ('first_output', 'exit', 'unpack')} if group else None
+    return report
+
+
+def format_startup(report):
+    """启动测试结果的单行摘要"""
+    def fmt(summary):
+        if not summary:
+            return '-'
+        parts = []
+        for field, label in (('exit', '退出'), ('first_output', '首次输出'), ('unpack', '解包')):
+            if summary.get(field) is not None:
+                parts.append(f"{label} {summary[field] * 1000:.0f}ms")
+        return '，'.join(parts) or '超时'
+    return f"冷启动: {fmt(report.get('cold'))}；热启动: {fmt(report.get('warm'))}"
@@ -1,7 +1,8 @@
-from PIL import Image
 import os
 
 def convert_to_ico(src_img, dst_ico):
+    # Pillow 导入较慢，只在真正转换图标时加载
+    from PIL import Image
     img = Image.open(src_img)
     img.save(dst_ico, format="ICO")
 
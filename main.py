@@ -1,9 +1,36 @@
 import sys
-from PyQt5.QtWidgets import QApplication
-from ui.main_window import MainWindow
+import multiprocessing
 
-if __name__ == "__main__":
+# 启动参数 --import-profile：输出各模块导入耗时和窗口显示耗时，用于排查启动慢的问题
+IMPORT_PROFILE_FLAG = '--import-profile'
+
+
+def main():
+    profiler = None
+    if IMPORT_PROFILE_FLAG in sys.argv:
+        sys.argv.remove(IMPORT_PROFILE_FLAG)
+        from core.import_profile import ImportProfiler
+        profiler = ImportProfiler()
+        profiler.start()
+    from PyQt5.QtWidgets import QApplication
+    from ui.main_window import MainWindow
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
-    sys.exit(app.exec_()) 
\ No newline at end of file
+    if profiler:
+        import time
+        from PyQt5.QtCore import QTimer
+
+        def report():
+            profiler.stop()
+            print(profiler.report(), file=sys.stderr)
+            print(f"窗口显示耗时: {(time.perf_counter() - profiler.start_time) * 1000:.1f} ms", file=sys.stderr)
+        # 事件循环处理完首次绘制后再统计
+        QTimer.singleShot(0, report)
+    return app.exec_()
+
+
+if __name__ == "__main__":
+    # 打包后的程序使用进程池（入口文件分析）时需要
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# 工具目录（~/.py_packager）在导入 core.config 时确定，测试使用临时的用户目录，不写入真实的 ~
+os.environ['HOME'] = tempfile.mkdtemp(prefix='py_packager_test_home_')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
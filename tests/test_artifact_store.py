@@ -0,0 +1,66 @@
+import json
+import os
+import threading
+import time
+
+from core.artifact_store import ArtifactStore
+from core.cache import BuildCache
+
+
+def make_artifact(tmp_path, name, content):
+    path = tmp_path / 'dist' / name
+    path.parent.mkdir(exist_ok=True)
+    path.write_bytes(content)
+    return str(path)
+
+
+def index_keys(root):
+    with open(os.path.join(root, 'index.json'), encoding='utf-8') as f:
+        return set(json.load(f)['objects'])
+
+
+def test_ingest_merges_index_written_by_another_instance(tmp_path):
+    # 两个实例共用一个库目录，相当于两个并行的进程
+    root = str(tmp_path / 'store')
+    first, second = ArtifactStore(root), ArtifactStore(root)
+    second._load_index()  # 在另一方入库之前读入索引
+    a, _ = first.ingest(make_artifact(tmp_path, 'a.exe', b'aaa'))
+    b, _ = second.ingest(make_artifact(tmp_path, 'b.exe', b'bbb'))
+    assert index_keys(root) == {a['entry']['key'], b['entry']['key']}
+    with first.lock():  # 进入时重新读取索引
+        assert first.can_materialize(a) and first.can_materialize(b)
+
+
+def test_gc_waits_for_ingest_and_record(tmp_path):
+    root = str(tmp_path / 'store')
+    builder, collector = ArtifactStore(root), ArtifactStore(root)
+    kept, _ = collector.ingest(make_artifact(tmp_path, 'kept.exe', b'kept'))
+    finished = []
+
+    def gc():
+        # 只知道 kept 的清单，不能删掉另一方已入库、正要记录的对象
+        collector.gc([kept])
+        finished.append(time.monotonic())
+
+    with builder.lock():
+        tree, _ = builder.ingest(make_artifact(tmp_path, 'new.exe', b'new'))
+        thread = threading.Thread(target=gc)
+        thread.start()
+        time.sleep(0.2)
+        assert not finished
+        assert builder.can_materialize(tree)
+        released = time.monotonic()
+    thread.join(5)
+    assert finished and finished[0] >= released
+    # 记录前未被清理；之后清单仍未引用它，再次 gc 才会删除
+    assert not builder.can_materialize(tree)
+
+
+def test_build_cache_store_keeps_records_of_other_instances(tmp_path):
+    root = tmp_path / 'cache'
+    root.mkdir()
+    first, second = BuildCache(str(root)), BuildCache(str(root))
+    assert first.store('a' * 64, [make_artifact(tmp_path, 'a.exe', b'a')])
+    assert second.store('b' * 64, [make_artifact(tmp_path, 'b.exe', b'b')])
+    with open(root / 'manifest.json', encoding='utf-8') as f:
+        assert set(json.load(f)) == {'a' * 64, 'b' * 64}
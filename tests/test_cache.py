@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+from core.cache import HIT, BuildCache, compute_fingerprint
+
+ENV = {'python': '3.11.7', 'abi': ['linux', 'linux-x86_64', 'x86_64', 'cpython-311-x86_64-linux-gnu', 'glibc 2.36'],
+       'pyinstaller': '6.3.0', 'dists': ['pyinstaller==6.3.0']}
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = str(tmp_path / 'proj')
+    write(os.path.join(root, 'app.py'), 'import pkg.mod\n')
+    write(os.path.join(root, 'pkg', '__init__.py'), '')
+    write(os.path.join(root, 'pkg', 'mod.py'), 'X = 1\n')
+    write(os.path.join(root, 'assets', 'a.txt'), 'data')
+    return root
+
+
+def fingerprint(root, datas=(), opts=(), env=ENV):
+    return compute_fingerprint(root, 'app.py', list(datas), list(opts), None, env)
+
+
+def test_source_change_misses(project):
+    before = fingerprint(project)
+    write(os.path.join(project, 'pkg', 'mod.py'), 'X = 2\n')
+    assert fingerprint(project) != before
+
+
+def test_new_source_file_misses(project):
+    before = fingerprint(project)
+    write(os.path.join(project, 'pkg', 'extra.py'), '')
+    assert fingerprint(project) != before
+
+
+def test_skipped_dirs_do_not_affect_fingerprint(project):
+    before = fingerprint(project)
+    for skipped in ('.git', '__pycache__', 'build', 'dist', 'venv', 'node_modules'):
+        write(os.path.join(project, skipped, 'x.py'), 'changed\n')
+    write(os.path.join(project, 'notes.txt'), 'not a source file')
+    assert fingerprint(project) == before
+
+
+def test_env_fields_change_misses(project):
+    before = fingerprint(project)
+    for field, value in (('python', '3.11.8'), ('abi', ['linux', 'linux-aarch64']), ('pyinstaller', '6.4.0'),
+                         ('dists', ['pyinstaller==6.3.0', 'requests==2.0'])):
+        assert fingerprint(project, env=dict(ENV, **{field: value})) != before, field
+
+
+def test_opts_and_datas_change_misses(project):
+    before = fingerprint(project)
+    assert fingerprint(project, opts=['--onefile']) != before
+    with_data = fingerprint(project, datas=[f'assets{os.pathsep}assets'])
+    assert with_data != before
+    write(os.path.join(project, 'assets', 'a.txt'), 'other')
+    assert fingerprint(project, datas=[f'assets{os.pathsep}assets']) != with_data
+
+
+def test_fingerprint_is_location_independent(project, tmp_path):
+    import shutil
+    moved = str(tmp_path / 'elsewhere' / 'proj')
+    shutil.copytree(project, moved)
+    assert fingerprint(moved) == fingerprint(project)
+
+
+def test_lookup_hits_until_artifact_changes(project, tmp_path):
+    (tmp_path / 'cache').mkdir()
+    cache = BuildCache(root=str(tmp_path / 'cache'))
+    artifact = str(tmp_path / 'out' / 'app')
+    write(os.path.join(artifact, 'app'), 'binary')
+    key = fingerprint(project)
+    assert cache.lookup(key, [artifact]) is None
+    assert cache.store(key, [artifact])
+    assert cache.lookup(key, [artifact]) == HIT
+    # 指纹变化（源码改动）未命中
+    write(os.path.join(project, 'app.py'), 'print(1)\n')
+    assert cache.lookup(fingerprint(project), [artifact]) is None
+    # 产物被改动后不再直接复用
+    write(os.path.join(artifact, 'app'), 'tampered binary')
+    assert cache.lookup(key, [artifact]) is None
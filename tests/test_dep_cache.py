@@ -0,0 +1,138 @@
+import os
+
+import pytest
+
+from core.config import write_json_atomic
+from core.dep_cache import DEP_CACHE_VERSION, DepCache
+from core.spec_builder import parse_opts, render_spec, single_target
+
+INFO = {'python': '3.11.7', 'abi': ['linux', 'linux-x86_64', 'x86_64', 'cpython-311', 'glibc 2.36'],
+        'pyinstaller': '6.22.3', 'dists': ['fakepkg==1.0', 'pyinstaller-hooks-contrib==2026.8']}
+
+
+@pytest.fixture
+def env(tmp_path):
+    """已安装的第三方包 fakepkg、导入它的项目，以及按 record() 的格式写好的缓存"""
+    site = tmp_path / 'site' / 'fakepkg'
+    site.mkdir(parents=True)
+    for name in ('__init__.py', 'sub.py', 'extra.py', '_native.so', 'data.txt', 'pyi_rth_fakepkg.py'):
+        (site / name).write_text('')
+    project = tmp_path / 'proj'
+    project.mkdir()
+    (project / 'app.py').write_text('import json\nimport fakepkg.sub\n')
+    cache = DepCache(str(tmp_path / 'dep_cache'))
+    entry = {
+        'version': DEP_CACHE_VERSION,
+        'unit': 'fakepkg',
+        'versions': ['fakepkg==1.0', 'pyinstaller-hooks-contrib==2026.8'],
+        'excludes': [],
+        'modules': ['fakepkg', 'fakepkg.sub'],
+        'external': ['json'],
+        'inventory': ['fakepkg', 'fakepkg.extra', 'fakepkg.sub'],
+        'pure': [['fakepkg', str(site / '__init__.py'), 'PYMODULE'], ['fakepkg.sub', str(site / 'sub.py'), 'PYMODULE']],
+        'binaries': [[str(site / '_native.so'), 'fakepkg']],
+        'datas': [[str(site / 'data.txt'), 'fakepkg']],
+        'rthooks': [str(site / 'pyi_rth_fakepkg.py')],
+    }
+    os.makedirs(cache._env_dir(INFO))
+    write_json_atomic(cache._entry_path(INFO, 'fakepkg'), entry)
+    write_json_atomic(os.path.join(cache._env_dir(INFO), 'index.json'),
+                      {'dists': sorted(INFO['dists']), 'tops': {'fakepkg': ['fakepkg']}})
+    return {'cache': cache, 'project': str(project), 'site': site, 'entry': entry}
+
+
+def plan(env, info=INFO, opts=(), app='app.py'):
+    return env['cache'].plan(info, env['project'], app, parse_opts(list(opts))['spec'])
+
+
+def rewrite_entry(env, **changes):
+    entry = dict(env['entry'], **changes)
+    write_json_atomic(env['cache']._entry_path(INFO, 'fakepkg'), entry)
+
+
+def test_plan_uses_valid_entry(env):
+    deps, note, record = plan(env)
+    assert not record and 'fakepkg' in note
+    assert deps['units'] == ['fakepkg']
+    assert deps['pure'] == [tuple(item) for item in env['entry']['pure']]
+    assert deps['binaries'] == [(str(env['site'] / '_native.so'), 'fakepkg')]
+    assert deps['runtime_hooks'] == [str(env['site'] / 'pyi_rth_fakepkg.py')]
+    # 标准库不属于任何已缓存的包，交给 PyInstaller 照常分析
+    assert deps['hiddenimports'] == ['json']
+
+
+def test_package_version_change_invalidates(env):
+    info = dict(INFO, dists=['fakepkg==1.1', 'pyinstaller-hooks-contrib==2026.8'])
+    deps, _, record = plan(env, info)
+    assert deps is None and record
+
+
+def test_entry_from_older_version_is_not_used_after_index_update(env):
+    # 另一次构建已按新环境重写索引，但 fakepkg 的条目仍是旧版本记录的
+    info = dict(INFO, dists=['fakepkg==1.1', 'pyinstaller-hooks-contrib==2026.8'])
+    write_json_atomic(os.path.join(env['cache']._env_dir(info), 'index.json'),
+                      {'dists': sorted(info['dists']), 'tops': {'fakepkg': ['fakepkg']}})
+    deps, note, record = plan(env, info)
+    assert deps is None and record and 'fakepkg' in note
+
+
+def test_hooks_contrib_version_change_invalidates(env):
+    rewrite_entry(env, versions=['fakepkg==1.0', 'pyinstaller-hooks-contrib==2025.1'])
+    deps, _, record = plan(env)
+    assert deps is None and record
+
+
+def test_missing_recorded_file_invalidates(env):
+    os.remove(env['site'] / '_native.so')
+    deps, _, record = plan(env)
+    assert deps is None and record
+
+
+def test_unrecorded_submodule_invalidates(env):
+    # fakepkg.extra 在包内存在，但记录时的分析没有用到它，排除整个包后会漏掉
+    with open(os.path.join(env['project'], 'app.py'), 'a') as f:
+        f.write('import fakepkg.extra\n')
+    deps, note, record = plan(env)
+    assert deps is None and record and 'fakepkg.extra' in note
+
+
+def test_changed_excludes_invalidate(env):
+    deps, _, _ = plan(env, opts=['--exclude-module', 'fakepkg.sub'])
+    assert deps is None
+
+
+def test_custom_hooks_and_collect_options_disable_cache(env):
+    deps, _, record = plan(env, opts=['--additional-hooks-dir', 'hooks'])
+    assert deps is None and not record
+    deps, _, record = plan(env, opts=['--collect-submodules', 'fakepkg'])
+    assert deps is None and record
+
+
+def test_old_pyinstaller_is_not_supported(env):
+    deps, _, record = plan(env, dict(INFO, pyinstaller='5.13.2'))
+    assert deps is None and not record
+
+
+def test_render_spec_with_deps(env):
+    deps, _, _ = plan(env)
+    spec = parse_opts(['--exclude-module', 'tkinter'])['spec']
+    content = render_spec('app.py', env['project'], spec, single_target(spec, 'app'), deps=deps)
+    compile(content, 'app.spec', 'exec')
+    lines = content.splitlines()
+    # 缓存的包从分析中排除（连同子模块），模块在 Analysis 之后、PYZ 之前加回
+    assert "    excludes=['tkinter', 'fakepkg']," in lines
+    assert f"a.pure += {deps['pure']!r}" in lines
+    assert lines.index(f"a.pure += {deps['pure']!r}") == lines.index('pyz = PYZ(a.pure)') - 1
+    assert f"binaries += {deps['binaries']!r}" in lines
+    assert f"datas += {deps['datas']!r}" in lines
+    assert "hiddenimports += ['json']" in lines
+    assert f"    runtime_hooks={deps['runtime_hooks']!r}," in lines
+    analysis = lines.index('a = Analysis(')
+    assert all(lines.index(f"{key} += {deps[key]!r}") < analysis for key in ('binaries', 'datas'))
+
+
+def test_render_spec_without_deps_has_no_cache_lines(env):
+    spec = parse_opts([])['spec']
+    content = render_spec('app.py', env['project'], spec, single_target(spec, 'app'))
+    assert 'a.pure +=' not in content and '第三方依赖缓存' not in content
+    assert '    excludes=[],' in content.splitlines()
@@ -0,0 +1,59 @@
+from core.log_buffer import LEVEL_ERROR, LEVEL_WARN, LogBuffer
+
+
+def exported(buffer, tmp_path):
+    path = tmp_path / 'export.log'
+    buffer.export(str(path))
+    return [line.split('] ', 2)[-1] for line in path.read_text(encoding='utf-8').splitlines()]
+
+
+def make(tmp_path, capacity):
+    return LogBuffer(capacity, str(tmp_path / 'spill.log'))
+
+
+def test_evicts_oldest_and_keeps_capacity(tmp_path):
+    buffer = make(tmp_path, 3)
+    buffer.extend(['a', 'b'])
+    buffer.extend(['c', 'd'])
+    assert [r.text for r in buffer] == ['b', 'c', 'd']
+    assert buffer.first_seq == 1
+    assert buffer.get(0) is None and buffer.get(3).text == 'd'
+    assert exported(buffer, tmp_path) == ['a', 'b', 'c', 'd']
+
+
+def test_oversized_batch_spills_in_order(tmp_path):
+    buffer = make(tmp_path, 3)
+    buffer.extend(['a', 'b'])
+    records = buffer.extend(['c', 'd', 'e', 'f', 'g'])
+    assert [r.text for r in records] == ['e', 'f', 'g']
+    assert [r.text for r in buffer] == ['e', 'f', 'g']
+    assert exported(buffer, tmp_path) == ['a', 'b', 'c', 'd', 'e', 'f', 'g']
+
+
+def test_level_index_follows_eviction(tmp_path):
+    buffer = make(tmp_path, 2)
+    buffer.extend(['ERROR one', 'warning two', 'ERROR three'])
+    assert list(buffer.level_index[LEVEL_ERROR]) == [2]
+    assert list(buffer.level_index[LEVEL_WARN]) == [1]
+    buffer.extend(['plain'])
+    assert list(buffer.level_index[LEVEL_WARN]) == []
+
+
+def test_explicit_evict_then_extend(tmp_path):
+    # 界面模型先 evict() 通知视图，再 extend()
+    buffer = make(tmp_path, 3)
+    buffer.extend(['a', 'b', 'c'])
+    buffer.evict(buffer.overflow(2))
+    buffer.extend(['d', 'e'])
+    assert [r.text for r in buffer] == ['c', 'd', 'e']
+    assert exported(buffer, tmp_path) == ['a', 'b', 'c', 'd', 'e']
+
+
+def test_clear_removes_spill(tmp_path):
+    buffer = make(tmp_path, 1)
+    buffer.extend(['a', 'b'])
+    assert (tmp_path / 'spill.log').exists()
+    buffer.clear()
+    assert len(buffer) == 0 and not (tmp_path / 'spill.log').exists()
+    buffer.extend(['c'])
+    assert exported(buffer, tmp_path) == ['c']
@@ -0,0 +1,125 @@
+from core.log_parser import (
+    EVENT_DONE, EVENT_ERROR, EVENT_PHASE, EVENT_PROGRESS, EVENT_WARNING,
+    PHASE_ANALYSIS, PHASE_COLLECT, PHASE_DONE, PHASE_EXE, PHASE_PKG, PHASE_PYZ, PHASE_STARTUP,
+    PyInstallerLogParser,
+)
+
+# PyInstaller 6.x 单文件模式的输出（节选），插入了两条警告
+ONEFILE_LOG = """\
+94 INFO: PyInstaller: 6.22.3, contrib hooks: 2026.8
+95 INFO: Python: 3.11.7
+97 INFO: wrote /tmp/lp/app.spec
+328 INFO: checking Analysis
+329 INFO: Building Analysis because Analysis-00.toc is non existent
+336 INFO: Running Analysis Analysis-00.toc
+336 INFO: Initializing module dependency graph...
+356 INFO: Analyzing modules for base_library.zip ...
+1701 INFO: Processing standard module hook 'hook-heapq.py' from '/venv/PyInstaller/hooks'
+1889 INFO: Processing standard module hook 'hook-encodings.py' from '/venv/PyInstaller/hooks'
+7387 INFO: Caching module dependency graph...
+7454 INFO: Analyzing /tmp/lp/app.py
+7460 WARNING: Hidden import "missing_mod_xyz" not found!
+7497 INFO: Processing module hooks (post-graph stage)...
+7511 INFO: Looking for ctypes DLLs
+7525 INFO: Analyzing run-time hooks ...
+7553 INFO: Looking for dynamic libraries
+7600 WARNING: Library not found: could not resolve 'libfoo.so'
+7956 INFO: Warnings written to /tmp/lp/build/app/warn-app.txt
+7994 INFO: checking PYZ
+7995 INFO: Building PYZ (ZlibArchive) /tmp/lp/build/app/PYZ-00.pyz
+8234 INFO: Building PYZ (ZlibArchive) /tmp/lp/build/app/PYZ-00.pyz completed successfully.
+8246 INFO: checking PKG
+8247 INFO: Building PKG (CArchive) app.pkg
+20093 INFO: Building PKG (CArchive) app.pkg completed successfully.
+20095 INFO: checking EXE
+20095 INFO: Building EXE from EXE-00.toc
+20138 INFO: Building EXE from EXE-00.toc completed successfully.
+20141 INFO: Build complete! The results are available in: /tmp/lp/dist
+"""
+
+# 依赖分析中途出错的输出
+FAILED_LOG = """\
+328 INFO: checking Analysis
+336 INFO: Running Analysis Analysis-00.toc
+356 INFO: Analyzing modules for base_library.zip ...
+Traceback (most recent call last):
+  File "/venv/bin/pyinstaller", line 8, in <module>
+SyntaxError: invalid syntax
+"""
+
+
+def feed_all(parser, text):
+    events = []
+    for line in text.splitlines():
+        events.extend(parser.feed(line))
+    return events
+
+
+def test_phase_events_follow_build_order():
+    parser = PyInstallerLogParser()
+    events = feed_all(parser, ONEFILE_LOG)
+    phases = [e.phase for e in events if e.kind == EVENT_PHASE]
+    assert phases == [PHASE_ANALYSIS, PHASE_PYZ, PHASE_PKG, PHASE_EXE, PHASE_DONE]
+    first = next(e for e in events if e.kind == EVENT_PHASE)
+    assert first.data['previous'] == PHASE_STARTUP
+    # 离开依赖分析阶段时带上钩子数
+    pyz = next(e for e in events if e.kind == EVENT_PHASE and e.phase == PHASE_PYZ)
+    assert pyz.data['hooks'] == 2
+    assert parser.phase == PHASE_DONE and parser.progress == 1.0
+
+
+def test_progress_is_monotonic():
+    parser = PyInstallerLogParser()
+    events = feed_all(parser, ONEFILE_LOG)
+    progress = [e.progress for e in events]
+    assert progress == sorted(progress)
+    assert any(e.kind == EVENT_PROGRESS and e.phase == PHASE_ANALYSIS for e in events)
+
+
+def test_warnings_are_counted_without_timestamp():
+    parser = PyInstallerLogParser()
+    events = feed_all(parser, ONEFILE_LOG)
+    warnings = [e for e in events if e.kind == EVENT_WARNING]
+    assert parser.warnings == 2 and parser.errors == 0
+    assert warnings[0].message == 'WARNING: Hidden import "missing_mod_xyz" not found!'
+    assert warnings[0].phase == PHASE_ANALYSIS
+
+
+def test_repeated_or_earlier_phase_lines_are_ignored():
+    parser = PyInstallerLogParser()
+    feed_all(parser, ONEFILE_LOG.split('8246 INFO')[0])
+    assert parser.phase == PHASE_PYZ
+    assert parser.feed('9000 INFO: checking Analysis') == []
+    assert parser.feed('9001 INFO: checking PYZ') == []
+    assert parser.phase == PHASE_PYZ
+    # onedir 模式跳过 PKG 直接进入 COLLECT
+    events = parser.feed('9002 INFO: checking COLLECT')
+    assert [e.phase for e in events] == [PHASE_COLLECT]
+
+
+def test_finish_success():
+    parser = PyInstallerLogParser()
+    feed_all(parser, ONEFILE_LOG.replace('20141 INFO: Build complete!', '20141 INFO: Done'))
+    events = parser.finish(0)
+    assert [e.kind for e in events] == [EVENT_PHASE, EVENT_DONE]
+    done = events[-1]
+    assert done.message == '打包成功' and done.progress == 1.0
+    assert done.data['returncode'] == 0
+    assert done.data['warnings'] == 2 and done.data['errors'] == 0 and done.data['hooks'] == 2
+
+
+def test_finish_after_build_complete_has_single_done_event():
+    parser = PyInstallerLogParser()
+    feed_all(parser, ONEFILE_LOG)
+    assert [e.kind for e in parser.finish(0)] == [EVENT_DONE]
+
+
+def test_finish_failure_keeps_phase():
+    parser = PyInstallerLogParser()
+    events = feed_all(parser, FAILED_LOG)
+    assert [e.kind for e in events if e.kind == EVENT_ERROR] == [EVENT_ERROR, EVENT_ERROR]
+    events = parser.finish(1)
+    assert [e.kind for e in events] == [EVENT_DONE]
+    done = events[0]
+    assert done.message == '打包失败' and done.phase == PHASE_ANALYSIS
+    assert done.data['returncode'] == 1 and done.data['errors'] == 2
@@ -0,0 +1,58 @@
+import re
+
+import pytest
+
+from core.log_buffer import LEVEL_ERROR, LogBuffer
+from core.log_search import LogSearch
+
+
+@pytest.fixture
+def buffer(tmp_path):
+    return LogBuffer(4, str(tmp_path / 'spill.log'))
+
+
+def test_rebuild_keyword_regex_and_level(buffer):
+    buffer.extend(['INFO: Analyzing app.py', 'ERROR: module foo not found', 'WARNING: hidden import bar',
+                   'ERROR: Foo again'])
+    assert LogSearch('foo').rebuild(buffer) == [1, 3]
+    assert LogSearch('Foo', case_sensitive=True).rebuild(buffer) == [3]
+    assert LogSearch(r'module \w+', regex=True).rebuild(buffer) == [1]
+    # 非正则模式按字面量匹配，. 不是通配符
+    assert LogSearch('g.app').rebuild(buffer) == []
+    assert LogSearch('g.app', regex=True).rebuild(buffer) == [0]
+    assert LogSearch(level=LEVEL_ERROR).rebuild(buffer) == [1, 3]
+    assert LogSearch('again', level=LEVEL_ERROR).rebuild(buffer) == [3]
+
+
+def test_invalid_regex_raises():
+    with pytest.raises(re.error):
+        LogSearch('(', regex=True)
+
+
+def test_incremental_feed_matches_rebuild(buffer):
+    search = LogSearch('hit')
+    search.rebuild(buffer)
+    assert search.feed(buffer.extend(['hit 0', 'miss'])) == 1
+    assert search.feed(buffer.extend(['hit 2'])) == 1
+    assert search.matches == LogSearch('hit').rebuild(buffer) == [0, 2]
+
+
+def test_prune_across_eviction(buffer):
+    search = LogSearch('hit')
+    for batch in (['hit 0', 'miss', 'hit 2'], ['hit 3', 'miss', 'hit 5']):
+        # 与界面模型相同的顺序：先淘汰，再剔除被淘汰的匹配，最后匹配新增行
+        buffer.evict(buffer.overflow(len(batch)))
+        search.prune(buffer.first_seq)
+        search.feed(buffer.extend(batch))
+    assert buffer.first_seq == 2
+    assert search.matches == [2, 3, 5]
+    assert search.matches == LogSearch('hit').rebuild(buffer)
+    assert all(buffer.get(seq) is not None for seq in search.matches)
+
+
+def test_prune_everything_when_all_evicted(buffer):
+    search = LogSearch('hit')
+    search.feed(buffer.extend(['hit', 'hit']))
+    buffer.extend(['x', 'y', 'z', 'w'])
+    assert search.prune(buffer.first_seq) == 2
+    assert search.matches == []
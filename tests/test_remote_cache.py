@@ -0,0 +1,127 @@
+import hashlib
+import io
+import json
+import os
+
+import pytest
+
+from core.remote_cache import REMOTE_VERSION, RemoteCache
+
+KEY = 'ab' * 32
+
+
+def sha(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+@pytest.fixture
+def remote(tmp_path):
+    return RemoteCache(str(tmp_path / 'remote'))
+
+
+@pytest.fixture
+def dest(tmp_path):
+    """已有的输出目录，拒绝清单时应保持原样"""
+    path = tmp_path / 'out' / 'app'
+    path.mkdir(parents=True)
+    (path / 'old.txt').write_text('old')
+    return path
+
+
+def put_manifest(remote, entries, data=b'payload'):
+    """直接写入远程清单（模拟被篡改或恶意的缓存），entries 中的文件内容都是 data"""
+    remote.backend.put_object(sha(data), io.BytesIO(data))
+    for entry in entries.values():
+        if entry.get('hash') is None and 'link' not in entry and not entry.get('dir'):
+            entry.update(hash=sha(data), size=len(data), exec=False)
+    tree = {'type': 'dir', 'entries': entries}
+    remote.backend.put_entry(KEY, json.dumps({'version': REMOTE_VERSION, 'artifacts': {'app': tree}}).encode('utf-8'))
+
+
+def assert_untouched(tmp_path, dest):
+    assert sorted(os.listdir(dest)) == ['old.txt']
+    assert sorted(os.listdir(dest.parent)) == ['app']
+    assert not (tmp_path / 'evil.txt').exists()
+
+
+def test_publish_and_fetch_round_trip(tmp_path, remote, dest):
+    src = tmp_path / 'build' / 'app'
+    (src / 'lib').mkdir(parents=True)
+    (src / 'lib' / 'data.bin').write_bytes(b'data')
+    (src / 'app').write_bytes(b'exe')
+    os.chmod(src / 'app', 0o755)
+    os.symlink('lib/data.bin', src / 'link')
+    assert remote.publish(KEY, {'app': str(src)}) == (2, 7)
+    assert remote.fetch(KEY, {'app': str(dest)}) == 7
+    assert sorted(os.listdir(dest)) == ['app', 'lib', 'link']
+    assert (dest / 'link').read_bytes() == b'data' and os.readlink(dest / 'link') == 'lib/data.bin'
+    assert os.access(dest / 'app', os.X_OK)
+
+
+@pytest.mark.parametrize('rel', ['../evil.txt', 'lib/../../evil.txt', '/tmp/evil.txt', 'C:/evil.txt', 'a\\..\\..\\evil.txt', './x'])
+def test_fetch_rejects_paths_outside_artifact(tmp_path, remote, dest, rel):
+    put_manifest(remote, {rel: {}})
+    with pytest.raises(ValueError):
+        remote.fetch(KEY, {'app': str(dest)})
+    assert_untouched(tmp_path, dest)
+
+
+@pytest.mark.parametrize('link', ['../../evil.txt', '/etc/passwd', 'sub/../../..'])
+def test_fetch_rejects_escaping_symlink(tmp_path, remote, dest, link):
+    put_manifest(remote, {'sub': {'dir': True}, 'sub/link': {'link': link}})
+    with pytest.raises(ValueError):
+        remote.fetch(KEY, {'app': str(dest)})
+    assert_untouched(tmp_path, dest)
+
+
+def test_fetch_rejects_chained_symlink_escape(tmp_path, remote, dest):
+    # 每个链接按字面都在产物目录内，但 d/up 解析到产物根目录，经它再 .. 就到了目录之外
+    put_manifest(remote, {'d': {'dir': True}, 'd/up': {'link': '..'}, 'out': {'link': 'd/up/..'}})
+    with pytest.raises(ValueError):
+        remote.fetch(KEY, {'app': str(dest)})
+    assert_untouched(tmp_path, dest)
+
+
+def test_fetch_rejects_file_written_through_symlink(tmp_path, remote, dest):
+    # 链接先于文件出现在清单中时，文件也不能经由链接写到产物目录之外
+    put_manifest(remote, {'escape': {'link': '..'}, 'escape/evil.txt': {}})
+    with pytest.raises(ValueError):
+        remote.fetch(KEY, {'app': str(dest)})
+    assert_untouched(tmp_path, dest)
+
+
+def test_fetch_rejects_hash_mismatch(tmp_path, remote, dest):
+    put_manifest(remote, {'file.txt': {}})
+    with open(remote.backend._object_path(sha(b'payload')), 'wb') as f:
+        f.write(b'tampered')
+    with pytest.raises(ValueError):
+        remote.fetch(KEY, {'app': str(dest)})
+    assert_untouched(tmp_path, dest)
+    assert not any(name.endswith('.tmp') for name in os.listdir(dest.parent))
+    # 损坏的对象在下次发布时重新上传
+    src = tmp_path / 'build' / 'app'
+    src.mkdir(parents=True)
+    (src / 'file.txt').write_bytes(b'payload')
+    assert remote.publish(KEY, {'app': str(src)}) == (1, 7)
+    assert remote.fetch(KEY, {'app': str(dest)}) == 7
+    assert (dest / 'file.txt').read_bytes() == b'payload'
+
+
+def test_put_object_rejects_hash_mismatch(remote):
+    with pytest.raises(ValueError):
+        remote.backend.put_object(sha(b'expected'), io.BytesIO(b'other'))
+    assert not remote.backend.has_object(sha(b'expected'))
+
+
+def test_publish_rejects_escaping_symlink(tmp_path, remote):
+    src = tmp_path / 'build' / 'app'
+    src.mkdir(parents=True)
+    os.symlink('../../outside', src / 'link')
+    with pytest.raises(ValueError):
+        remote.publish(KEY, {'app': str(src)})
+    assert remote.lookup(KEY, ['app']) is None
+
+
+def test_invalid_key_is_rejected(remote, dest):
+    with pytest.raises(ValueError):
+        remote.fetch('../' + 'a' * 61, {'app': str(dest)})
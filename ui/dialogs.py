@@ -1,4 +1,8 @@
-from PyQt5.QtWidgets import QFileDialog, QMessageBox
+from PyQt5.QtWidgets import QFileDialog, QMessageBox, QDialog, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QAbstractItemView, QDialogButtonBox, QFormLayout, QLineEdit, QPushButton, QHBoxLayout, QListWidget, QListWidgetItem
+from PyQt5.QtCore import Qt
+from core.log_parser import PHASE_LABELS
+from core.profiler import compare_phases
+from core.startup import format_startup
 
 # 可扩展自定义对话框
 class FileSelectDialog(QFileDialog):
@@ -10,4 +14,204 @@ class IconConvertDialog(QMessageBox):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("图标转换")
-        self.setText("图片已自动转换为ico格式！") 
\ No newline at end of file
+        self.setText("图片已自动转换为ico格式！")
+
+
+def _fmt_seconds(value):
+    return '-' if value is None else f'{value:.1f}s'
+
+
+def _fmt_bytes(value):
+    if value is None:
+        return '-'
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if value < 1024 or unit == 'GB':
+            return f'{value:.1f} {unit}' if unit != 'B' else f'{value} B'
+        value /= 1024
+
+
+class BuildReportDialog(QDialog):
+    """显示构建报告：各阶段耗时/CPU 时间，并与上一次构建对比"""
+
+    def __init__(self, report, path, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("构建报告")
+        self.resize(560, 360)
+        layout = QVBoxLayout()
+        previous = report.get('previous') or {}
+        summary = (f"构建时间: {report.get('time', '-')}    总耗时: {_fmt_seconds(report.get('wall'))}"
+                   f"    CPU: {_fmt_seconds(report.get('cpu'))}\n"
+                   f"峰值内存: {_fmt_bytes(report.get('peak_rss'))}    产物大小: {_fmt_bytes(report.get('dist_bytes'))}"
+                   f"    警告: {report.get('warnings', 0)}")
+        if previous:
+            summary += (f"\n上次构建: {previous.get('time', '-')}    总耗时: {_fmt_seconds(previous.get('wall'))}"
+                        f"    产物大小: {_fmt_bytes(previous.get('dist_bytes'))}")
+        if report.get('startup'):
+            summary += f"\n本次{format_startup(report['startup'])}"
+            if previous.get('startup'):
+                summary += f"\n上次{format_startup(previous['startup'])}"
+        layout.addWidget(QLabel(summary))
+        cpu = {p['name']: p.get('cpu') for p in report.get('phases', [])}
+        rows = compare_phases(report)
+        table = QTableWidget(len(rows), 5)
+        table.setHorizontalHeaderLabels(["阶段", "耗时", "CPU", "上次耗时", "变化"])
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        for row, (name, wall, before, delta) in enumerate(rows):
+            values = [PHASE_LABELS.get(name, name), _fmt_seconds(wall), _fmt_seconds(cpu.get(name)),
+                      _fmt_seconds(before), '-' if delta is None else f'{delta:+.1f}s']
+            for col, value in enumerate(values):
+                table.setItem(row, col, QTableWidgetItem(value))
+        table.resizeColumnsToContents()
+        layout.addWidget(table)
+        layout.addWidget(QLabel(f"报告文件: {path}"))
+        buttons = QDialogButtonBox(QDialogButtonBox.Close)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+        self.setLayout(layout)
+
+
+class ExcludeAdvisorDialog(QDialog):
+    """列出 --exclude-module 候选及预计节省的体积，勾选结果通过 selected_modules() 取得"""
+
+    def __init__(self, advice, excludes, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("排除模块建议")
+        self.resize(760, 480)
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("根据上次打包的模块依赖图估算：排除某个包后入口不再需要的模块大小即为预计节省。\n"
+                                "\"有风险\"表示该包被解释器核心模块导入，排除后请务必测试产物。已勾选的模块会保存到配置中。"))
+        known = {item['module'] for item in advice}
+        # 当前已排除但不在建议中的模块（排除后不再出现在依赖图里）排在最前
+        rows = [{'module': m, 'bytes': None, 'modules': None, 'importers': [], 'third_party': None, 'risky': False}
+                for m in excludes if m not in known] + list(advice)
+        self.table = QTableWidget(len(rows), 5)
+        self.table.setHorizontalHeaderLabels(["模块", "预计节省", "模块数", "来源", "导入方"])
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        for row, item in enumerate(rows):
+            name_item = QTableWidgetItem(item['module'])
+            name_item.setFlags(name_item.flags() | Qt.ItemIsUserCheckable)
+            name_item.setCheckState(Qt.Checked if item['module'] in excludes else Qt.Unchecked)
+            source = '-' if item['third_party'] is None else ('第三方' if item['third_party'] else '标准库')
+            if item['risky']:
+                source += '（有风险）'
+            values = [_fmt_bytes(item['bytes']), '-' if item['modules'] is None else str(item['modules']), source,
+                      ', '.join(item['importers'][:5]) + (' …' if len(item['importers']) > 5 else '')]
+            self.table.setItem(row, 0, name_item)
+            for col, value in enumerate(values, 1):
+                self.table.setItem(row, col, QTableWidgetItem(value))
+            self.table.item(row, 4).setToolTip('\n'.join(item['importers']))
+        self.table.resizeColumnsToContents()
+        layout.addWidget(self.table)
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+        self.setLayout(layout)
+
+    def selected_modules(self):
+        return [self.table.item(row, 0).text() for row in range(self.table.rowCount())
+                if self.table.item(row, 0).checkState() == Qt.Checked]
+
+
+class InstallPyInstallerDialog(QDialog):
+    """PyInstaller 安装选项：固定版本，以及离线安装用的 wheelhouse/索引目录或索引 URL"""
+
+    def __init__(self, version='', source='', parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("安装PyInstaller")
+        self.resize(520, 160)
+        layout = QVBoxLayout()
+        form = QFormLayout()
+        self.version_edit = QLineEdit(version)
+        self.version_edit.setPlaceholderText("留空安装最新版，如 6.3.0 或 >=6,<7")
+        form.addRow("版本:", self.version_edit)
+        self.source_edit = QLineEdit(source)
+        self.source_edit.setPlaceholderText("留空使用默认索引；可填本地 wheelhouse/索引目录或索引 URL")
+        browse_btn = QPushButton("选择目录")
+        browse_btn.clicked.connect(self.choose_source)
+        source_box = QHBoxLayout()
+        source_box.addWidget(self.source_edit)
+        source_box.addWidget(browse_btn)
+        form.addRow("安装源:", source_box)
+        layout.addLayout(form)
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+        self.setLayout(layout)
+
+    def choose_source(self):
+        path = QFileDialog.getExistingDirectory(self, "选择 wheelhouse 或索引目录")
+        if path:
+            self.source_edit.setText(path)
+
+    def options(self):
+        return self.version_edit.text().strip(), self.source_edit.text().strip()
+
+
+class PythonSelectDialog(QDialog):
+    """解释器选择列表：打开期间后台发现的解释器通过 add_python() 实时加入，已安装 PyInstaller 的排在前面。
+    选中的路径通过 selected_path() 取得；点击“手动选择”时 manual 为 True"""
+
+    def __init__(self, pythons=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("选择Python解释器")
+        self.resize(640, 360)
+        self.manual = False
+        self._picked = False  # 用户选过之后，新加入的条目不再改变选中项
+        self._adding = False
+        layout = QVBoxLayout()
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        self.list_widget = QListWidget()
+        self.list_widget.itemDoubleClicked.connect(lambda _: self.accept())
+        self.list_widget.currentRowChanged.connect(self._on_row_changed)
+        layout.addWidget(self.list_widget)
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        manual_btn = buttons.addButton("手动选择...", QDialogButtonBox.ActionRole)
+        manual_btn.clicked.connect(self.choose_manually)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+        self.setLayout(layout)
+        for path, desc in (pythons or {}).items():
+            self.add_python(path, desc)
+        self._update_status()
+
+    def add_python(self, path, desc):
+        for row in range(self.list_widget.count()):
+            if self.list_widget.item(row).data(Qt.UserRole) == path:
+                return
+        item = QListWidgetItem(f"{path}  ({desc})")
+        item.setData(Qt.UserRole, path)
+        # 未安装 PyInstaller 的排在最后，同类按发现顺序
+        missing = '未安装PyInstaller' in desc
+        row = self.list_widget.count()
+        if not missing:
+            row = next((r for r in range(self.list_widget.count())
+                        if '未安装PyInstaller' in self.list_widget.item(r).text()), row)
+        self._adding = True
+        try:
+            self.list_widget.insertItem(row, item)
+            if not self._picked:
+                self.list_widget.setCurrentRow(0)
+        finally:
+            self._adding = False
+        self._update_status()
+
+    def _on_row_changed(self, row):
+        if not self._adding:
+            self._picked = True
+
+    def _update_status(self):
+        count = self.list_widget.count()
+        self.status_label.setText(f"可用环境（已发现 {count} 个，后台仍在搜索时会继续加入）:" if count
+                                  else "正在搜索本机Python解释器...")
+
+    def choose_manually(self):
+        self.manual = True
+        self.accept()
+
+    def selected_path(self):
+        item = self.list_widget.currentItem()
+        return None if self.manual or item is None else item.data(Qt.UserRole)
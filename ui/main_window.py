@@ -1,20 +1,39 @@
-from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox, QLineEdit, QTextEdit, QFileDialog, QListWidget, QCheckBox, QGroupBox, QMessageBox, QTableWidget, QTableWidgetItem, QAbstractItemView, QInputDialog, QApplication
-from PyQt5.QtCore import Qt, QEvent, QTimer, pyqtSlot, pyqtSignal
+from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox, QLineEdit, QTextEdit, QFileDialog, QListWidget, QCheckBox, QGroupBox, QMessageBox, QTableWidget, QTableWidgetItem, QAbstractItemView, QInputDialog, QApplication, QProgressBar, QSpinBox
+from PyQt5.QtCore import Qt, QEvent, QTimer, QMetaObject, pyqtSlot, pyqtSignal
 from PyQt5.QtGui import QMovie, QIcon
-from ui.widgets import LogTextEdit
+from ui.widgets import LogView
+from ui.dialogs import BuildReportDialog, ExcludeAdvisorDialog, InstallPyInstallerDialog, PythonSelectDialog
 import os
-from core.packager import Packager
+from core.packager import STATE_SUCCEEDED, STATE_CANCELLED, STATE_TIMED_OUT, Packager, config_to_args
+from core.log_parser import EVENT_DONE, EVENT_ERROR, EVENT_WARNING, PHASE_LABELS
+from core.scanner import ProjectScanner, DEFAULT_IGNORE_DIRS
+from core.entry_rank import EntryRanker
+from core.probe import probe_pyinstaller_exe
+from core.installer import PyInstallerInstaller
+from core.discovery import discover_pythons
+from core.profiler import load_report
+from core.exclude_advisor import advise, find_xref, parse_xref
+from core.spec_builder import VARIANTS, VARIANT_LABELS
 from core.utils import convert_to_ico
-from core.config import save_config, load_config
+from core.config import get_config_store, save_config
 import json
-import shutil
-import subprocess
 import sys
-from core.env_utils import save_python_path, load_python_path, check_pyinstaller, install_pyinstaller, save_pyinstaller_path, load_pyinstaller_path
+import threading
+from core.env_utils import save_python_path, load_python_path, check_pyinstaller, save_pyinstaller_path, load_pyinstaller_path, save_install_options, load_install_options
 
 class MainWindow(QMainWindow):
     log_signal = pyqtSignal(str)
+    log_batch_signal = pyqtSignal(list)  # PyInstaller 输出按批送达
     timer_signal = pyqtSignal(int, object)  # 延迟毫秒数, 回调
+    scan_batch_signal = pyqtSignal(int, list)  # 扫描批次号, 本批发现的 .py 文件
+    scan_done_signal = pyqtSignal(int, int)    # 扫描批次号, 文件总数
+    rank_done_signal = pyqtSignal(int, list)   # 扫描批次号, 按入口可能性排序后的文件列表
+    python_found_signal = pyqtSignal(str, str)  # 解释器路径, 描述
+    progress_signal = pyqtSignal(object)  # core.log_parser.BuildEvent
+    env_checked_signal = pyqtSignal(object)  # 环境检测结果
+    exclude_advice_signal = pyqtSignal(object)  # 排除模块建议列表，失败时为异常信息字符串
+    install_done_signal = pyqtSignal(int)  # PyInstaller 安装返回码
+    build_done_signal = pyqtSignal(object)  # 结束的 Packager 任务
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.setWindowTitle("Python项目打包工具")
@@ -26,13 +45,32 @@ class MainWindow(QMainWindow):
         if os.path.exists(icon_path):
             self.setWindowIcon(QIcon(icon_path))
         self._pyinstaller_path = load_pyinstaller_path()  # 启动时自动读取
+        self._scanner = ProjectScanner()
+        self._ranker = EntryRanker()
+        self._scan_gen = 0
+        self._scan_seen = set()
+        self._excludes = []  # 选定的 --exclude-module 模块
+        self._installer = None  # 进行中的 PyInstaller 安装
+        self._batch_cancel = None  # 进行中的批量打包的取消事件
         self.init_ui()
         self.init_signals()
         # 信号连接
         self.log_signal.connect(self.log_edit.append_log)
+        self.log_batch_signal.connect(self.log_edit.append_logs)
         self.timer_signal.connect(self.handle_timer)
-        self._warned_success_without_end = False
-        self._warned_no_end = False
+        self.scan_batch_signal.connect(self._on_scan_batch)
+        self.scan_done_signal.connect(self._on_scan_done)
+        self.rank_done_signal.connect(self._on_rank_done)
+        self.python_found_signal.connect(self._on_python_found)
+        self.progress_signal.connect(self._on_progress)
+        self.exclude_advice_signal.connect(self._on_exclude_advice)
+        self.env_checked_signal.connect(self._on_env_checked)
+        self.install_done_signal.connect(self._on_install_done)
+        self.build_done_signal.connect(self._on_build_done)
+        self._python_candidates = {}  # 解释器路径 -> 描述，按发现顺序
+        self._python_dialog = None  # 打开中的解释器选择框，新发现的解释器实时加入
+        self.refresh_profiles()
+        self.start_python_discovery()
 
     def handle_timer(self, ms, callback):
         QTimer.singleShot(ms, callback)
@@ -41,7 +79,7 @@ class MainWindow(QMainWindow):
         central = QWidget()
         main_layout = QVBoxLayout()
         # 初始化日志控件
-        self.log_edit = LogTextEdit()
+        self.log_edit = LogView()
         # 必须先初始化所有参数控件
         self.proj_path_edit = QLineEdit()
         self.proj_path_btn = QPushButton("选择目录")
@@ -58,12 +96,45 @@ class MainWindow(QMainWindow):
         self.cb_noconsole = QCheckBox("隐藏终端窗口")
         self.cb_onefile = QCheckBox("单文件模式")
         self.cb_debug = QCheckBox("调试模式")
+        self.cb_dep_cache = QCheckBox("第三方依赖缓存")
+        self.cb_dep_cache.setChecked(True)
+        self.cb_dep_cache.setToolTip("项目用到的第三方包都分析过时直接使用缓存的分析结果，依赖分析只需处理项目自身代码")
+        # 多台构建机共享的远程构建缓存：共享目录或 HTTP 缓存服务地址
+        self.remote_cache_edit = QLineEdit()
+        self.remote_cache_edit.setPlaceholderText("远程构建缓存：共享目录或 http(s):// 地址（留空不使用）")
+        self.cb_remote_push = QCheckBox("上传产物")
+        self.cb_remote_push.setChecked(True)
+        self.cb_remote_push.setToolTip("构建成功后把产物上传到远程构建缓存，其他构建机相同输入时可直接下载")
         self.custom_args_edit = QLineEdit()
         self.custom_args_edit.setPlaceholderText("其他PyInstaller参数")
+        # 打包成功后启动产物测量启动耗时，次数为 0 时不测
+        self.startup_runs_spin = QSpinBox()
+        self.startup_runs_spin.setRange(0, 20)
+        self.startup_runs_spin.setPrefix("启动测试 ")
+        self.startup_runs_spin.setSuffix(" 次")
+        self.startup_runs_spin.setToolTip("打包成功后运行产物的次数，第一次为冷启动，其余为热启动；0 表示不测试")
+        self.startup_timeout_spin = QSpinBox()
+        self.startup_timeout_spin.setRange(1, 600)
+        self.startup_timeout_spin.setValue(30)
+        self.startup_timeout_spin.setPrefix("超时 ")
+        self.startup_timeout_spin.setSuffix(" 秒")
+        # 整个打包任务的超时，超时后结束 PyInstaller 进程树
+        self.build_timeout_spin = QSpinBox()
+        self.build_timeout_spin.setRange(0, 24 * 60)
+        self.build_timeout_spin.setPrefix("打包超时 ")
+        self.build_timeout_spin.setSuffix(" 分钟")
+        self.build_timeout_spin.setSpecialValueText("不限打包时长")
+        self.build_timeout_spin.setToolTip("打包超过该时长仍未结束时自动终止；0 表示不限")
+        # 构建变体：勾选多个时只做一次依赖分析，分别生成各变体的产物
+        self.variant_checks = {key: QCheckBox(VARIANT_LABELS[key]) for key in VARIANTS}
+        for key, check in self.variant_checks.items():
+            check.setToolTip(f"产物名后缀: {VARIANTS[key]['suffix'] or '无'}")
         self.out_path_edit = QLineEdit()
         self.out_path_btn = QPushButton("选择目录")
         # 必须先初始化所有操作按钮
         self.clear_log_btn = QPushButton("清空日志")
+        self.report_btn = QPushButton("构建报告")
+        self.exclude_btn = QPushButton("排除模块")
         self.open_output_btn = QPushButton("打开输出目录")
         self.cancel_btn = QPushButton("取消打包")
         self.start_btn = QPushButton("开始打包")
@@ -71,6 +142,13 @@ class MainWindow(QMainWindow):
         self.load_cfg_btn = QPushButton("加载配置")
         self.export_cfg_btn = QPushButton("导出配置")
         self.import_cfg_btn = QPushButton("导入配置")
+        # 命名配置方案：选择即切换，配置整体保存在内存中的配置存储里
+        self.profile_combo = QComboBox()
+        self.profile_combo.setMinimumWidth(160)
+        self.profile_combo.setToolTip("选择已保存的配置方案")
+        self.save_profile_btn = QPushButton("保存方案")
+        self.delete_profile_btn = QPushButton("删除方案")
+        self.batch_btn = QPushButton("批量打包")
         self.select_python_btn = QPushButton("选择Python解释器")
         self.install_pyinstaller_btn = QPushButton("一键安装PyInstaller")
         self.select_pyinstaller_btn = QPushButton("选择pyinstaller.exe")
@@ -79,9 +157,12 @@ class MainWindow(QMainWindow):
         log_vbox = QVBoxLayout()
         log_hbox = QHBoxLayout()
         log_hbox.addWidget(self.log_edit.search_bar)
+        log_hbox.addWidget(self.log_edit.regex_cb)
+        log_hbox.addWidget(self.log_edit.level_combo)
         log_hbox.addWidget(self.log_edit.search_btn)
         log_hbox.addWidget(self.log_edit.prev_btn)
         log_hbox.addWidget(self.log_edit.next_btn)
+        log_hbox.addWidget(self.log_edit.match_label)
         log_hbox.addWidget(self.log_edit.export_btn)
         log_vbox.addLayout(log_hbox)
         log_vbox.addWidget(self.log_edit)
@@ -123,8 +204,22 @@ class MainWindow(QMainWindow):
         opt_layout.addWidget(self.cb_noconsole)
         opt_layout.addWidget(self.cb_onefile)
         opt_layout.addWidget(self.cb_debug)
+        opt_layout.addWidget(self.cb_dep_cache)
         opt_layout.addWidget(self.custom_args_edit)
+        opt_layout.addWidget(self.startup_runs_spin)
+        opt_layout.addWidget(self.startup_timeout_spin)
+        opt_layout.addWidget(self.build_timeout_spin)
         param_layout.addLayout(opt_layout)
+        variant_layout = QHBoxLayout()
+        variant_layout.addWidget(QLabel("构建变体（可多选，不选按上面的选项构建）:"))
+        for check in self.variant_checks.values():
+            variant_layout.addWidget(check)
+        variant_layout.addStretch()
+        param_layout.addLayout(variant_layout)
+        remote_layout = QHBoxLayout()
+        remote_layout.addWidget(self.remote_cache_edit)
+        remote_layout.addWidget(self.cb_remote_push)
+        param_layout.addLayout(remote_layout)
         # 输出目录
         out_layout = QHBoxLayout()
         out_layout.addWidget(self.out_path_edit)
@@ -132,19 +227,37 @@ class MainWindow(QMainWindow):
         param_layout.addLayout(out_layout)
         param_group.setLayout(param_layout)
         main_layout.addWidget(param_group)
+        # 打包进度
+        progress_layout = QHBoxLayout()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.progress_label = QLabel("")
+        progress_layout.addWidget(self.progress_bar)
+        progress_layout.addWidget(self.progress_label)
+        main_layout.addLayout(progress_layout)
         # 操作按钮区
         btn_hbox1 = QHBoxLayout()
         btn_hbox1.addWidget(self.start_btn)
         btn_hbox1.addWidget(self.cancel_btn)
         btn_hbox1.addWidget(self.open_output_btn)
         btn_hbox1.addWidget(self.clear_log_btn)
+        btn_hbox1.addWidget(self.report_btn)
+        btn_hbox1.addWidget(self.exclude_btn)
         main_layout.addLayout(btn_hbox1)
         btn_hbox2 = QHBoxLayout()
         btn_hbox2.addWidget(self.save_cfg_btn)
         btn_hbox2.addWidget(self.load_cfg_btn)
         btn_hbox2.addWidget(self.export_cfg_btn)
         btn_hbox2.addWidget(self.import_cfg_btn)
+        btn_hbox2.addWidget(self.batch_btn)
         main_layout.addLayout(btn_hbox2)
+        profile_hbox = QHBoxLayout()
+        profile_hbox.addWidget(QLabel("配置方案:"))
+        profile_hbox.addWidget(self.profile_combo, 1)
+        profile_hbox.addWidget(self.save_profile_btn)
+        profile_hbox.addWidget(self.delete_profile_btn)
+        main_layout.addLayout(profile_hbox)
         btn_hbox3 = QHBoxLayout()
         btn_hbox3.addWidget(self.select_python_btn)
         btn_hbox3.addWidget(self.install_pyinstaller_btn)
@@ -163,11 +276,17 @@ class MainWindow(QMainWindow):
         self.start_btn.clicked.connect(self.start_packaging)
         self.clear_log_btn.clicked.connect(self.log_edit.clear_log)
         self.open_output_btn.clicked.connect(self.open_output_dir)
+        self.report_btn.clicked.connect(self.show_build_report)
+        self.exclude_btn.clicked.connect(self.advise_excludes)
         self.cancel_btn.clicked.connect(self.cancel_packaging)
         self.save_cfg_btn.clicked.connect(self.save_config_action)
         self.load_cfg_btn.clicked.connect(self.load_config_action)
         self.export_cfg_btn.clicked.connect(self.export_config_action)
         self.import_cfg_btn.clicked.connect(self.import_config_action)
+        self.profile_combo.activated[str].connect(self.switch_profile)
+        self.save_profile_btn.clicked.connect(self.save_profile_action)
+        self.delete_profile_btn.clicked.connect(self.delete_profile_action)
+        self.batch_btn.clicked.connect(self.batch_packaging)
         self.select_python_btn.clicked.connect(self.select_python)
         self.install_pyinstaller_btn.clicked.connect(self.install_pyinstaller)
         self.select_pyinstaller_btn.clicked.connect(self.select_pyinstaller_exe)
@@ -177,19 +296,64 @@ class MainWindow(QMainWindow):
         if path:
             self.proj_path_edit.setText(path)
             self.log_signal.emit(f"已选择项目目录: {path}")
-            # 自动扫描 .py 文件
-            self.entry_combo.clear()
-            py_files = []
-            for root, dirs, files in os.walk(path):
-                for file in files:
-                    if file.endswith('.py'):
-                        rel_path = os.path.relpath(os.path.join(root, file), path)
-                        py_files.append(rel_path)
-            self.entry_combo.addItems(py_files)
-            if py_files:
-                self.log_signal.emit(f"已发现主程序入口文件: {py_files}")
-            else:
-                self.log_signal.emit("未发现任何 .py 文件，请检查项目目录！")
+            # 后台扫描 .py 文件
+            self.start_scan(path)
+            # 项目内的 venv/.venv 也加入解释器候选
+            self.start_python_discovery(path)
+
+    def start_scan(self, path, entry=''):
+        """在后台线程扫描入口文件，结果分批填入下拉框；entry 为需要预先选中的入口"""
+        self._scan_gen += 1
+        gen = self._scan_gen
+        self.entry_combo.clear()
+        self._scan_seen = set()
+        if entry:
+            # 先放入已保存的入口，扫描未完成时也能直接打包或保存配置
+            self.entry_combo.addItem(entry)
+            self._scan_seen.add(entry)
+        def target():
+            files = self._scanner.scan(
+                path,
+                callback=lambda batch: self.scan_batch_signal.emit(gen, batch),
+                cancelled=lambda: gen != self._scan_gen
+            )
+            self.scan_done_signal.emit(gen, len(files))
+            if files and gen == self._scan_gen:
+                try:
+                    self.rank_done_signal.emit(gen, self._ranker.rank(path, files))
+                except Exception as e:
+                    self.log_signal.emit(f"入口文件排序失败: {e}")
+        self._scan_entry = entry
+        threading.Thread(target=target, daemon=True).start()
+
+    def _on_scan_batch(self, gen, files):
+        if gen != self._scan_gen:
+            return  # 过期的扫描结果
+        files = [f for f in files if f not in self._scan_seen]
+        self._scan_seen.update(files)
+        self.entry_combo.addItems(files)
+
+    def _on_rank_done(self, gen, ranked):
+        if gen != self._scan_gen:
+            return
+        # 已保存的入口优先保留，否则选中排名第一的候选
+        current = self._scan_entry or ranked[0]
+        self.entry_combo.clear()
+        self.entry_combo.addItems(ranked)
+        idx = self.entry_combo.findText(current)
+        if idx < 0:
+            self.entry_combo.insertItem(0, current)
+            idx = 0
+        self.entry_combo.setCurrentIndex(idx)
+        self.log_signal.emit(f"推荐主程序入口: {ranked[0]}")
+
+    def _on_scan_done(self, gen, count):
+        if gen != self._scan_gen:
+            return
+        if count:
+            self.log_signal.emit(f"已发现 {count} 个 .py 文件，可在主程序入口下拉框中选择")
+        else:
+            self.log_signal.emit("未发现任何 .py 文件，请检查项目目录！")
 
     def choose_icon_file(self):
         file, _ = QFileDialog.getOpenFileName(self, "选择图标文件", filter="图标文件 (*.ico *.png *.jpg *.jpeg)")
@@ -248,12 +412,22 @@ class MainWindow(QMainWindow):
         self.cb_noconsole.setEnabled(enabled)
         self.cb_onefile.setEnabled(enabled)
         self.cb_debug.setEnabled(enabled)
+        self.cb_dep_cache.setEnabled(enabled)
+        self.remote_cache_edit.setEnabled(enabled)
+        self.cb_remote_push.setEnabled(enabled)
         self.custom_args_edit.setEnabled(enabled)
+        self.startup_runs_spin.setEnabled(enabled)
+        self.startup_timeout_spin.setEnabled(enabled)
+        self.build_timeout_spin.setEnabled(enabled)
+        for check in self.variant_checks.values():
+            check.setEnabled(enabled)
         self.out_path_edit.setEnabled(enabled)
         self.out_path_btn.setEnabled(enabled)
         self.start_btn.setEnabled(enabled)
         self.clear_log_btn.setEnabled(enabled)
         self.open_output_btn.setEnabled(enabled)
+        self.batch_btn.setEnabled(enabled)
+        self.exclude_btn.setEnabled(enabled)
         # 取消按钮始终可用
         self.cancel_btn.setEnabled(not enabled)
         # 环境相关按钮也随enabled变化
@@ -333,16 +507,13 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "提示", "打包进行中，无法关闭窗口！")
             event.ignore()
         else:
+            if self._installer:
+                self._installer.cancel()  # 不留下在后台运行的 pip
+            get_config_store().flush()
+            self.log_edit.buffer.close()
             event.accept()
 
     def start_packaging(self):
-        # 确保状态重置
-        self._in_packaging = False
-        self._completion_handled = False  # 重置完成状态标志
-        self._success_shown = False  # 重置成功对话框显示标志
-        self._fail_shown = False  # 重置失败对话框显示标志
-        # 设置打包状态
-        self._in_packaging = True
         # 参数校验
         proj_path = self.proj_path_edit.text().strip()
         entry = self.entry_combo.currentText().strip()
@@ -385,27 +556,15 @@ class MainWindow(QMainWindow):
             self.log_signal.emit(msg)
             return
         # 数据文件存在性校验
-        datas = []
         for row in range(self.data_table.rowCount()):
             src = self.data_table.item(row, 0).text()
-            dst = self.data_table.item(row, 1).text()
             if not os.path.exists(src):
                 msg = f"数据文件不存在: {src}"
                 QMessageBox.warning(self, "参数错误", msg)
                 self.log_signal.emit(msg)
                 return
-            datas.append(f"{src};{dst}")
         # 收集参数
-        opts = []
-        if self.cb_noconsole.isChecked():
-            opts.append('--noconsole')
-        if self.cb_onefile.isChecked():
-            opts.append('--onefile')
-        if self.cb_debug.isChecked():
-            opts.append('--debug')
-        custom_args = self.custom_args_edit.text().strip()
-        if custom_args:
-            opts += custom_args.split()
+        datas, opts = config_to_args(self.get_config())
         # 日志和进度回调
         self.log_signal.emit("\n================ 打包任务开始 ================")
         self.log_signal.emit(f"项目目录: {proj_path}")
@@ -417,71 +576,11 @@ class MainWindow(QMainWindow):
             self.log_signal.emit(f"数据文件: {datas}")
         self.log_signal.emit("============================================\n")
         self.show_mask()  # 新增：显示loading动画
-        def log_cb(msg):
-            self.log_signal.emit(msg)
-        def progress_cb(msg):
-            # 进度回调已移除，仅保留日志输出
-            pass
+        self.progress_bar.setValue(0)
+        self.progress_label.setText("准备中")
+        self._build_warnings = 0
+        self._in_packaging = True
         self.set_ui_enabled(False)
-        def final_log_cb(msg):
-            log_cb(msg)
-            from PyQt5.QtCore import QMetaObject
-            if not hasattr(self, '_completion_handled'):
-                self._completion_handled = False
-            if self._completion_handled:
-                return
-            def restore_ui():
-                self._in_packaging = False
-                self._completion_handled = True
-                self.set_ui_enabled(True)
-                self.hide_mask()
-            def show_success():
-                from PyQt5.QtWidgets import QMessageBox
-                import os
-                reply = QMessageBox.information(self, "打包完成", "打包成功！是否打开输出目录？", QMessageBox.Yes | QMessageBox.No)
-                if reply == QMessageBox.Yes:
-                    os.startfile(self.out_path_edit.text().strip())
-                self.log_signal.emit("\n================ 打包任务完成 ================\n")
-            def show_fail():
-                from PyQt5.QtWidgets import QMessageBox
-                QMessageBox.warning(self, "打包失败", "打包失败，请检查日志！")
-                self.log_signal.emit("\n================ 打包任务失败 ================\n")
-                restore_ui()
-            def invoke_restore_ui():
-                QMetaObject.invokeMethod(self, "restore_ui_slot", Qt.QueuedConnection)
-            def invoke_show_success():
-                QMetaObject.invokeMethod(self, "show_success_slot", Qt.QueuedConnection)
-            def invoke_show_fail():
-                QMetaObject.invokeMethod(self, "show_fail_slot", Qt.QueuedConnection)
-            # 只在进程真正结束时恢复UI
-            if msg.startswith('PROCESS_ENDED_'):
-                return_code = msg.split('_')[-1]
-                self._completion_handled = True
-                if return_code == '0':
-                    self.restore_ui_slot()
-                    invoke_show_success()
-                else:
-                    self.restore_ui_slot()
-                    invoke_show_fail()
-                return
-            # 其它分支只做日志提示，不恢复UI
-            elif ('打包成功' in msg or 'completed successfully' in msg.lower() or
-                'build complete' in msg.lower() or 'build completed' in msg.lower() or
-                'done' in msg.lower() or 'finished' in msg.lower() or
-                '================ 打包任务完成 ================' in msg):
-                if not self._warned_success_without_end:
-                    self.log_signal.emit("⚠️ 警告：检测到成功关键字，但未收到进程结束信号，UI未自动恢复！")
-                    self._warned_success_without_end = True
-            elif ('打包失败' in msg or '================ 打包任务失败 ================' in msg):
-                self.log_signal.emit("警告：检测到失败关键字，但未收到进程结束信号，UI未自动恢复！")
-            elif '打包进程已被用户取消' in msg:
-                self.log_signal.emit("警告：检测到用户取消，但未收到进程结束信号，UI未自动恢复！")
-            else:
-                if not hasattr(self, '_warned_no_end'):
-                    self._warned_no_end = False
-                if not self._warned_no_end:
-                    self.log_signal.emit("⚠️ 警告：未检测到打包完成信号，UI未自动恢复，请检查日志！")
-                    self._warned_no_end = True
         self.packager = Packager(
             py_path=self.python_path,
             proj_path=proj_path,
@@ -490,22 +589,94 @@ class MainWindow(QMainWindow):
             datas=datas,
             opts=opts,
             out_dir=out_dir,
-            log_callback=final_log_cb,
-            progress_callback=progress_cb,
+            log_callback=self.log_signal.emit,
+            progress_callback=self.progress_signal.emit,
+            log_batch_callback=self.log_batch_signal.emit,
+            startup_runs=self.startup_runs_spin.value(),
+            startup_timeout=self.startup_timeout_spin.value(),
+            timeout=self.build_timeout_spin.value() * 60,
+            variants=[key for key, check in self.variant_checks.items() if check.isChecked()],
+            dep_cache=self.cb_dep_cache.isChecked(),
+            remote_cache=self.remote_cache_edit.text().strip() or None,
+            remote_push=self.cb_remote_push.isChecked(),
             use_pyinstaller_exe=bool(self._pyinstaller_path),
             pyinstaller_path=self._pyinstaller_path if self._pyinstaller_path else None
         )
-        # 安全/快速超时只做日志提示
-        def safety_timeout():
-            if hasattr(self, '_in_packaging') and self._in_packaging:
-                self.log_signal.emit("安全超时：打包未完成，UI未自动恢复，请检查日志！")
-        QTimer.singleShot(30000, safety_timeout)
-        def quick_timeout():
-            if hasattr(self, '_in_packaging') and self._in_packaging:
-                self.log_signal.emit("快速超时：打包未完成，UI未自动恢复，请检查日志！")
-        QTimer.singleShot(5000, quick_timeout)
+        # 任务结束（含取消、超时）时在工作线程回调，经信号转到主线程处理
+        self.packager.add_done_callback(self.build_done_signal.emit)
         self.packager.run()
 
+    def _on_build_done(self, packager):
+        if packager is not self.packager:
+            return
+        self.restore_ui_slot()
+        if packager.state == STATE_SUCCEEDED:
+            self.log_signal.emit("\n================ 打包任务完成 ================\n")
+            reply = QMessageBox.information(self, "打包完成", "打包成功！是否打开输出目录？", QMessageBox.Yes | QMessageBox.No)
+            if reply == QMessageBox.Yes:
+                self.open_output_dir()
+        elif packager.state == STATE_CANCELLED:
+            self.progress_label.setText("已取消")
+        elif packager.state == STATE_TIMED_OUT:
+            QMessageBox.warning(self, "打包超时", f"打包超过 {packager.timeout // 60} 分钟未完成，已自动终止！")
+        else:
+            QMessageBox.warning(self, "打包失败", "打包失败，请检查日志！")
+
+    def _on_progress(self, event):
+        """根据日志解析事件更新进度条和阶段/剩余时间提示"""
+        if event.kind in (EVENT_WARNING, EVENT_ERROR):
+            self._build_warnings += 1
+        self.progress_bar.setValue(int(event.progress * 100))
+        if event.kind == EVENT_DONE:
+            text = f"{event.message}，耗时 {event.data['elapsed']:.1f}s"
+            if event.data.get('warnings'):
+                text += f"，警告 {event.data['warnings']} 条"
+        else:
+            text = PHASE_LABELS.get(event.phase, event.phase)
+            if event.eta is not None:
+                text += f"，预计剩余 {event.eta:.0f}s"
+            if self._build_warnings:
+                text += f"，警告/错误 {self._build_warnings} 条"
+        self.progress_label.setText(text)
+
+    def batch_packaging(self):
+        files, _ = QFileDialog.getOpenFileNames(self, "选择要批量打包的配置文件", filter="JSON文件 (*.json)")
+        if not files:
+            return
+        python_path = getattr(self, 'python_path', None) or load_python_path()
+        if not python_path:
+            QMessageBox.warning(self, "提示", "请先选择Python解释器！")
+            return
+        configs = []
+        for file in files:
+            try:
+                with open(file, 'r', encoding='utf-8') as f:
+                    configs.append(json.load(f))
+            except Exception as e:
+                QMessageBox.warning(self, "导入失败", f"配置文件读取失败:\n{file}\n{e}")
+                return
+        workers, ok = QInputDialog.getInt(self, "批量打包", "并行任务数:", min(len(configs), os.cpu_count() or 1), 1, 64)
+        if not ok:
+            return
+        self.log_signal.emit(f"\n================ 批量打包开始：{len(configs)} 个任务，并行 {workers} ================")
+        self._in_packaging = True
+        self.set_ui_enabled(False)
+        self._batch_cancel = threading.Event()
+        cancel_event = self._batch_cancel
+        def status_cb(job):
+            msg = f"[批量] {job.name}: {job.status}"
+            if job.returncode is not None:
+                msg += f"（返回码 {job.returncode}，耗时 {job.elapsed:.1f}s，日志: {job.log_path}）"
+            self.log_signal.emit(msg)
+        def target():
+            from core.batch import run_batch
+            jobs = run_batch(configs, python_path, pyinstaller_path=self._pyinstaller_path or None,
+                             workers=workers, status_callback=status_cb, cancel_event=cancel_event)
+            ok_count = sum(1 for job in jobs if job.returncode == 0)
+            self.log_signal.emit(f"================ 批量打包结束：成功 {ok_count}/{len(jobs)} ================\n")
+            QMetaObject.invokeMethod(self, "_on_batch_done", Qt.QueuedConnection)
+        threading.Thread(target=target, daemon=True).start()
+
     def open_output_dir(self):
         out_dir = self.out_path_edit.text().strip()
         if out_dir and os.path.isdir(out_dir):
@@ -513,19 +684,70 @@ class MainWindow(QMainWindow):
         else:
             QMessageBox.warning(self, "提示", "输出目录无效！")
 
+    def show_build_report(self):
+        cfg = self.get_config()
+        if not cfg['entry'] or not cfg['out_dir']:
+            QMessageBox.warning(self, "提示", "请先选择主程序入口和输出目录！")
+            return
+        path = Packager.from_config(cfg, getattr(self, 'python_path', ''), self.log_signal.emit, use_cache=False).report_path()
+        report = load_report(path)
+        if not report:
+            QMessageBox.information(self, "提示", f"尚无构建报告，打包成功后会生成:\n{path}")
+            return
+        BuildReportDialog(report, path, self).exec_()
+
+    def _set_excludes(self, excludes):
+        self._excludes = list(excludes)
+        self.exclude_btn.setText(f"排除模块 ({len(self._excludes)})" if self._excludes else "排除模块")
+        self.exclude_btn.setToolTip('\n'.join(self._excludes))
+
+    def advise_excludes(self):
+        """读取上次打包生成的模块依赖图，在后台线程计算排除建议"""
+        cfg = self.get_config()
+        if not cfg['proj_path'] or not cfg['entry']:
+            QMessageBox.warning(self, "提示", "请先选择项目目录和主程序入口！")
+            return
+        packager = Packager.from_config(cfg, getattr(self, 'python_path', ''), self.log_signal.emit, use_cache=False)
+        xref = find_xref(packager.work_dir, packager.app_name())
+        if not xref:
+            QMessageBox.information(self, "提示", "尚无模块依赖图，请先完成一次打包再查看排除建议。")
+            return
+        self.exclude_btn.setEnabled(False)
+        self.log_signal.emit(f"正在分析模块依赖图: {xref}")
+        def target():
+            try:
+                self.exclude_advice_signal.emit(advise(parse_xref(xref), cfg['proj_path'], excludes=cfg['excludes']))
+            except Exception as e:
+                self.exclude_advice_signal.emit(f"分析模块依赖图失败: {e}")
+        threading.Thread(target=target, daemon=True).start()
+
+    def _on_exclude_advice(self, advice):
+        self.exclude_btn.setEnabled(True)
+        if isinstance(advice, str):
+            self.log_signal.emit(advice)
+            QMessageBox.warning(self, "失败", advice)
+            return
+        dialog = ExcludeAdvisorDialog(advice, self._excludes, self)
+        if dialog.exec_() == dialog.Accepted:
+            self._set_excludes(dialog.selected_modules())
+            self.log_signal.emit(f"排除模块: {', '.join(self._excludes) or '无'}（下次打包生效）")
+
     def cancel_packaging(self):
-        try:
-            if hasattr(self, 'packager') and self.packager and hasattr(self.packager, 'proc') and self.packager.proc:
-                self.packager.proc.terminate()
-                self.log_signal.emit("打包进程已被用户取消。")
-            else:
-                self.log_signal.emit("当前无正在进行的打包任务。")
-        except Exception as e:
-            self.log_signal.emit(f"取消失败: {e}")
-        finally:
-            self._in_packaging = False
-            self.set_ui_enabled(True)
-            self.hide_mask()
+        if self._installer:
+            self._installer.cancel()
+            self.log_signal.emit("正在取消PyInstaller安装...")
+            return
+        if self._batch_cancel:
+            self._batch_cancel.set()
+            self.log_signal.emit("正在取消批量打包...")
+            return
+        packager = getattr(self, 'packager', None)
+        if packager and packager.cancel():
+            # 进程树结束后由 _on_build_done 恢复界面
+            self.log_signal.emit("正在取消打包...")
+        else:
+            self.log_signal.emit("当前无正在进行的打包任务。")
+            self.restore_ui_slot()
 
     def get_config(self):
         # 收集当前界面所有参数
@@ -537,7 +759,16 @@ class MainWindow(QMainWindow):
             'cb_noconsole': self.cb_noconsole.isChecked(),
             'cb_onefile': self.cb_onefile.isChecked(),
             'cb_debug': self.cb_debug.isChecked(),
+            'dep_cache': self.cb_dep_cache.isChecked(),
+            'remote_cache': self.remote_cache_edit.text().strip(),
+            'remote_push': self.cb_remote_push.isChecked(),
             'custom_args': self.custom_args_edit.text().strip(),
+            'startup_runs': self.startup_runs_spin.value(),
+            'startup_timeout': self.startup_timeout_spin.value(),
+            'build_timeout': self.build_timeout_spin.value() * 60,
+            'variants': [key for key, check in self.variant_checks.items() if check.isChecked()],
+            'scan_ignore_dirs': sorted(self._scanner.ignore_dirs),
+            'excludes': list(self._excludes),
             'data_files': [
                 {
                     'src': self.data_table.item(row, 0).text(),
@@ -554,22 +785,22 @@ class MainWindow(QMainWindow):
         self.cb_noconsole.setChecked(cfg.get('cb_noconsole', False))
         self.cb_onefile.setChecked(cfg.get('cb_onefile', False))
         self.cb_debug.setChecked(cfg.get('cb_debug', False))
+        self.cb_dep_cache.setChecked(cfg.get('dep_cache', True))
+        self.remote_cache_edit.setText(cfg.get('remote_cache', ''))
+        self.cb_remote_push.setChecked(cfg.get('remote_push', True))
         self.custom_args_edit.setText(cfg.get('custom_args', ''))
+        self.startup_runs_spin.setValue(cfg.get('startup_runs', 0))
+        self.startup_timeout_spin.setValue(cfg.get('startup_timeout', 30))
+        self.build_timeout_spin.setValue((cfg.get('build_timeout', 0) + 59) // 60)
+        variants = cfg.get('variants', [])
+        for key, check in self.variant_checks.items():
+            check.setChecked(key in variants)
+        self._set_excludes(cfg.get('excludes', []))
         # 入口文件下拉框刷新
+        self._scanner.set_ignore_dirs(cfg.get('scan_ignore_dirs', DEFAULT_IGNORE_DIRS))
         proj_path = cfg.get('proj_path', '')
         if proj_path and os.path.isdir(proj_path):
-            self.entry_combo.clear()
-            py_files = []
-            for root, dirs, files in os.walk(proj_path):
-                for file in files:
-                    if file.endswith('.py'):
-                        rel_path = os.path.relpath(os.path.join(root, file), proj_path)
-                        py_files.append(rel_path)
-            self.entry_combo.addItems(py_files)
-            entry = cfg.get('entry', '')
-            idx = self.entry_combo.findText(entry)
-            if idx >= 0:
-                self.entry_combo.setCurrentIndex(idx)
+            self.start_scan(proj_path, cfg.get('entry', ''))
         # 数据文件表格
         self.data_table.setRowCount(0)
         for item in cfg.get('data_files', []):
@@ -586,12 +817,52 @@ class MainWindow(QMainWindow):
         self.log_signal.emit("已保存当前配置到历史记录。")
 
     def load_config_action(self):
-        cfg = load_config()
-        if cfg:
-            self.set_config(cfg)
+        history = get_config_store().history()
+        if not history:
+            self.log_signal.emit("未找到历史记录配置。")
+            return
+        labels = [f"{item['time']}  {item['config'].get('entry', '')}  ({item['config'].get('proj_path', '')})"
+                  for item in history]
+        label, ok = QInputDialog.getItem(self, "加载配置", "历史记录（最新在前）:", labels, 0, False)
+        if ok:
+            self.set_config(history[labels.index(label)]['config'])
             self.log_signal.emit("已加载历史记录配置。")
+
+    def refresh_profiles(self, current=None):
+        self.profile_combo.clear()
+        self.profile_combo.addItems(get_config_store().profile_names())
+        if current:
+            self.profile_combo.setCurrentText(current)
         else:
-            self.log_signal.emit("未找到历史记录配置。")
+            self.profile_combo.setCurrentIndex(-1)
+
+    def switch_profile(self, name):
+        cfg = get_config_store().get_profile(name)
+        if cfg is not None:
+            self.set_config(cfg)
+            self.log_signal.emit(f"已切换到配置方案: {name}")
+
+    def save_profile_action(self):
+        name, ok = QInputDialog.getText(self, "保存方案", "方案名称:", text=self.profile_combo.currentText())
+        name = name.strip()
+        if not ok or not name:
+            return
+        store = get_config_store()
+        if store.get_profile(name) is not None and QMessageBox.question(
+                self, "保存方案", f"方案\"{name}\"已存在，是否覆盖？") != QMessageBox.Yes:
+            return
+        store.save_profile(name, self.get_config())
+        self.refresh_profiles(name)
+        self.log_signal.emit(f"已保存配置方案: {name}")
+
+    def delete_profile_action(self):
+        name = self.profile_combo.currentText()
+        if not name:
+            return
+        if QMessageBox.question(self, "删除方案", f"确定删除配置方案\"{name}\"？") == QMessageBox.Yes:
+            get_config_store().delete_profile(name)
+            self.refresh_profiles()
+            self.log_signal.emit(f"已删除配置方案: {name}")
 
     def export_config_action(self):
         cfg = self.get_config()
@@ -610,6 +881,7 @@ class MainWindow(QMainWindow):
             self.log_signal.emit(f"已导入配置: {file}")
 
     def check_env(self):
+        """在后台线程检测 PyInstaller 环境，结果由 _on_env_checked 在主线程处理，不阻塞界面"""
         # 优先使用已保存的 python_path
         python_path = getattr(self, 'python_path', None) or load_python_path()
         pyinstaller_path = getattr(self, '_pyinstaller_path', None) or load_pyinstaller_path()
@@ -622,24 +894,37 @@ class MainWindow(QMainWindow):
         self.python_path = python_path
         save_python_path(python_path)
         self._pyinstaller_path = pyinstaller_path
-        # 检查 pyinstaller 路径
-        if pyinstaller_path and os.path.isfile(pyinstaller_path):
-            try:
-                result = subprocess.run([pyinstaller_path, '--version'], capture_output=True, text=True)
-                ok = result.returncode == 0
-                self.log_signal.emit(f"检测命令: {pyinstaller_path} --version")
-                self.log_signal.emit(f"检测输出: {result.stdout.strip()} {result.stderr.strip()}")
-                if ok:
-                    self.set_ui_enabled(True)
-                    self.start_btn.setEnabled(True)
-                    self.cancel_btn.setEnabled(True)
-                    self.log_signal.emit(f"PyInstaller 检测通过: {pyinstaller_path}")
-                    return
-            except Exception as e:
-                self.log_signal.emit(f"检测异常: {e}")
-        # 否则用 check_pyinstaller 检查
-        py_ok = check_pyinstaller(python_path)
-        if not py_ok:
+        self.progress_label.setText("正在检测环境...")
+        def target():
+            result = {'python_path': python_path, 'pyinstaller_path': pyinstaller_path, 'exe_info': None,
+                      'exe_error': None, 'py_ok': False}
+            # 检查 pyinstaller 路径
+            if pyinstaller_path and os.path.isfile(pyinstaller_path):
+                try:
+                    result['exe_info'] = probe_pyinstaller_exe(pyinstaller_path)
+                except Exception as e:
+                    result['exe_error'] = str(e)
+            # 否则用 check_pyinstaller 检查
+            if not (result['exe_info'] and result['exe_info']['ok']):
+                result['py_ok'] = check_pyinstaller(python_path)
+            self.env_checked_signal.emit(result)
+        threading.Thread(target=target, daemon=True).start()
+
+    def _on_env_checked(self, result):
+        self.progress_label.setText("")
+        pyinstaller_path = result['pyinstaller_path']
+        info = result['exe_info']
+        if info:
+            self.log_signal.emit(f"检测命令: {pyinstaller_path} --version")
+            self.log_signal.emit(f"检测输出: {info['output']}")
+        if result['exe_error']:
+            self.log_signal.emit(f"检测异常: {result['exe_error']}")
+        if info and info['ok']:
+            self.set_ui_enabled(True)
+            self.start_btn.setEnabled(True)
+            self.cancel_btn.setEnabled(True)
+            self.log_signal.emit(f"PyInstaller 检测通过: {pyinstaller_path}")
+        elif not result['py_ok']:
             msg = '未检测到PyInstaller，点击"一键安装PyInstaller"进行安装。'
             QMessageBox.critical(self, '环境检测失败', msg)
             self.start_btn.setEnabled(False)
@@ -648,20 +933,41 @@ class MainWindow(QMainWindow):
             self.set_ui_enabled(True)
             self.start_btn.setEnabled(True)
             self.cancel_btn.setEnabled(True)
-            self.log_signal.emit(f"PyInstaller 检测通过: {python_path}")
+            self.log_signal.emit(f"PyInstaller 检测通过: {result['python_path']}")
+
+    def start_python_discovery(self, proj_path=None):
+        """后台并发发现本机解释器，结果逐个加入候选列表"""
+        def on_found(path, info):
+            version = (info.get('python') or '').split()[0]
+            pyinstaller = info.get('pyinstaller')
+            desc = f"Python {version}" + (f", PyInstaller {pyinstaller}" if pyinstaller else ", 未安装PyInstaller")
+            self.python_found_signal.emit(path, desc)
+        threading.Thread(target=lambda: discover_pythons(on_found, proj_path=proj_path), daemon=True).start()
+
+    def _on_python_found(self, path, desc):
+        if path in self._python_candidates:
+            return
+        self._python_candidates[path] = desc
+        if self._python_dialog is not None:
+            self._python_dialog.add_python(path, desc)
 
     def select_python(self):
-        # 弹出可选python列表
-        items = self._python_candidates if hasattr(self, '_python_candidates') else []
-        items = [p for p in items if p]
-        if items:
-            item, ok = QInputDialog.getItem(self, "选择Python解释器", "可用环境:", items, 0, False)
-            if ok and item:
-                self.python_path = item
-                save_python_path(item)
-                self.log_signal.emit(f"已选择Python解释器: {item}")
-                self.check_env()
-                return
+        # 弹出可选python列表，后台发现仍在进行时新结果直接加入列表
+        dialog = PythonSelectDialog(self._python_candidates, self)
+        self._python_dialog = dialog
+        try:
+            ok = dialog.exec_() == dialog.Accepted
+        finally:
+            self._python_dialog = None
+        if not ok:
+            return
+        item = dialog.selected_path()
+        if item:
+            self.python_path = item
+            save_python_path(item)
+            self.log_signal.emit(f"已选择Python解释器: {item}")
+            self.check_env()
+            return
         # 兜底：手动选择
         file, _ = QFileDialog.getOpenFileName(self, "选择Python解释器", filter="可执行文件 (*.exe)")
         if file:
@@ -675,17 +981,32 @@ class MainWindow(QMainWindow):
         if not python_path:
             QMessageBox.warning(self, "提示", "请先选择Python解释器！")
             return
-        self.log_signal.emit("正在安装PyInstaller...")
-        ok = install_pyinstaller(python_path)
-        if ok:
-            self.log_signal.emit("PyInstaller安装成功！")
-            if check_pyinstaller(python_path):
-                QMessageBox.information(self, "成功", "PyInstaller安装并检测成功！")
-            else:
-                QMessageBox.warning(self, "警告", "PyInstaller安装后检测失败，请检查Python环境！")
+        version, source = load_install_options()
+        dialog = InstallPyInstallerDialog(version, source, self)
+        if dialog.exec_() != dialog.Accepted:
+            return
+        version, source = dialog.options()
+        save_install_options(version, source)
+        self.python_path = python_path
+        self.log_signal.emit("正在安装PyInstaller...（可点击\"取消打包\"中止安装）")
+        self.progress_label.setText("正在安装PyInstaller...")
+        self.set_ui_enabled(False)
+        # pip 输出逐行写入日志，安装在后台线程进行，不阻塞界面
+        self._installer = PyInstallerInstaller(python_path, self.log_signal.emit, version=version, source=source,
+                                               done_callback=self.install_done_signal.emit)
+        self._installer.run()
+
+    def _on_install_done(self, returncode):
+        cancelled = self._installer.cancelled
+        self._installer = None
+        self.progress_label.setText("")
+        self.set_ui_enabled(True)
+        if cancelled:
+            return
+        if returncode == 0:
+            # 安装成功后重新检测环境，检测结果由 _on_env_checked 提示
             self.check_env()
         else:
-            self.log_signal.emit(f"PyInstaller安装失败")
             QMessageBox.warning(self, "失败", "PyInstaller安装失败，请检查日志！")
 
     def select_pyinstaller_exe(self):
@@ -696,11 +1017,10 @@ class MainWindow(QMainWindow):
             self.log_signal.emit(f"已手动指定pyinstaller.exe: {file}")
             # 立即检测
             try:
-                result = subprocess.run([file, '--version'], capture_output=True, text=True)
-                ok = result.returncode == 0
+                info = probe_pyinstaller_exe(file)
                 self.log_signal.emit(f"检测命令: {file} --version")
-                self.log_signal.emit(f"检测输出: {result.stdout.strip()} {result.stderr.strip()}")
-                if ok:
+                self.log_signal.emit(f"检测输出: {info['output']}")
+                if info['ok']:
                     self.set_ui_enabled(True)
                     self.start_btn.setEnabled(True)
                     self.cancel_btn.setEnabled(True)
@@ -714,44 +1034,21 @@ class MainWindow(QMainWindow):
     def showEvent(self, event):
         super().showEvent(event)
         if not hasattr(self, '_env_checked'):
-            self.check_env()
+            # 等窗口绘制出来后再开始检测，检测本身在后台线程进行
+            QTimer.singleShot(0, self.check_env)
             self._env_checked = True
     
+    @pyqtSlot()
+    def _on_batch_done(self):
+        self._batch_cancel = None
+        self.restore_ui_slot()
+
     @pyqtSlot()
     def restore_ui_slot(self):
         self._in_packaging = False
-        self._completion_handled = True
         self.set_ui_enabled(True)
         self.hide_mask()
     
-    @pyqtSlot()
-    def show_success_slot(self):
-        """在主线程中显示成功对话框的槽函数"""
-        if hasattr(self, '_success_shown') and self._success_shown:
-            return
-        if not hasattr(self, '_in_packaging') or not self._in_packaging:
-            return
-        self._success_shown = True
-        from PyQt5.QtWidgets import QMessageBox
-        import os
-        reply = QMessageBox.information(self, "打包完成", "打包成功！是否打开输出目录？", QMessageBox.Yes | QMessageBox.No)
-        if reply == QMessageBox.Yes:
-            os.startfile(self.out_path_edit.text().strip())
-        self.log_signal.emit("\n================ 打包任务完成 ================\n")
-    
-    @pyqtSlot()
-    def show_fail_slot(self):
-        """在主线程中显示失败对话框的槽函数"""
-        if hasattr(self, '_fail_shown') and self._fail_shown:
-            return
-        if not hasattr(self, '_in_packaging') or not self._in_packaging:
-            return
-        self._fail_shown = True
-        from PyQt5.QtWidgets import QMessageBox
-        QMessageBox.warning(self, "打包失败", "打包失败，请检查日志！")
-        self.log_signal.emit("\n================ 打包任务失败 ================\n")
-        self.restore_ui_slot()
-    
     def dragEnterEvent(self, event):
         if event.mimeData().hasUrls():
             for url in event.mimeData().urls():
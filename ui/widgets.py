@@ -1,147 +1,238 @@
+import re
 import threading
-from PyQt5.QtWidgets import QTextEdit, QLineEdit, QPushButton, QFileDialog, QHBoxLayout
-from PyQt5.QtCore import Qt, pyqtSignal
-from PyQt5.QtGui import QTextCharFormat, QColor, QFont, QTextCursor
+from PyQt5.QtWidgets import QTableView, QHeaderView, QLineEdit, QPushButton, QFileDialog, QAbstractItemView, QCheckBox, QComboBox, QLabel
+from PyQt5.QtCore import Qt, pyqtSignal, QAbstractListModel, QModelIndex
+from PyQt5.QtGui import QColor, QFont, QBrush
+from core.log_buffer import LogBuffer, LEVEL_ERROR, LEVEL_WARN, LEVEL_SUCCESS, LEVEL_DEBUG, LEVEL_INFO
+from core.log_search import LogSearch
 
-class LogTextEdit(QTextEdit):
+# 级别 -> (颜色, 图标, 是否加粗)
+LEVEL_STYLES = {
+    LEVEL_ERROR: ("#ff4d4f", '❌ ', True),    # 红色
+    LEVEL_WARN: ("#faad14", '⚠️ ', True),     # 橙色
+    LEVEL_SUCCESS: ("#52c41a", '✅ ', True),  # 绿色
+    LEVEL_DEBUG: ("#888888", '🐞 ', False),   # 灰色
+    LEVEL_INFO: ("#1890ff", 'ℹ️ ', False),    # 蓝色
+}
+DEFAULT_STYLE = ("#222", '', False)
+# 搜索栏可选的级别过滤
+SEARCH_LEVELS = [LEVEL_ERROR, LEVEL_WARN, LEVEL_SUCCESS, LEVEL_INFO, LEVEL_DEBUG]
+
+
+class LogListModel(QAbstractListModel):
+    """基于 LogBuffer 的日志模型，视图只会请求可见行的数据"""
+
+    def __init__(self, buffer, parent=None):
+        super().__init__(parent)
+        self.buffer = buffer
+        self.search = None  # 当前生效的 LogSearch，绘制可见行时才判断是否高亮
+        self._count = 0  # rowCount 会被视图按行频繁调用，缓存行数避免每次求 len
+        self._brushes = {level: QBrush(QColor(color)) for level, (color, _, _) in LEVEL_STYLES.items()}
+        self._default_brush = QBrush(QColor(DEFAULT_STYLE[0]))
+        self._highlight_brush = QBrush(QColor("#ffe58f"))
+        self._bold_font = QFont()
+        self._bold_font.setBold(True)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._count
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        record = self.buffer[index.row()]
+        _, icon, bold = LEVEL_STYLES.get(record.level, DEFAULT_STYLE)
+        if role == Qt.DisplayRole:
+            return icon + record.text
+        if role == Qt.ForegroundRole:
+            return self._brushes.get(record.level, self._default_brush)
+        if role == Qt.FontRole and bold:
+            return self._bold_font
+        if role == Qt.BackgroundRole and self.search is not None and self.search.test(record):
+            return self._highlight_brush
+        if role == Qt.ToolTipRole:
+            return record.format()
+        return None
+
+    def append_lines(self, lines):
+        """追加日志行，返回新增的记录列表"""
+        if len(lines) >= self.buffer.capacity:
+            self.beginResetModel()
+            self.buffer.evict(len(self.buffer))
+            records = self.buffer.extend(lines)
+            self._count = len(self.buffer)
+            self.endResetModel()
+            return records
+        evict = self.buffer.overflow(len(lines))
+        if evict:
+            self.beginRemoveRows(QModelIndex(), 0, evict - 1)
+            self.buffer.evict(evict)
+            self._count = len(self.buffer)
+            self.endRemoveRows()
+        start = len(self.buffer)
+        self.beginInsertRows(QModelIndex(), start, start + len(lines) - 1)
+        records = self.buffer.extend(lines)
+        self._count = len(self.buffer)
+        self.endInsertRows()
+        return records
+
+    def clear(self):
+        self.beginResetModel()
+        self.buffer.clear()
+        self._count = 0
+        self.endResetModel()
+
+    def row_of_seq(self, seq):
+        row = seq - self.buffer.first_seq
+        return row if 0 <= row < len(self.buffer) else -1
+
+
+class LogView(QTableView):
+    """日志视图：固定容量环形缓冲 + 列表视图，只渲染可见行，长时间运行内存保持平稳"""
     append_signal = pyqtSignal(str)
-    def __init__(self):
+
+    def __init__(self, capacity=20000):
         super().__init__()
-        self.setReadOnly(True)
+        self.buffer = LogBuffer(capacity)
+        self.model_ = LogListModel(self.buffer, self)
+        self.setModel(self.model_)
+        # 固定行高的表格视图只按可见区域计算和绘制行，追加/淘汰行不会触发全量重排
+        self.horizontalHeader().hide()
+        self.horizontalHeader().setStretchLastSection(True)
+        self.verticalHeader().hide()
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.verticalHeader().setDefaultSectionSize(20)
+        self.setShowGrid(False)
+        self.setWordWrap(False)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.setMinimumHeight(120)
         self.setStyleSheet("background:#f8f8f8;font-family:Consolas;font-size:13px;")
         # 搜索栏和导出按钮
         self.search_bar = QLineEdit()
         self.search_bar.setPlaceholderText("搜索日志...")
+        self.regex_cb = QCheckBox("正则")
+        self.level_combo = QComboBox()
+        self.level_combo.addItem("全部级别", None)
+        for level in SEARCH_LEVELS:
+            self.level_combo.addItem(level, level)
         self.search_btn = QPushButton("搜索")
         self.prev_btn = QPushButton("上一个")
         self.next_btn = QPushButton("下一个")
+        self.match_label = QLabel("")
         self.export_btn = QPushButton("导出日志")
         self.search_btn.clicked.connect(self.search_log)
+        self.search_bar.returnPressed.connect(self.search_log)
+        self.level_combo.currentIndexChanged.connect(self.search_log)
         self.prev_btn.clicked.connect(self.search_prev)
         self.next_btn.clicked.connect(self.search_next)
         self.export_btn.clicked.connect(self.export_log)
-        self._last_search = ''
-        self._search_results = []  # 匹配QTextCursor列表
-        self._search_index = -1    # 当前高亮索引
+        self._search = None        # 当前搜索（LogSearch）
+        self._search_index = -1    # 当前定位到的匹配下标
         self.append_signal.connect(self.append_log)
-        self.textChanged.connect(self._reset_search)
 
     def thread_safe_append(self, text):
         self.append_signal.emit(text)
 
     def append_log(self, text):
         assert threading.current_thread() == threading.main_thread(), "append_log只能在主线程调用"
-        fmt = QTextCharFormat()
-        icon = ''
-        lower = text.lower()
-        # ERROR/FAILED
-        if any(w in lower for w in ["error", "failed", "失败", "traceback"]):
-            fmt.setForeground(QColor("#ff4d4f"))  # 红色
-            fmt.setFontWeight(QFont.Bold)
-            icon = '❌ '
-        # WARNING
-        elif any(w in lower for w in ["warn", "警告", "warning"]):
-            fmt.setForeground(QColor("#faad14"))  # 橙色
-            fmt.setFontWeight(QFont.Bold)
-            icon = '⚠️ '
-        # SUCCESS
-        elif any(w in lower for w in ["success", "打包成功", "build complete", "completed successfully"]):
-            fmt.setForeground(QColor("#52c41a"))  # 绿色
-            fmt.setFontWeight(QFont.Bold)
-            icon = '✅ '
-        # DEBUG
-        elif "debug" in lower:
-            fmt.setForeground(QColor("#888888"))  # 灰色
-            icon = '🐞 '
-        # INFO
-        elif "info" in lower:
-            fmt.setForeground(QColor("#1890ff"))  # 蓝色
-            icon = 'ℹ️ '
-        else:
-            fmt.setForeground(QColor("#222"))
-        self.moveCursor(self.textCursor().End)
-        self.setCurrentCharFormat(fmt)
-        self.append(icon + text)
-        self.moveCursor(self.textCursor().End)
+        self.append_logs([text])
+
+    def append_logs(self, lines):
+        """整批追加日志，只在原本停留在底部时自动滚动；有搜索时只对新增行做增量匹配"""
+        assert threading.current_thread() == threading.main_thread(), "append_logs只能在主线程调用"
+        if not lines:
+            return
+        # 多行消息拆成多条记录，保证每行高度固定
+        lines = [part for text in lines for part in text.split('\n')]
+        bar = self.verticalScrollBar()
+        at_bottom = bar.value() >= bar.maximum()
+        records = self.model_.append_lines(lines)
+        if self._search is not None:
+            pruned = self._search.prune(self.buffer.first_seq)
+            self._search_index = max(self._search_index - pruned, 0 if self._search.matches else -1)
+            self._search.feed(records)
+            self._update_match_label()
+        if at_bottom:
+            self.scrollToBottom()
 
     def clear_log(self):
         assert threading.current_thread() == threading.main_thread(), "clear_log只能在主线程调用"
-        self.clear()
+        self.model_.clear()
+        self._reset_search()
 
     def _reset_search(self):
         assert threading.current_thread() == threading.main_thread(), "_reset_search只能在主线程调用"
-        self._search_results = []
+        self._search = None
         self._search_index = -1
-        self._last_search = ''
+        self.match_label.setText("")
         self._clear_extra_selection()
 
     def search_log(self):
         assert threading.current_thread() == threading.main_thread(), "search_log只能在主线程调用"
         keyword = self.search_bar.text().strip()
-        if not keyword:
+        try:
+            search = LogSearch(keyword, regex=self.regex_cb.isChecked(), level=self.level_combo.currentData())
+        except re.error as e:
             self._reset_search()
+            self.match_label.setText(f"正则错误: {e}")
             return
-        self._search_results = []
-        doc = self.document()
-        cursor = QTextCursor(doc)
-        while True:
-            cursor = doc.find(keyword, cursor)
-            if cursor.isNull():
-                break
-            self._search_results.append(QTextCursor(cursor))
-        if not self._search_results:
-            self._search_index = -1
-            self._clear_extra_selection()
+        if not search.active:
+            self._reset_search()
             return
-        self._search_index = 0
+        search.rebuild(self.buffer)
+        self._search = search
+        self._search_index = 0 if search.matches else -1
         self._highlight_all(keyword)
+        self._update_match_label()
         self._move_to_result(self._search_index, keyword)
-        self._last_search = keyword
 
     def search_next(self):
         assert threading.current_thread() == threading.main_thread(), "search_next只能在主线程调用"
-        if not self._search_results:
+        if not self._search or not self._search.matches:
             self.search_log()
             return
-        self._search_index = (self._search_index + 1) % len(self._search_results)
-        self._move_to_result(self._search_index, self._last_search)
+        self._search_index = (self._search_index + 1) % len(self._search.matches)
+        self._update_match_label()
+        self._move_to_result(self._search_index, self._search.pattern)
 
     def search_prev(self):
         assert threading.current_thread() == threading.main_thread(), "search_prev只能在主线程调用"
-        if not self._search_results:
+        if not self._search or not self._search.matches:
             self.search_log()
             return
-        self._search_index = (self._search_index - 1 + len(self._search_results)) % len(self._search_results)
-        self._move_to_result(self._search_index, self._last_search)
+        self._search_index = (self._search_index - 1 + len(self._search.matches)) % len(self._search.matches)
+        self._update_match_label()
+        self._move_to_result(self._search_index, self._search.pattern)
+
+    def _update_match_label(self):
+        matches = self._search.matches if self._search else []
+        self.match_label.setText(f"{self._search_index + 1}/{len(matches)}" if matches else "无匹配")
 
     def _move_to_result(self, idx, keyword):
         assert threading.current_thread() == threading.main_thread(), "_move_to_result只能在主线程调用"
-        if not self._search_results or idx < 0 or idx >= len(self._search_results):
+        if not self._search or idx < 0 or idx >= len(self._search.matches):
+            return
+        row = self.model_.row_of_seq(self._search.matches[idx])
+        if row < 0:
             return
-        cursor = self._search_results[idx]
-        self.setTextCursor(cursor)
-        self.ensureCursorVisible()
+        index = self.model_.index(row)
+        self.setCurrentIndex(index)
+        self.scrollTo(index, QAbstractItemView.PositionAtCenter)
 
     def _highlight_all(self, keyword):
+        # 只记录当前搜索，实际高亮在绘制可见行时按需判断
         assert threading.current_thread() == threading.main_thread(), "_highlight_all只能在主线程调用"
-        extraSelections = []
-        for cursor in self._search_results:
-            selection = QTextEdit.ExtraSelection()
-            fmt = QTextCharFormat()
-            fmt.setBackground(QColor("#ffe58f"))
-            selection.format = fmt
-            selection.cursor = cursor
-            extraSelections.append(selection)
-        self.setExtraSelections(extraSelections)
+        self.model_.search = self._search
+        self.viewport().update()
 
     def _clear_extra_selection(self):
         assert threading.current_thread() == threading.main_thread(), "_clear_extra_selection只能在主线程调用"
-        self.setExtraSelections([])
+        self.model_.search = None
+        self.viewport().update()
 
     def export_log(self):
         assert threading.current_thread() == threading.main_thread(), "export_log只能在主线程调用"
         file, _ = QFileDialog.getSaveFileName(self, "导出日志", filter="文本文件 (*.txt)")
         if file:
-            with open(file, 'w', encoding='utf-8') as f:
-                f.write(self.toPlainText()) 
\ No newline at end of file
+            self.buffer.export(file)